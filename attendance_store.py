@@ -0,0 +1,340 @@
+############################################# IMPORTING ################################################
+import csv
+import datetime
+import glob
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+
+############################################# CONSTANTS ################################################
+ATTENDANCE_DB_FILENAME = "attendance.db"
+ATTENDANCE_CSV_COLUMNS = ['Registered_ID', 'Name', 'Date', 'Time'] # Mesmo cabeçalho dos CSVs antigos
+ATTENDANCE_CSV_PATTERN = "Attendance_{date}.csv"
+DATE_FORMAT = '%d-%m-%Y' # Datas como aparecem nos CSVs e na interface
+TIME_FORMATS = ('%I:%M:%S %p', '%H:%M:%S') # Formatos de hora aceitos ao calcular o timestamp
+SQLITE_BUSY_TIMEOUT_SECONDS = 5.0 # Espera por um escritor concorrente antes de desistir
+SCHEMA_VERSION = 1
+DAY_SECONDS = 86400.0
+ATTENDANCE_SYNC = "FULL" # synchronous do SQLite: FULL sincroniza o WAL em disco a cada lote; NORMAL pode perder o último em queda de energia
+ATTENDANCE_FLUSH_INTERVAL_SECONDS = 1.0 # Tempo máximo que uma presença espera na fila antes de ir para o banco
+ATTENDANCE_BATCH_SIZE = 64 # Lote cheio é gravado na hora, sem esperar o intervalo
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS attendance (
+    id INTEGER PRIMARY KEY,
+    student_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    day TEXT NOT NULL,          -- AAAA-MM-DD: a ordem do texto é a ordem das datas
+    time TEXT NOT NULL,         -- hora como exibida (ex.: 08:15:02 AM)
+    timestamp REAL NOT NULL,    -- segundos desde a época, para ordenar e filtrar por horário
+    camera TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS attendance_student_day ON attendance (student_id, day);
+CREATE INDEX IF NOT EXISTS attendance_timestamp ON attendance (timestamp);
+"""
+
+############################################# RECORDS ##################################################
+
+class AttendanceRecord:
+    """Uma presença (uma linha do CSV de presença do dia)."""
+    __slots__ = ("student_id", "name", "date", "time", "timestamp", "camera")
+
+    def __init__(self, student_id, name, date, time, timestamp, camera=None):
+        self.student_id = student_id
+        self.name = name
+        self.date = date # dd-mm-AAAA
+        self.time = time
+        self.timestamp = timestamp
+        self.camera = camera
+
+    def csv_row(self):
+        return [self.student_id, self.name, self.date, self.time]
+
+    def __repr__(self):
+        return f"AttendanceRecord({self.student_id!r}, {self.name!r}, {self.date!r}, {self.time!r})"
+
+
+def _to_day(date):
+    """datetime.date ou 'dd-mm-AAAA' -> 'AAAA-MM-DD' (forma usada no banco)."""
+    if isinstance(date, (datetime.date, datetime.datetime)):
+        return date.strftime('%Y-%m-%d')
+    return datetime.datetime.strptime(date, DATE_FORMAT).strftime('%Y-%m-%d')
+
+
+def _from_day(day):
+    return f"{day[8:10]}-{day[5:7]}-{day[0:4]}"
+
+
+def _timestamp_for(date_str, time_str):
+    # Registros importados dos CSVs não têm timestamp: ele é reconstruído a partir de data e hora
+    for time_format in TIME_FORMATS:
+        try:
+            return datetime.datetime.strptime(f"{date_str} {time_str}", f"{DATE_FORMAT} {time_format}").timestamp()
+        except ValueError:
+            continue
+    return datetime.datetime.strptime(date_str, DATE_FORMAT).timestamp()
+
+
+def _day_start_timestamp(day):
+    return datetime.datetime.strptime(day, '%Y-%m-%d').timestamp()
+
+
+def attendance_csv_path(attendance_dir, date):
+    date_str = date.strftime(DATE_FORMAT) if isinstance(date, (datetime.date, datetime.datetime)) else date
+    return os.path.join(attendance_dir, ATTENDANCE_CSV_PATTERN.format(date=date_str))
+
+############################################# STORE ####################################################
+
+class AttendanceStore:
+    """
+    Presenças em SQLite (modo WAL). Um índice único em (student_id, dia) faz a verificação de
+    duplicidade e impede a mesma presença duas vezes no dia; o índice em timestamp atende às
+    consultas por período. Uma conexão compartilhada entre threads, protegida por um lock.
+    Os CSVs diários continuam disponíveis por export_csv (e-mail, planilhas).
+    """
+
+    def __init__(self, db_path, synchronous=ATTENDANCE_SYNC):
+        self.db_path = db_path
+        self.created = not os.path.isfile(db_path) # Banco novo: quem abre pode importar os CSVs antigos
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=SQLITE_BUSY_TIMEOUT_SECONDS, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA synchronous={synchronous}")
+        with self._conn:
+            self._conn.executescript(SCHEMA)
+            self._conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # --- Escrita ---
+
+    def add(self, student_id, name, date_str, time_str, timestamp=None, camera=None):
+        """Registra uma presença. Retorna False se o estudante já tinha presença nesse dia."""
+        return self.add_many([(student_id, name, date_str, time_str, timestamp, camera)]) == 1
+
+    def add_many(self, records):
+        """
+        Registra várias presenças em uma única transação. records: tuplas
+        (student_id, nome, data, hora[, timestamp[, câmera]]). Retorna quantas eram novas.
+        """
+        rows = []
+        for record in records:
+            student_id, name, date_str, time_str = record[:4]
+            timestamp = record[4] if len(record) > 4 and record[4] is not None else _timestamp_for(date_str, time_str)
+            camera = record[5] if len(record) > 5 else None
+            rows.append((str(student_id), name, _to_day(date_str), time_str, timestamp, camera))
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany("INSERT OR IGNORE INTO attendance (student_id, name, day, time, timestamp, camera) "
+                                   "VALUES (?, ?, ?, ?, ?, ?)", rows)
+            return self._conn.total_changes - before
+
+    def delete_day(self, date):
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM attendance WHERE day = ?", (_to_day(date),)).rowcount
+
+    # --- Consulta ---
+
+    def has(self, student_id, date):
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM attendance WHERE student_id = ? AND day = ?",
+                                     (str(student_id), _to_day(date))).fetchone()
+        return row is not None
+
+    def _select(self, where, params):
+        with self._lock:
+            rows = self._conn.execute("SELECT student_id, name, day, time, timestamp, camera FROM attendance "
+                                      f"WHERE {where} ORDER BY timestamp, id", params).fetchall()
+        return [AttendanceRecord(sid, name, _from_day(day), t, ts, cam) for sid, name, day, t, ts, cam in rows]
+
+    def day(self, date):
+        """Presenças de um dia, em ordem de chegada."""
+        return self.between(date, date)
+
+    def between(self, start_date, end_date, student_id=None):
+        """Presenças de start_date a end_date (inclusive), opcionalmente de um só estudante."""
+        start_day, end_day = _to_day(start_date), _to_day(end_date)
+        if student_id is not None:
+            return self._select("student_id = ? AND day BETWEEN ? AND ?", (str(student_id), start_day, end_day))
+        # Sem estudante, o filtro usa o índice de timestamp; a folga de um dia cobre mudanças de fuso/horário de
+        # verão e o filtro por dia mantém o resultado exato
+        start_ts = _day_start_timestamp(start_day) - DAY_SECONDS
+        end_ts = _day_start_timestamp(end_day) + 2 * DAY_SECONDS
+        return self._select("timestamp BETWEEN ? AND ? AND day BETWEEN ? AND ?", (start_ts, end_ts, start_day, end_day))
+
+    def since(self, timestamp):
+        """Presenças registradas a partir de um instante (segundos desde a época)."""
+        return self._select("timestamp >= ?", (timestamp,))
+
+    def count(self, date=None):
+        with self._lock:
+            if date is None:
+                return self._conn.execute("SELECT COUNT(*) FROM attendance").fetchone()[0]
+            return self._conn.execute("SELECT COUNT(*) FROM attendance WHERE day = ?", (_to_day(date),)).fetchone()[0]
+
+    # --- CSV ---
+
+    def export_csv(self, date, attendance_dir):
+        """Grava (substituindo) o Attendance_dd-mm-AAAA.csv do dia. Retorna o caminho, ou None se o dia está vazio."""
+        records = self.day(date)
+        if not records:
+            return None
+        path = attendance_csv_path(attendance_dir, date)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', newline='') as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(ATTENDANCE_CSV_COLUMNS)
+            writer.writerows(record.csv_row() for record in records)
+        os.replace(tmp_path, path)
+        return path
+
+    def import_csv(self, path):
+        """Importa um CSV de presença no formato antigo. Retorna quantas presenças eram novas."""
+        records = []
+        with open(path, 'r', newline='') as csv_file:
+            reader = csv.reader(csv_file)
+            next(reader, None) # Cabeçalho
+            for line_parts in reader:
+                if len(line_parts) < 4:
+                    continue
+                try:
+                    _to_day(line_parts[2])
+                except ValueError:
+                    print(f"Aviso: Data inválida em {os.path.basename(path)}: {line_parts}")
+                    continue
+                records.append(tuple(line_parts[:4]))
+        return self.add_many(records)
+
+    def import_csv_directory(self, attendance_dir):
+        """Importa todos os Attendance_*.csv da pasta. Retorna o total de presenças novas."""
+        imported = 0
+        for path in sorted(glob.glob(os.path.join(attendance_dir, ATTENDANCE_CSV_PATTERN.format(date="*")))):
+            try:
+                imported += self.import_csv(path)
+            except (OSError, csv.Error, UnicodeDecodeError) as e:
+                print(f"Aviso: Não foi possível importar {os.path.basename(path)}: {e}")
+        return imported
+
+############################################# WRITER ###################################################
+
+class AttendanceWriter:
+    """
+    Grava as presenças no banco enquanto a sessão acontece, em uma thread própria.
+    submit() só enfileira (não bloqueia o loop da câmera); a thread junta o que chegou e grava
+    em uma transação quando o lote enche ou quando a presença mais antiga espera flush_interval.
+    Cada presença vai para a data em que foi reconhecida (sessões que passam da meia-noite).
+    Se o banco falhar, o lote volta para a fila e é tentado de novo no próximo intervalo.
+    """
+
+    def __init__(self, store, flush_interval=ATTENDANCE_FLUSH_INTERVAL_SECONDS, batch_size=ATTENDANCE_BATCH_SIZE,
+                 on_flush=None):
+        self.store = store
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.on_flush = on_flush # on_flush(registros_novos) chamado na thread do gravador
+        self.written = 0 # Presenças novas gravadas
+        self.dates = set() # Datas que receberam presenças (para exportar os CSVs no final)
+        self.pending = [] # Lote que falhou e aguarda nova tentativa
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="AttendanceWriter", daemon=True)
+        self._thread.start()
+
+    def submit(self, student_id, name, date_str, time_str, timestamp=None, camera=None):
+        self._queue.put((student_id, name, date_str, time_str, time.time() if timestamp is None else timestamp, camera))
+
+    def _run(self):
+        batch = []
+        deadline = None
+        stop = False
+        while not stop:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = False # Intervalo esgotado
+            if item is None:
+                stop = True
+            elif item:
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+            if batch and (stop or item is False or len(batch) >= self.batch_size):
+                batch = self._flush(batch)
+                deadline = time.monotonic() + self.flush_interval if batch else None
+        self.pending = batch
+
+    def _flush(self, batch):
+        try:
+            added = self.store.add_many(batch)
+        except sqlite3.Error as e:
+            print(f"Erro ao gravar presenças ({len(batch)} na fila): {e}. Nova tentativa em {self.flush_interval}s.")
+            return batch
+        self.written += added
+        self.dates.update(record[2] for record in batch)
+        if self.on_flush and added:
+            self.on_flush(added)
+        return []
+
+    def close(self):
+        """Grava o que ainda estiver na fila e encerra a thread. Retorna o total de presenças novas."""
+        self._queue.put(None)
+        self._thread.join()
+        if self.pending:
+            print(f"Aviso: {len(self.pending)} presença(s) não puderam ser gravadas no banco.")
+        return self.written
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+if __name__ == "__main__":
+    # Uso: python attendance_store.py import <pasta Attendance> [banco]
+    #      python attendance_store.py export <dd-mm-AAAA> <pasta Attendance> [banco]
+    #      python attendance_store.py bench [dias] [estudantes_por_dia]
+    if len(sys.argv) < 2 or sys.argv[1] not in ("import", "export", "bench"):
+        print("Uso: python attendance_store.py import|export|bench ...")
+        sys.exit(1)
+    if sys.argv[1] == "import":
+        db = sys.argv[3] if len(sys.argv) > 3 else os.path.join(sys.argv[2], ATTENDANCE_DB_FILENAME)
+        with AttendanceStore(db) as store:
+            print(f"{store.import_csv_directory(sys.argv[2])} presença(s) importada(s) para {db}")
+    elif sys.argv[1] == "export":
+        db = sys.argv[4] if len(sys.argv) > 4 else os.path.join(sys.argv[3], ATTENDANCE_DB_FILENAME)
+        with AttendanceStore(db) as store:
+            print(store.export_csv(sys.argv[2], sys.argv[3]) or "Nenhuma presença nesse dia.")
+    else:
+        import tempfile
+        days = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+        per_day = int(sys.argv[3]) if len(sys.argv) > 3 else 300
+        with tempfile.TemporaryDirectory() as tmp_dir, AttendanceStore(os.path.join(tmp_dir, "bench.db")) as store:
+            first = datetime.date(2020, 1, 1)
+            start = time.perf_counter()
+            for d in range(days):
+                date_str = (first + datetime.timedelta(days=d)).strftime(DATE_FORMAT)
+                store.add_many((str(s), f"Aluno {s}", date_str, "08:00:00 AM") for s in range(per_day))
+            print(f"{store.count()} presenças gravadas em {time.perf_counter() - start:.2f}s")
+            last = (first + datetime.timedelta(days=days - 1)).strftime(DATE_FORMAT)
+            start = time.perf_counter()
+            for s in range(1000):
+                store.has(str(s % per_day), last)
+            print(f"Verificação de duplicidade: {(time.perf_counter() - start) * 1000.0:.3f}ms por 1000 consultas")
+            start = time.perf_counter()
+            records = store.between((first + datetime.timedelta(days=days - 30)).strftime(DATE_FORMAT), last)
+            print(f"Últimos 30 dias: {len(records)} presenças em {(time.perf_counter() - start) * 1000.0:.1f}ms")
+            start = time.perf_counter()
+            records = store.between(first.strftime(DATE_FORMAT), last, student_id="7")
+            print(f"Histórico de um estudante: {len(records)} presenças em {(time.perf_counter() - start) * 1000.0:.1f}ms")
@@ -0,0 +1,96 @@
+############################################# IMPORTING ################################################
+import collections
+import queue
+
+############################################# CONSTANTS ################################################
+ATTENDANCE_VIEW_POLL_MS = 250 # Intervalo entre duas leituras da fila de presenças (window.after)
+ATTENDANCE_VIEW_BATCH = 200 # Máximo de linhas inseridas por leitura; o resto fica para a próxima
+ATTENDANCE_VIEW_MAX_ROWS = 500 # Linhas mantidas na tabela; as mais antigas saem quando novas chegam
+
+############################################# VIEW #####################################################
+
+class AttendanceView:
+    """
+    Mantém a Treeview de presenças atualizada durante o reconhecimento.
+    push() pode ser chamado de qualquer thread: só enfileira. drain(), na thread do Tk
+    (agendado com window.after por start()), insere apenas as linhas novas, em lote.
+    A tabela mostra no máximo max_rows linhas (as mais recentes): cada inserção custa o mesmo
+    com 50 ou 5000 presenças no dia. O total do dia continua contado em self.total.
+    """
+
+    def __init__(self, treeview, window=None, max_rows=ATTENDANCE_VIEW_MAX_ROWS, poll_ms=ATTENDANCE_VIEW_POLL_MS,
+                 on_change=None):
+        self.treeview = treeview
+        self.window = window
+        self.max_rows = max_rows
+        self.poll_ms = poll_ms
+        self.on_change = on_change # on_change(view) depois de cada lote inserido (ex.: atualizar um rótulo)
+        self.date = None # Dia exibido (dd-mm-AAAA)
+        self.total = 0 # Presenças do dia, inclusive as que já saíram da tabela
+        self._events = queue.Queue()
+        self._seen = set() # (student_id, data) já exibidos
+        self._items = collections.deque() # Itens da Treeview, do mais antigo ao mais novo
+        self._after_id = None
+
+    def push(self, student_id, name, date_str, time_str):
+        self._events.put((str(student_id), name, date_str, time_str))
+
+    def load_day(self, date_str, records):
+        """Substitui o conteúdo pelo dia informado. records: AttendanceRecord em ordem de chegada."""
+        self._clear(date_str)
+        for record in records:
+            self._seen.add((record.student_id, record.date))
+        self.total = len(self._seen)
+        for record in records[-self.max_rows:]:
+            self._insert(record.student_id, record.name, record.date, record.time)
+        if self.on_change:
+            self.on_change(self)
+
+    def _clear(self, date_str):
+        self.treeview.delete(*self.treeview.get_children())
+        self._items.clear()
+        self._seen.clear()
+        self.total = 0
+        self.date = date_str
+
+    def _insert(self, student_id, name, date_str, time_str):
+        self._items.append(self.treeview.insert('', 'end', text=student_id, values=(name, date_str, time_str)))
+        if len(self._items) > self.max_rows:
+            self.treeview.delete(self._items.popleft())
+
+    def drain(self, max_items=ATTENDANCE_VIEW_BATCH):
+        """Insere as presenças enfileiradas (até max_items). Retorna quantas linhas entraram."""
+        inserted = 0
+        for _ in range(max_items):
+            try:
+                student_id, name, date_str, time_str = self._events.get_nowait()
+            except queue.Empty:
+                break
+            if date_str != self.date: # Virada do dia: a tabela passa a mostrar o novo dia
+                self._clear(date_str)
+            if (student_id, date_str) in self._seen:
+                continue
+            self._seen.add((student_id, date_str))
+            self.total += 1
+            self._insert(student_id, name, date_str, time_str)
+            inserted += 1
+        if inserted:
+            self.treeview.see(self._items[-1])
+            if self.on_change:
+                self.on_change(self)
+        return inserted
+
+    def start(self):
+        """Agenda drain() periodicamente no loop do Tk."""
+        if self.window is not None and self._after_id is None:
+            self._after_id = self.window.after(self.poll_ms, self._tick)
+
+    def _tick(self):
+        self._after_id = None
+        self.drain()
+        self.start()
+
+    def stop(self):
+        if self._after_id is not None:
+            self.window.after_cancel(self._after_id)
+            self._after_id = None
@@ -0,0 +1,245 @@
+############################################# IMPORTING ################################################
+import argparse
+import contextlib
+import csv
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import cv2
+import numpy as np
+
+from frame_sources import SyntheticSource, open_frame_source
+from recognition_engine import RecognitionEngine, EngineError
+
+############################################# CONSTANTS ################################################
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+HAARCASCADE_FILE = os.path.join(BASE_DIR, "haarcascade_frontalface_default.xml")
+MAX_SAMPLES_PER_PERSON = 60 # Mesmo valor usado no cadastro
+RECOGNITION_CONFIDENCE_THRESHOLD = 65
+DEFAULT_GALLERIES = "10x60,50x60" # pessoas x amostras por pessoa
+DEFAULT_FRAMES = 300
+DEFAULT_REGRESSION_TOLERANCE = 0.10 # 10% mais lento que a referência conta como regressão
+REGRESSION_MIN_STAGE_MS = 1.0 # Etapas mais curtas que isso são dominadas pelo ruído de medição
+STAGES = ("capture", "gray", "detect", "predict", "lookup", "overlay", "frame")
+
+############################################# HELPERS ##################################################
+
+def summarize_ms(samples):
+    """Resumo de latências (segundos) em milissegundos: média e percentis 50/95/99."""
+    if not samples:
+        return {"count": 0, "mean_ms": None, "p50_ms": None, "p95_ms": None, "p99_ms": None}
+    samples_ms = np.asarray(samples, dtype=np.float64) * 1000.0
+    p50, p95, p99 = np.percentile(samples_ms, (50, 95, 99))
+    return {"count": int(samples_ms.size), "mean_ms": round(float(samples_ms.mean()), 4),
+            "p50_ms": round(float(p50), 4), "p95_ms": round(float(p95), 4), "p99_ms": round(float(p99), 4)}
+
+
+def parse_galleries(spec):
+    """'10x60,50x60' -> [(10, 60), (50, 60)]"""
+    galleries = []
+    for item in spec.split(","):
+        people, _, samples = item.strip().lower().partition("x")
+        galleries.append((int(people), int(samples or MAX_SAMPLES_PER_PERSON)))
+    return galleries
+
+
+def build_synthetic_gallery(people, samples_per_person, size=100, seed=0):
+    """
+    Gera recortes sintéticos em tons de cinza (textura base por pessoa + ruído por amostra)
+    e os rótulos correspondentes, no formato esperado por recognizer.train.
+    """
+    rng = np.random.default_rng(seed)
+    faces, labels = [], []
+    for person in range(1, people + 1):
+        base = cv2.GaussianBlur(rng.integers(0, 256, (size, size), dtype=np.uint8), (5, 5), 0)
+        for _ in range(samples_per_person):
+            noise = rng.integers(-15, 16, (size, size))
+            faces.append(np.clip(base.astype(np.int16) + noise, 0, 255).astype(np.uint8))
+            labels.append(person)
+    return faces, np.array(labels, dtype=np.int32)
+
+
+def train_gallery_recognizer(people, samples_per_person):
+    faces, labels = build_synthetic_gallery(people, samples_per_person)
+    recognizer = cv2.face.LBPHFaceRecognizer_create()
+    start = time.perf_counter()
+    recognizer.train(faces, labels)
+    return recognizer, time.perf_counter() - start
+
+############################################# PIPELINE #################################################
+
+class StageTimings:
+    """
+    Mesma interface de metrics.Metrics (now/record/observe/incr/frame_done), mas guarda todas
+    as amostras: o benchmark precisa dos percentis exatos da execução inteira, não de uma janela.
+    """
+    enabled = True
+    now = staticmethod(time.perf_counter)
+
+    def __init__(self):
+        self.stages = {stage: [] for stage in STAGES} # nome -> durações (segundos)
+        self.values = {}
+        self.counters = {}
+
+    def record(self, stage, start):
+        end = time.perf_counter()
+        self.stages.setdefault(stage, []).append(end - start)
+        return end
+
+    def observe(self, name, value):
+        self.values.setdefault(name, []).append(value)
+
+    def incr(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def frame_done(self):
+        self.incr("frames")
+
+
+def write_gallery_students(csv_path, people):
+    """Cadastro com um estudante por rótulo da galeria sintética (seriais 1..people)."""
+    with open(csv_path, 'w', newline='', encoding='utf-8') as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(["SERIAL NO.", "ID", "NAME"])
+        for person in range(1, people + 1):
+            writer.writerow([person, 1000 + person, f"Pessoa {person}"])
+
+
+def run_pipeline(source, recognizer, max_frames, tracking=False, downscale=None, people=None):
+    """
+    Passa os quadros da fonte pelo RecognitionEngine, o mesmo motor do track_images_action:
+    captura -> cvtColor -> detecção/rastreamento -> predict com votação -> cadastro -> overlay,
+    medindo cada etapa com os próprios pontos de instrumentação do motor.
+    tracking/downscale ligam as otimizações do motor de reconhecimento.
+    """
+    timings = StageTimings()
+    faces_seen = 0
+    with tempfile.TemporaryDirectory() as work_dir:
+        student_csv = os.path.join(work_dir, "StudentDetails.csv")
+        write_gallery_students(student_csv, people or len(np.unique(recognizer.getLabels())))
+        engine = RecognitionEngine(cascade_file=HAARCASCADE_FILE, student_csv=student_csv,
+                                   confidence_threshold=RECOGNITION_CONFIDENCE_THRESHOLD, tracking=tracking,
+                                   downscale=downscale, hot_reload=False, metrics=timings)
+        # Mensagens do motor (presenças etc.) vão para o stderr: o stdout fica só com o JSON
+        with contextlib.redirect_stdout(sys.stderr):
+            try:
+                engine.load(recognizer)
+            except EngineError as e:
+                raise IOError(f"{e.title}: {e.message}")
+            if not source.open():
+                raise IOError(f"Não foi possível abrir a fonte {source.describe()}")
+            run_start = time.perf_counter()
+            try:
+                while len(timings.stages["frame"]) < max_frames:
+                    t0 = timings.now()
+                    ret, frame = source.read()
+                    if not ret:
+                        break
+                    timings.record("capture", t0)
+                    results = engine.process_frame(frame)
+                    t = timings.now()
+                    engine.draw_overlay(frame, results)
+                    timings.record("overlay", t)
+                    timings.record("frame", t0)
+                    timings.frame_done()
+                    faces_seen += len(results)
+            finally:
+                source.release()
+            elapsed = time.perf_counter() - run_start
+
+    frames = len(timings.stages["frame"])
+    return {
+        "frames": frames,
+        "fps": round(frames / elapsed, 2) if elapsed > 0 else None,
+        "faces_per_frame": round(faces_seen / frames, 3) if frames else 0.0,
+        "predict_calls": engine.voter.predict_calls,
+        "detections_run": engine.tracker.detections_run if engine.tracker else frames,
+        "stages": {stage: summarize_ms(values) for stage, values in timings.stages.items()},
+    }
+
+
+def make_source(spec, frames, faces_per_frame):
+    if spec in (None, "", "synthetic"):
+        return SyntheticSource(640, 480, num_frames=frames, face_images=[None] * max(1, faces_per_frame))
+    return open_frame_source(spec)
+
+############################################# REGRESSIONS ##############################################
+
+def find_regressions(current, reference, tolerance=DEFAULT_REGRESSION_TOLERANCE):
+    """Compara p95 de cada etapa e o FPS com um JSON de referência; retorna a lista de regressões."""
+    reference_runs = {(r["mode"], r["gallery_people"], r["samples_per_person"]): r for r in reference.get("runs", [])}
+    regressions = []
+    for run in current["runs"]:
+        key = (run["mode"], run["gallery_people"], run["samples_per_person"])
+        old = reference_runs.get(key)
+        if old is None:
+            continue
+        if old.get("fps") and run.get("fps") and run["fps"] < old["fps"] * (1.0 - tolerance):
+            regressions.append(f"{key}: FPS {old['fps']} -> {run['fps']}")
+        for stage in STAGES:
+            old_p95 = old["stages"].get(stage, {}).get("p95_ms")
+            new_p95 = run["stages"].get(stage, {}).get("p95_ms")
+            # Ignora etapas muito curtas, onde o ruído de medição domina
+            if old_p95 and new_p95 and old_p95 >= REGRESSION_MIN_STAGE_MS and new_p95 > old_p95 * (1.0 + tolerance):
+                regressions.append(f"{key}: {stage} p95 {old_p95}ms -> {new_p95}ms")
+    return regressions
+
+############################################# CLI ######################################################
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark ponta a ponta do pipeline de reconhecimento.")
+    parser.add_argument("--source", default="synthetic", help="Vídeo, pasta de imagens ou 'synthetic' (padrão)")
+    parser.add_argument("--frames", type=int, default=DEFAULT_FRAMES)
+    parser.add_argument("--faces", type=int, default=1, help="Rostos por quadro na fonte sintética")
+    parser.add_argument("--galleries", default=DEFAULT_GALLERIES, help="Tamanhos de galeria, ex.: 10x60,100x60")
+    parser.add_argument("--modes", default="baseline,optimized",
+                        help="baseline = como o track_images_action original; optimized = rastreamento + redução")
+    parser.add_argument("--output", help="Grava o resultado em JSON neste arquivo")
+    parser.add_argument("--compare", help="JSON de uma execução anterior para detectar regressões")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_REGRESSION_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    report = {
+        "created_at": time.strftime('%Y-%m-%dT%H:%M:%S'),
+        "machine": {"python": platform.python_version(), "opencv": cv2.__version__,
+                    "platform": platform.platform(), "cpus": os.cpu_count()},
+        "config": {"source": args.source, "frames": args.frames, "faces_per_frame": args.faces},
+        "runs": [],
+    }
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    for people, samples in parse_galleries(args.galleries):
+        recognizer, train_seconds = train_gallery_recognizer(people, samples)
+        for mode in modes:
+            optimized = mode == "optimized"
+            source = make_source(args.source, args.frames, args.faces)
+            result = run_pipeline(source, recognizer, args.frames, tracking=optimized,
+                                  downscale="auto" if optimized else None, people=people)
+            result.update({"mode": mode, "gallery_people": people, "samples_per_person": samples,
+                           "gallery_size": people * samples, "train_seconds": round(train_seconds, 3)})
+            report["runs"].append(result)
+            stages = result["stages"]
+            print(f"{mode:>9} {people}x{samples}: {result['fps']} FPS | "
+                  + " | ".join(f"{s} p50={stages[s]['p50_ms']} p95={stages[s]['p95_ms']} p99={stages[s]['p99_ms']}"
+                               for s in ("detect", "predict", "frame")), file=sys.stderr)
+
+    output_json = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as out_file:
+            out_file.write(output_json)
+    else:
+        print(output_json)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as ref_file:
+            regressions = find_regressions(report, json.load(ref_file), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSÃO: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
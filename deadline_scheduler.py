@@ -0,0 +1,145 @@
+############################################# IMPORTING ################################################
+import heapq
+import itertools
+import threading
+import time
+
+############################################# SCHEDULER ################################################
+
+class DeadlineTimer:
+    """
+    Um prazo reaproveitável (ex.: o fechamento automático de uma porta). Criado uma vez com
+    DeadlineScheduler.timer(); extend() só troca o instante de disparo (O(1), sem criar objetos
+    quando o prazo é adiado), então pode ser chamado a cada quadro.
+    """
+    __slots__ = ("scheduler", "callback", "name", "when", "_queued", "_generation")
+
+    def __init__(self, scheduler, callback, name=None):
+        self.scheduler = scheduler
+        self.callback = callback # callback(timer), chamado na thread do agendador
+        self.name = name
+        self.when = None # Instante de disparo (relógio do agendador); None = desarmado
+        self._queued = None # Instante da entrada válida no heap (pode ser anterior a when)
+        self._generation = 0
+
+    @property
+    def armed(self):
+        return self.when is not None
+
+    def extend(self, delay):
+        """Dispara daqui a delay segundos, substituindo o prazo anterior."""
+        self.scheduler._set(self, self.scheduler.clock() + delay)
+
+    def cancel(self):
+        self.scheduler._set(self, None)
+
+    def remaining(self):
+        when = self.when
+        return None if when is None else max(0.0, when - self.scheduler.clock())
+
+
+class DeadlineScheduler:
+    """
+    Agendador de prazos em relógio monotônico, sem Tk: uma thread atende todas as portas.
+    Cada DeadlineTimer tem no máximo um prazo. Adiar um prazo não mexe no heap: a entrada
+    antiga dispara no instante original, vê que o prazo mudou e volta para o heap uma única
+    vez com o instante novo. Só antecipar um prazo (ou armar um desarmado) insere no heap.
+    Sem start(), run_due() pode ser chamado manualmente (testes com relógio falso, outros loops).
+    """
+
+    def __init__(self, clock=time.monotonic, name="DeadlineScheduler"):
+        self.clock = clock
+        self.name = name
+        self.fired = 0
+        self._heap = [] # (instante, sequência, geração, timer)
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+
+    def timer(self, callback, name=None):
+        return DeadlineTimer(self, callback, name)
+
+    def _set(self, timer, when):
+        with self._cond:
+            timer.when = when
+            if when is None or (timer._queued is not None and when >= timer._queued):
+                return # Desarmado ou adiado: a entrada existente no heap resolve
+            timer._generation += 1
+            timer._queued = when
+            heapq.heappush(self._heap, (when, next(self._sequence), timer._generation, timer))
+            if self._heap[0][3] is timer:
+                self._cond.notify() # Novo prazo mais próximo: acorda a thread
+
+    def _pop_due(self, now):
+        """Remove do heap os prazos vencidos. Retorna os timers a disparar e o próximo instante."""
+        due = []
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            _, _, generation, timer = heapq.heappop(heap)
+            if generation != timer._generation:
+                continue # Entrada substituída por um prazo antecipado
+            if timer.when is None:
+                timer._queued = None
+            elif timer.when > now: # Adiado desde que entrou no heap
+                timer._generation += 1
+                timer._queued = timer.when
+                heapq.heappush(heap, (timer.when, next(self._sequence), timer._generation, timer))
+            else:
+                timer.when = timer._queued = None
+                due.append(timer)
+        return due, (heap[0][0] if heap else None)
+
+    def _fire(self, due):
+        for timer in due:
+            self.fired += 1
+            try:
+                timer.callback(timer)
+            except Exception as e:
+                print(f"Erro no prazo {timer.name or timer.callback}: {e}")
+
+    def run_due(self, now=None):
+        """Dispara os prazos vencidos (callbacks fora do lock). Retorna o próximo instante ou None."""
+        with self._cond:
+            due, next_when = self._pop_due(self.clock() if now is None else now)
+        self._fire(due)
+        return next_when
+
+    def start(self):
+        if self._thread is None:
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._running:
+                    return
+                now = self.clock()
+                due, next_when = self._pop_due(now)
+                if not due:
+                    self._cond.wait(None if next_when is None else next_when - now)
+                    continue
+            self._fire(due)
+
+
+_default_scheduler = None
+_default_lock = threading.Lock()
+
+def default_scheduler():
+    """Agendador compartilhado do processo (uma thread para todas as portas), iniciado no primeiro uso."""
+    global _default_scheduler
+    with _default_lock:
+        if _default_scheduler is None:
+            _default_scheduler = DeadlineScheduler().start()
+        return _default_scheduler
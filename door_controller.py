@@ -0,0 +1,257 @@
+############################################# IMPORTING ################################################
+import sys
+import threading
+import time
+
+from deadline_scheduler import default_scheduler
+
+############################################# CONSTANTS ################################################
+DOOR_OPEN_COMMAND = 'O'
+DOOR_CLOSE_COMMAND = 'F'
+DOOR_BAUD_RATE = 9600
+DOOR_CONNECTION_TIMEOUT = 1 # Segundos de timeout da porta serial
+DOOR_BOOT_DELAY = 2 # O Arduino reinicia ao abrir a serial; comandos só depois disso
+DOOR_AUTO_CLOSE_SECONDS = 4
+DOOR_RECONNECT_INTERVAL_SECONDS = 5.0 # Espera entre tentativas de reconexão
+MOCK_PORT = "mock" # Porta simulada em memória (sem Arduino); "loop://" usa o loopback do pyserial
+
+DOOR_CLOSED = "closed"
+DOOR_OPEN = "open"
+
+############################################# SERIAL ###################################################
+
+class MockSerialPort:
+    """
+    Porta serial simulada: guarda os bytes escritos com o instante de cada escrita.
+    fail_writes=True simula o cabo desconectado (a próxima escrita levanta OSError).
+    """
+
+    def __init__(self):
+        self.is_open = True
+        self.writes = [] # (time.monotonic(), bytes)
+        self.fail_writes = False
+
+    def write(self, data):
+        if self.fail_writes or not self.is_open:
+            raise OSError("porta serial simulada desconectada")
+        self.writes.append((time.monotonic(), bytes(data)))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.is_open = False
+
+    def commands(self):
+        return "".join(data.decode('ascii') for _, data in self.writes)
+
+
+def open_serial_port(port, baudrate=DOOR_BAUD_RATE, timeout=DOOR_CONNECTION_TIMEOUT):
+    """Abre a porta: "mock" -> MockSerialPort; nomes (COM7, /dev/ttyUSB0) e URLs (loop://) -> pyserial."""
+    if port == MOCK_PORT:
+        return MockSerialPort()
+    import serial
+    return serial.serial_for_url(port, baudrate=baudrate, timeout=timeout, write_timeout=timeout)
+
+############################################# CONTROLLER ###############################################
+
+class DoorController:
+    """
+    Controla o servo da porta em uma thread própria. open()/close() só registram o estado
+    desejado e voltam na hora (podem ser chamados a cada quadro): pedidos repetidos se fundem
+    em um só, e o comando só vai para a serial quando o estado desejado difere do atual.
+    Abrir uma porta já aberta apenas adia o fechamento automático: um único DeadlineTimer por
+    porta, em um agendador que pode ser compartilhado por várias portas (padrão: default_scheduler()).
+    A conexão (com a espera do boot do Arduino) e as reconexões acontecem nesta thread;
+    depois de reconectar, o estado desejado é enviado de novo.
+    """
+
+    def __init__(self, port, baudrate=DOOR_BAUD_RATE, open_command=DOOR_OPEN_COMMAND,
+                 close_command=DOOR_CLOSE_COMMAND, auto_close_seconds=DOOR_AUTO_CLOSE_SECONDS,
+                 boot_delay=DOOR_BOOT_DELAY, reconnect_interval=DOOR_RECONNECT_INTERVAL_SECONDS,
+                 name="porta", opener=open_serial_port, scheduler=None):
+        self.port = port
+        self.baudrate = baudrate
+        self.open_command = open_command
+        self.close_command = close_command
+        self.auto_close_seconds = auto_close_seconds
+        self.boot_delay = boot_delay
+        self.reconnect_interval = reconnect_interval
+        self.name = name
+        self.opener = opener
+        self.serial = None
+        self.state = None # Último estado enviado à porta (None = desconhecido)
+        self.commands_sent = 0
+        self.requests = 0 # Chamadas de open()/close(), inclusive as que não geraram comando
+        self.last_error = None
+        self._desired = DOOR_CLOSED
+        self.scheduler = scheduler or default_scheduler()
+        self._auto_close = self.scheduler.timer(self._auto_close_expired, name) # Prazo de fechamento automático
+        self._reconnect_at = 0.0
+        self._running = False
+        self._cond = threading.Condition()
+        self._thread = None
+
+    # --- API (qualquer thread, sem bloquear) ---
+
+    def start(self):
+        if self._thread is None:
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name=f"DoorController-{self.name}", daemon=True)
+            self._thread.start()
+        return self
+
+    def open(self, hold_seconds=None):
+        """
+        Pede a porta aberta por hold_seconds (padrão auto_close_seconds) a partir de agora.
+        Retorna True se a porta estava fechada (um comando será enviado), False se só o prazo foi estendido.
+        """
+        with self._cond:
+            self.requests += 1
+            self._auto_close.extend(self.auto_close_seconds if hold_seconds is None else hold_seconds)
+            if self._desired == DOOR_OPEN:
+                return False
+            self._desired = DOOR_OPEN
+            self._cond.notify()
+            return True
+
+    def close(self):
+        with self._cond:
+            self.requests += 1
+            self._auto_close.cancel()
+            if self._desired != DOOR_CLOSED:
+                self._desired = DOOR_CLOSED
+                self._cond.notify()
+
+    @property
+    def connected(self):
+        return self.serial is not None
+
+    @property
+    def is_open(self):
+        return self._desired == DOOR_OPEN
+
+    def describe(self):
+        if not self.connected:
+            return "desconectada" if self.last_error else "conectando..."
+        return "aberta" if self._desired == DOOR_OPEN else "fechada"
+
+    def stop(self, close_door=True, timeout=DOOR_BOOT_DELAY + DOOR_CONNECTION_TIMEOUT + 1.0):
+        """Fecha a porta (se pedido), espera o comando sair e encerra a thread e a serial."""
+        with self._cond:
+            self._auto_close.cancel()
+            if close_door:
+                self._desired = DOOR_CLOSED
+            self._running = False
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    # --- Thread ---
+
+    def _auto_close_expired(self, timer):
+        with self._cond:
+            if timer.armed or self._desired != DOOR_OPEN:
+                return # Reaberta (ou fechada) depois que o prazo venceu
+            self._desired = DOOR_CLOSED
+            self._cond.notify()
+        print(f"Tempo expirado. Fechando a {self.name} automaticamente.")
+
+    def _run(self):
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                if self.serial is None and now >= self._reconnect_at and (self._running or self.state != self._desired):
+                    self._connect() # Libera o lock durante a conexão
+                    continue
+                if self.serial is not None and self.state != self._desired:
+                    self._send(self._desired)
+                    continue
+                if not self._running:
+                    break
+                self._cond.wait(None if self.serial is not None else max(0.0, self._reconnect_at - now))
+        self._disconnect()
+
+    def _connect(self):
+        self._cond.release()
+        try:
+            print(f"Tentando conectar à {self.name} em {self.port}...")
+            port = self.opener(self.port, self.baudrate)
+            time.sleep(self.boot_delay) # Fora da thread do Tk: a janela não congela
+        except Exception as e:
+            port = None
+            error = e
+        self._cond.acquire()
+        if port is None:
+            self.last_error = str(error)
+            self._reconnect_at = time.monotonic() + self.reconnect_interval
+            print(f"Erro: Não foi possível conectar à {self.name} em {self.port}. {error} "
+                  f"Nova tentativa em {self.reconnect_interval:.0f}s.")
+            if not self._running:
+                self._desired = self.state # Encerrando: não insiste na reconexão
+            return
+        self.serial = port
+        self.state = None # Depois de um reset do Arduino a posição é desconhecida: reenvia o estado
+        self.last_error = None
+        print(f"Conectado à {self.name} em {self.port}.")
+
+    def _send(self, state):
+        command = self.open_command if state == DOOR_OPEN else self.close_command
+        port = self.serial
+        self._cond.release()
+        try:
+            port.write(command.encode('utf-8'))
+            port.flush()
+            error = None
+        except Exception as e:
+            error = e
+        self._cond.acquire()
+        if error is not None:
+            print(f"Erro de comunicação serial ao enviar '{command}': {error}. Reconectando em segundo plano.")
+            self.last_error = str(error)
+            self._drop_port()
+            self._reconnect_at = time.monotonic() + self.reconnect_interval
+            return
+        self.state = state
+        self.commands_sent += 1
+        print(f"Comando '{command}' enviado à {self.name}.")
+
+    def _drop_port(self):
+        port, self.serial = self.serial, None
+        try:
+            port.close()
+        except Exception:
+            pass
+
+    def _disconnect(self):
+        with self._cond:
+            if self.serial is not None:
+                self._drop_port()
+                print(f"Desconectado da {self.name}.")
+
+
+if __name__ == "__main__":
+    # Uso: python door_controller.py [porta] [segundos]
+    # Simula um rosto reconhecido a cada quadro (30 fps) durante 1s e mostra os comandos enviados.
+    port_name = sys.argv[1] if len(sys.argv) > 1 else MOCK_PORT
+    hold = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+    opened_ports = []
+
+    def recording_opener(port, baudrate):
+        opened_ports.append(open_serial_port(port, baudrate))
+        return opened_ports[-1]
+
+    controller = DoorController(port_name, auto_close_seconds=hold, boot_delay=0.0, opener=recording_opener).start()
+    start = time.perf_counter()
+    for _ in range(30):
+        controller.open()
+        time.sleep(1.0 / 30)
+    time.sleep(hold + 0.2)
+    controller.stop()
+    print(f"{controller.requests} pedidos, {controller.commands_sent} comandos enviados "
+          f"em {time.perf_counter() - start:.2f}s")
+    for opened in opened_ports:
+        if isinstance(opened, MockSerialPort):
+            print(f"Comandos recebidos pela porta simulada: {opened.commands()}")
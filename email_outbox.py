@@ -0,0 +1,571 @@
+############################################# IMPORTING ################################################
+import base64
+import configparser
+import datetime
+import itertools
+import json
+import os
+import queue
+import shutil
+import smtplib
+import socketserver
+import sys
+import threading
+import time
+from email import encoders
+from email.mime.base import MIMEBase
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+############################################# CONSTANTS ################################################
+EMAIL_CONFIG_SECTION = "Email" # Seção do config.ini com address, password e os opcionais abaixo
+SMTP_DEFAULT_PORT = 587
+SMTP_SERVERS = {"gmail.com": "smtp.gmail.com", "yahoo.com": "smtp.mail.yahoo.com", # Pelo domínio do remetente
+                "hotmail.com": "smtp.office365.com", "outlook.com": "smtp.office365.com", "icloud.com": "smtp.mail.me.com"}
+SMTP_TIMEOUT_SECONDS = 20 # Timeout de cada operação na conexão SMTP
+SMTP_IDLE_SECONDS = 60 # A sessão fica aberta esse tempo depois do último envio, para os próximos e-mails
+OUTBOX_RETRY_BASE_SECONDS = 30 # Espera antes da 2ª tentativa; dobra a cada falha
+OUTBOX_RETRY_MAX_SECONDS = 3600
+OUTBOX_MAX_ATTEMPTS = 8 # Depois disso o e-mail vai para a pasta failed/
+OUTBOX_FAILED_DIRNAME = "failed"
+DAILY_STATE_FILENAME = "daily.json" # Último dia em que o relatório diário foi enfileirado
+
+JOB_MANUAL = "manual" # Enviado pelo botão
+JOB_DAILY = "daily" # Relatório diário agendado
+
+RESULT_SENT = "sent"
+RESULT_RETRY = "retry" # Falhou; nova tentativa agendada
+RESULT_FAILED = "failed" # Desistiu (destinatário recusado ou tentativas esgotadas)
+
+############################################# SETTINGS #################################################
+
+class EmailSettings:
+    """Remetente, servidor SMTP e relatório diário, lidos do config.ini."""
+
+    def __init__(self, address="", password="", smtp_server=None, smtp_port=SMTP_DEFAULT_PORT, use_tls=True,
+                 daily_recipients=(), daily_time=None):
+        self.address = address
+        self.password = password
+        self.smtp_server = smtp_server or SMTP_SERVERS.get(address.rpartition("@")[2].lower())
+        self.smtp_port = smtp_port
+        self.use_tls = use_tls
+        self.daily_recipients = list(daily_recipients)
+        self.daily_time = daily_time # "HH:MM" ou None
+
+    @property
+    def configured(self):
+        return bool(self.address and self.smtp_server)
+
+
+def load_email_settings(config_path):
+    """
+    [Email] do config.ini: address e password obrigatórios; opcionais smtp_server, smtp_port,
+    use_tls, daily_report_to (e-mails separados por vírgula) e daily_report_time (HH:MM).
+    Sem o arquivo ou a seção, devolve configurações vazias (configured == False).
+    """
+    parser = configparser.ConfigParser()
+    parser.read(config_path, encoding='utf-8')
+    if not parser.has_section(EMAIL_CONFIG_SECTION):
+        return EmailSettings()
+    section = parser[EMAIL_CONFIG_SECTION]
+    daily_time = section.get("daily_report_time", "").strip() or None
+    if daily_time:
+        datetime.datetime.strptime(daily_time, "%H:%M") # ValueError se o horário for inválido
+    return EmailSettings(address=section.get("address", "").strip(),
+                         password=section.get("password", "").strip(),
+                         smtp_server=section.get("smtp_server", "").strip() or None,
+                         smtp_port=section.getint("smtp_port", SMTP_DEFAULT_PORT),
+                         use_tls=section.getboolean("use_tls", True),
+                         daily_recipients=[r.strip() for r in section.get("daily_report_to", "").split(",") if r.strip()],
+                         daily_time=daily_time)
+
+
+def build_message(from_email, recipients, subject, body, attachments=()):
+    msg = MIMEMultipart()
+    msg['From'] = from_email
+    msg['To'] = ", ".join(recipients)
+    msg['Subject'] = subject
+    msg.attach(MIMEText(body, 'plain'))
+    for path in attachments:
+        with open(path, "rb") as attachment:
+            part = MIMEBase('application', 'octet-stream')
+            part.set_payload(attachment.read())
+        encoders.encode_base64(part)
+        part.add_header('Content-Disposition', f"attachment; filename= {os.path.basename(path)}")
+        msg.attach(part)
+    return msg
+
+############################################# OUTBOX ###################################################
+
+class OutboxJob:
+    """
+    Um e-mail na fila. A mensagem pronta fica em {id}.eml e o estado em {id}.json, gravado por
+    último (e reescrito a cada tentativa): um .eml sem .json é um enfileiramento interrompido.
+    """
+
+    def __init__(self, job_id, kind, from_email, recipients, subject, created, attempts=0, next_attempt=0.0,
+                 last_error=None):
+        self.job_id = job_id
+        self.kind = kind
+        self.from_email = from_email
+        self.recipients = recipients
+        self.subject = subject
+        self.created = created
+        self.attempts = attempts
+        self.next_attempt = next_attempt # time.time(): sobrevive a reinícios do programa
+        self.last_error = last_error
+        self.refused = [] # Destinatários recusados pelo servidor num envio aceito para os demais
+
+    @property
+    def delivered_to(self):
+        return [recipient for recipient in self.recipients if recipient not in self.refused]
+
+    def to_dict(self):
+        return {"id": self.job_id, "kind": self.kind, "from": self.from_email, "to": self.recipients,
+                "subject": self.subject, "created": self.created, "attempts": self.attempts,
+                "next_attempt": self.next_attempt, "last_error": self.last_error}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["id"], data["kind"], data["from"], data["to"], data["subject"], data["created"],
+                   data.get("attempts", 0), data.get("next_attempt", 0.0), data.get("last_error"))
+
+
+_job_sequence = itertools.count() # Junto com o pid, distingue e-mails enfileirados no mesmo segundo
+
+def _write_atomic(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as output:
+        output.write(data)
+    os.replace(tmp_path, path)
+
+
+class EmailOutbox:
+    """
+    Fila de e-mails em disco com uma thread de envio. enqueue() monta a mensagem, grava na
+    pasta e volta (nenhuma conexão na thread do Tk). A thread envia os e-mails vencidos em lote
+    pela mesma sessão SMTP, que fica aberta por idle_seconds para os próximos; uma sessão que o
+    servidor derrubou é reaberta uma vez. Falhas são tentadas de novo com espera dobrando até
+    retry_max; o que sobra da fila ao fechar o programa é enviado na próxima execução.
+    Os resultados chegam em self.results como (job, RESULT_*, erro), para a GUI ler com window.after.
+    Se o servidor aceita a mensagem mas recusa parte dos destinatários, o resultado é RESULT_SENT
+    com um SMTPRecipientsRefused como erro, e job.refused lista os recusados (não há nova tentativa).
+    """
+
+    def __init__(self, directory, settings, smtp_factory=smtplib.SMTP, retry_base=OUTBOX_RETRY_BASE_SECONDS,
+                 retry_max=OUTBOX_RETRY_MAX_SECONDS, max_attempts=OUTBOX_MAX_ATTEMPTS, idle_seconds=SMTP_IDLE_SECONDS):
+        self.directory = directory
+        self.settings = settings
+        self.smtp_factory = smtp_factory
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.max_attempts = max_attempts
+        self.idle_seconds = idle_seconds
+        self.results = queue.Queue()
+        self.sent = 0
+        self.connections = 0 # Sessões SMTP abertas (para conferir o reaproveitamento)
+        self._jobs = {}
+        self._session = None
+        self._session_expires = 0.0
+        self._daily_time = None
+        self._daily_builder = None
+        self._daily_at = None
+        self._daily_failures = 0 # Falhas seguidas ao preparar o relatório diário (espera exponencial)
+        self._daily_last = None # Último dia enfileirado, mesmo se o daily.json não pôde ser gravado
+        self._running = False
+        self._cond = threading.Condition()
+        self._thread = None
+        os.makedirs(directory, exist_ok=True)
+        self._load_jobs()
+
+    # --- API ---
+
+    def enqueue(self, recipients, subject, body, attachments=(), kind=JOB_MANUAL):
+        """Grava o e-mail na fila e acorda a thread de envio. Retorna o OutboxJob."""
+        if isinstance(recipients, str):
+            recipients = [recipients]
+        if not recipients:
+            raise ValueError("Nenhum destinatário informado.")
+        job_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(_job_sequence)}"
+        msg = build_message(self.settings.address, recipients, subject, body, attachments)
+        job = OutboxJob(job_id, kind, self.settings.address, list(recipients), subject, time.time())
+        _write_atomic(self._path(job_id, ".eml"), msg.as_bytes())
+        self._save(job)
+        with self._cond:
+            self._jobs[job_id] = job
+            self._cond.notify()
+        return job
+
+    def schedule_daily(self, at_time, build_job):
+        """
+        Enfileira todo dia às at_time ("HH:MM") o e-mail de build_job(data), que devolve
+        (destinatários, assunto, corpo, anexos) ou None para pular o dia. Se o programa abrir
+        depois do horário e o relatório do dia ainda não saiu, ele é enfileirado na hora.
+        """
+        with self._cond:
+            self._daily_time = datetime.datetime.strptime(at_time, "%H:%M").time()
+            self._daily_builder = build_job
+            self._daily_at = self._next_daily(datetime.datetime.now())
+            self._cond.notify()
+
+    def pending(self):
+        with self._cond:
+            return len(self._jobs)
+
+    def start(self):
+        if self._thread is None:
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name="EmailOutbox", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=SMTP_TIMEOUT_SECONDS):
+        """Encerra a thread (o envio em andamento termina antes); a fila continua em disco."""
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        self._close_session()
+
+    # --- Disco ---
+
+    def _path(self, job_id, extension):
+        return os.path.join(self.directory, job_id + extension)
+
+    def _save(self, job):
+        _write_atomic(self._path(job.job_id, ".json"), json.dumps(job.to_dict(), ensure_ascii=False).encode('utf-8'))
+
+    def _load_jobs(self):
+        for filename in sorted(os.listdir(self.directory)):
+            if not filename.endswith(".json") or filename == DAILY_STATE_FILENAME:
+                continue
+            try:
+                with open(os.path.join(self.directory, filename), encoding='utf-8') as job_file:
+                    job = OutboxJob.from_dict(json.load(job_file))
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Aviso: Ignorando {filename} na fila de e-mails: {e}")
+                continue
+            if os.path.isfile(self._path(job.job_id, ".eml")):
+                self._jobs[job.job_id] = job
+        if self._jobs:
+            print(f"{len(self._jobs)} e-mail(s) pendente(s) na fila de envio.")
+
+    def _remove(self, job, failed=False):
+        failed_dir = os.path.join(self.directory, OUTBOX_FAILED_DIRNAME)
+        if failed:
+            os.makedirs(failed_dir, exist_ok=True)
+        for extension in (".eml", ".json"):
+            path = self._path(job.job_id, extension)
+            try:
+                if failed:
+                    shutil.move(path, os.path.join(failed_dir, os.path.basename(path)))
+                else:
+                    os.remove(path)
+            except OSError as e:
+                print(f"Aviso: Não foi possível remover {os.path.basename(path)} da fila de e-mails: {e}")
+
+    def _read_daily_state(self):
+        try:
+            with open(os.path.join(self.directory, DAILY_STATE_FILENAME), encoding='utf-8') as state_file:
+                return json.load(state_file).get("last_date")
+        except (OSError, ValueError):
+            return None
+
+    # --- Relatório diário ---
+
+    def _next_daily(self, now):
+        today_at = datetime.datetime.combine(now.date(), self._daily_time)
+        last_date = self._daily_last or self._read_daily_state()
+        if now >= today_at and last_date != now.date().isoformat():
+            return now.timestamp() # Horário de hoje já passou e o relatório não saiu
+        if now >= today_at:
+            today_at += datetime.timedelta(days=1)
+        return today_at.timestamp()
+
+    def _run_daily(self):
+        """
+        Enfileira o relatório do dia. Se build_job ou enqueue falhar, tenta de novo com a mesma
+        espera exponencial dos envios (retry_base, dobrando até retry_max), sem passar do
+        horário do dia seguinte.
+        """
+        day = datetime.date.today()
+        try:
+            job = self._daily_builder(day)
+            if job is not None:
+                recipients, subject, body, attachments = job
+                self.enqueue(recipients, subject, body, attachments, kind=JOB_DAILY)
+                print(f"Relatório diário de {day.strftime('%d-%m-%Y')} enfileirado para {', '.join(recipients)}.")
+        except Exception as e:
+            self._daily_failures += 1
+            delay = min(self.retry_max, self.retry_base * 2 ** (self._daily_failures - 1))
+            print(f"Erro ao preparar o relatório diário: {e} (nova tentativa em {delay:.0f}s)")
+            next_day = datetime.datetime.combine(day + datetime.timedelta(days=1), self._daily_time)
+            with self._cond:
+                self._daily_at = min(time.time() + delay, next_day.timestamp())
+            return
+        self._daily_failures = 0
+        self._daily_last = day.isoformat() # Sem isso, uma falha ao gravar o estado reenviaria o relatório
+        try:
+            _write_atomic(os.path.join(self.directory, DAILY_STATE_FILENAME),
+                          json.dumps({"last_date": day.isoformat()}).encode('utf-8'))
+        except OSError as e:
+            print(f"Aviso: Não foi possível gravar {DAILY_STATE_FILENAME}: {e}")
+        with self._cond:
+            self._daily_at = self._next_daily(datetime.datetime.now() + datetime.timedelta(seconds=1))
+
+    # --- SMTP ---
+
+    def _open_session(self):
+        settings = self.settings
+        session = self.smtp_factory(settings.smtp_server, settings.smtp_port, timeout=SMTP_TIMEOUT_SECONDS)
+        try:
+            if settings.use_tls:
+                session.starttls()
+            if settings.password:
+                session.login(settings.address, settings.password)
+        except Exception:
+            session.close()
+            raise
+        self.connections += 1
+        return session
+
+    def _close_session(self):
+        session, self._session = self._session, None
+        if session is not None:
+            try:
+                session.quit()
+            except Exception:
+                session.close()
+
+    def _deliver(self, job, message):
+        """
+        Envia pela sessão atual (abrindo se preciso). Uma sessão derrubada pelo servidor é reaberta uma vez.
+        Retorna os destinatários recusados ({endereço: (código, resposta)}), como o sendmail.
+        """
+        for attempt in range(2):
+            reused = self._session is not None
+            if self._session is None:
+                self._session = self._open_session()
+            try:
+                return self._session.sendmail(job.from_email, job.recipients, message)
+            except smtplib.SMTPServerDisconnected:
+                self._session = None
+                if not reused or attempt:
+                    raise
+
+    def _send_batch(self, jobs):
+        connection_error = None
+        for job in jobs:
+            error, permanent = connection_error, False
+            if error is None:
+                try:
+                    with open(self._path(job.job_id, ".eml"), 'rb') as message_file:
+                        message = message_file.read()
+                except OSError as e:
+                    error, permanent = e, True
+            refused = {}
+            if error is None:
+                try:
+                    refused = self._deliver(job, message) or {}
+                except smtplib.SMTPRecipientsRefused as e:
+                    error, permanent = e, True
+                except (smtplib.SMTPSenderRefused, smtplib.SMTPDataError) as e:
+                    error = e # Recusa só desta mensagem; a sessão continua válida
+                except (smtplib.SMTPException, OSError) as e:
+                    error = connection_error = e # Conexão, TLS ou login: os outros e-mails do lote esperam também
+                    self._close_session()
+            with self._cond:
+                if error is None:
+                    del self._jobs[job.job_id]
+                    self.sent += 1
+                elif permanent or job.attempts + 1 >= self.max_attempts:
+                    del self._jobs[job.job_id]
+                else:
+                    job.attempts += 1
+                    job.next_attempt = time.time() + min(self.retry_max, self.retry_base * 2 ** (job.attempts - 1))
+                    job.last_error = str(error)
+            if error is None:
+                self._remove(job)
+                job.refused = [recipient for recipient in job.recipients if recipient in refused]
+                if job.refused:
+                    print(f"E-mail '{job.subject}' enviado para {', '.join(job.delivered_to)}; "
+                          f"recusado pelo servidor para {', '.join(job.refused)}.")
+                    self.results.put((job, RESULT_SENT, smtplib.SMTPRecipientsRefused(refused)))
+                else:
+                    print(f"E-mail '{job.subject}' enviado para {', '.join(job.recipients)}.")
+                    self.results.put((job, RESULT_SENT, None))
+            elif job.job_id in self._jobs:
+                self._save(job)
+                print(f"Falha no envio do e-mail '{job.subject}' (tentativa {job.attempts}): {error}. "
+                      f"Nova tentativa em {job.next_attempt - time.time():.0f}s.")
+                self.results.put((job, RESULT_RETRY, error))
+            else:
+                job.attempts += 1
+                job.last_error = str(error)
+                self._save(job)
+                self._remove(job, failed=True)
+                print(f"E-mail '{job.subject}' não enviado após {job.attempts} tentativa(s): {error}. "
+                      f"Movido para {OUTBOX_FAILED_DIRNAME}/.")
+                self.results.put((job, RESULT_FAILED, error))
+        if self._session is not None:
+            self._session_expires = time.time() + self.idle_seconds
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._running:
+                    return
+                now = time.time()
+                due = sorted((job for job in self._jobs.values() if job.next_attempt <= now), key=lambda j: j.created)
+                daily = self._daily_at is not None and now >= self._daily_at
+                idle = self._session is not None and now >= self._session_expires
+                if not (due or daily or idle):
+                    wakes = [job.next_attempt for job in self._jobs.values()]
+                    wakes += [t for t in (self._daily_at, self._session_expires if self._session else None) if t is not None]
+                    self._cond.wait(max(0.0, min(wakes) - now) if wakes else None)
+                    continue
+            if daily:
+                self._run_daily() # Enfileira; o envio acontece na próxima volta
+            elif due:
+                self._send_batch(due)
+            elif idle:
+                self._close_session()
+
+############################################# LOCAL SMTP SERVER ########################################
+# Servidor SMTP mínimo para testar o envio sem internet (sem TLS: use_tls = false no config.ini).
+
+class _LocalSMTPHandler(socketserver.StreamRequestHandler):
+
+    def _reply(self, text):
+        self.wfile.write(text.encode('utf-8') + b"\r\n")
+
+    def _read_line(self):
+        return self.rfile.readline().decode('utf-8', errors='replace').rstrip("\r\n")
+
+    def handle(self):
+        server = self.server
+        server.connections += 1
+        self._reply("220 localhost Servidor SMTP local")
+        mail_from, recipients = None, []
+        while True:
+            data = self.rfile.readline()
+            if not data:
+                return
+            line = data.decode('utf-8', errors='replace').rstrip("\r\n")
+            verb, _, argument = line.partition(" ")
+            verb = verb.upper()
+            if verb == "EHLO":
+                self._reply("250-localhost\r\n250-AUTH PLAIN LOGIN\r\n250 8BITMIME")
+            elif verb in ("HELO", "NOOP"):
+                self._reply("250 OK")
+            elif verb == "AUTH":
+                mechanism, _, initial = argument.partition(" ")
+                if mechanism.upper() == "LOGIN":
+                    self._reply("334 VXNlcm5hbWU6")
+                    user = base64.b64decode(self._read_line()).decode('utf-8')
+                    self._reply("334 UGFzc3dvcmQ6")
+                    self._read_line()
+                else:
+                    if not initial:
+                        self._reply("334 ")
+                        initial = self._read_line()
+                    user = base64.b64decode(initial).split(b"\0")[1].decode('utf-8')
+                server.logins.append(user)
+                self._reply("235 Autenticado")
+            elif verb == "MAIL":
+                mail_from, recipients = argument.partition(":")[2].strip().strip("<>"), []
+                self._reply("250 OK")
+            elif verb == "RCPT":
+                recipient = argument.partition(":")[2].strip().strip("<>")
+                if recipient in server.refused:
+                    self._reply("550 Destinatário inexistente")
+                else:
+                    recipients.append(recipient)
+                    self._reply("250 OK")
+            elif verb == "DATA":
+                if server.fail_next > 0:
+                    server.fail_next -= 1
+                    self._reply("451 Falha temporária simulada")
+                    continue
+                self._reply("354 Termine com <CRLF>.<CRLF>")
+                lines = []
+                while True:
+                    data = self.rfile.readline()
+                    if data in (b".\r\n", b".\n", b""):
+                        break
+                    lines.append(data[1:] if data.startswith(b"..") else data)
+                server.messages.append((mail_from, recipients, b"".join(lines)))
+                if server.on_message:
+                    server.on_message(mail_from, recipients, b"".join(lines))
+                self._reply("250 Mensagem aceita")
+            elif verb == "RSET":
+                mail_from, recipients = None, []
+                self._reply("250 OK")
+            elif verb == "QUIT":
+                self._reply("221 Até logo")
+                return
+            else:
+                self._reply("502 Comando não implementado")
+
+
+class LocalSMTPServer(socketserver.ThreadingTCPServer):
+    """
+    Guarda as mensagens recebidas em self.messages como (remetente, destinatários, bytes).
+    fail_next > 0 responde 451 aos próximos DATA; refused recusa esses destinatários (550).
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host="127.0.0.1", port=0, on_message=None):
+        super().__init__((host, port), _LocalSMTPHandler)
+        self.messages = []
+        self.logins = []
+        self.refused = set()
+        self.fail_next = 0
+        self.connections = 0
+        self.on_message = on_message
+        self._thread = None
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name="LocalSMTPServer", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == "__main__":
+    # Uso: python email_outbox.py serve [porta]      -> servidor SMTP local que mostra o que recebe
+    #      python email_outbox.py status <pasta Outbox>
+    if len(sys.argv) < 2 or sys.argv[1] not in ("serve", "status"):
+        print("Uso: python email_outbox.py serve [porta] | status <pasta Outbox>")
+        sys.exit(1)
+    if sys.argv[1] == "serve":
+        def show(mail_from, recipients, data):
+            subject = next((line for line in data.decode('utf-8', errors='replace').splitlines()
+                            if line.startswith("Subject:")), "Subject: -")
+            print(f"[{time.strftime('%H:%M:%S')}] {mail_from} -> {', '.join(recipients)} | {subject[9:]} ({len(data)} bytes)")
+        smtp_server = LocalSMTPServer(port=int(sys.argv[2]) if len(sys.argv) > 2 else 1025, on_message=show)
+        print(f"Servidor SMTP local em 127.0.0.1:{smtp_server.port} (config.ini: smtp_server = 127.0.0.1, "
+              f"smtp_port = {smtp_server.port}, use_tls = false). Ctrl+C para sair.")
+        try:
+            smtp_server.serve_forever()
+        except KeyboardInterrupt:
+            smtp_server.server_close()
+    else:
+        outbox = EmailOutbox(sys.argv[2], EmailSettings())
+        for job in sorted(outbox._jobs.values(), key=lambda j: j.created):
+            print(f"{job.job_id}: '{job.subject}' -> {', '.join(job.recipients)}, {job.attempts} tentativa(s), "
+                  f"próxima {time.strftime('%d-%m-%Y %H:%M:%S', time.localtime(job.next_attempt))}"
+                  f"{', erro: ' + job.last_error if job.last_error else ''}")
+        failed_dir = os.path.join(sys.argv[2], OUTBOX_FAILED_DIRNAME)
+        failed = len([f for f in os.listdir(failed_dir) if f.endswith(".json")]) if os.path.isdir(failed_dir) else 0
+        print(f"{outbox.pending()} pendente(s), {failed} com falha definitiva.")
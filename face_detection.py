@@ -0,0 +1,165 @@
+############################################# IMPORTING ################################################
+import json
+import os
+import sys
+import time
+import cv2
+import numpy as np
+
+from face_tracking import box_iou
+
+############################################# CONSTANTS ################################################
+DETECTION_DOWNSCALE = "auto" # "auto", um fator fixo (ex.: 0.5) ou None para detectar na resolução original
+DETECTION_TARGET_MIN_FACE_PX = 30 # Tamanho mínimo do rosto (px) na imagem reduzida; a janela do Haar é 24x24
+DETECTION_MIN_FRAME_WIDTH = 160 # Nunca reduz o quadro abaixo desta largura
+DETECTION_MIN_FACE_PX = 100 # minSize da detecção (cadastro e reconhecimento)
+DOWNSCALE_SIZE_TOLERANCE = 0.9 # Na imagem reduzida o tamanho da caixa perde precisão ao voltar para a original
+DETECTION_MIN_BOX_PX = int(DETECTION_MIN_FACE_PX * DOWNSCALE_SIZE_TOLERANCE) # Menor caixa aceita; o filtro do cadastro usa o mesmo valor
+
+############################################# DETECTOR #################################################
+
+def auto_detection_scale(frame_shape, min_size, target_min_face_px=DETECTION_TARGET_MIN_FACE_PX,
+                         min_frame_width=DETECTION_MIN_FRAME_WIDTH):
+    """
+    Escolhe o fator de redução a partir do minSize e do tamanho do quadro:
+    o menor rosto aceito passa a ter ~target_min_face_px na imagem reduzida.
+    Retorna 1.0 quando não vale a pena reduzir.
+    """
+    frame_width = frame_shape[1]
+    smallest_face = min(min_size) if min_size else 0
+    if smallest_face <= 0 or frame_width <= 0:
+        return 1.0
+    scale = target_min_face_px / float(smallest_face)
+    scale = max(scale, min_frame_width / float(frame_width))
+    return min(scale, 1.0)
+
+
+class FaceDetector:
+    """
+    Envolve o CascadeClassifier rodando a detecção em uma versão reduzida do quadro.
+    As caixas são mapeadas de volta para a resolução original, de modo que o recorte
+    para reconhecimento continua sendo feito no gray_frame completo.
+    """
+
+    def __init__(self, cascade_file, scale_factor=1.2, min_neighbors=5,
+                 min_size=(DETECTION_MIN_FACE_PX, DETECTION_MIN_FACE_PX), downscale=DETECTION_DOWNSCALE):
+        self.cascade = cv2.CascadeClassifier(cascade_file)
+        if self.cascade.empty():
+            raise IOError(f"Não foi possível carregar o classificador {cascade_file}")
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.min_size = tuple(min_size)
+        self.downscale = downscale
+        self._cached_shape = None
+        self._cached_scale = 1.0
+
+    def scale_for(self, frame_shape):
+        if not self.downscale:
+            return 1.0
+        if self.downscale != "auto":
+            return min(float(self.downscale), 1.0)
+        if frame_shape[:2] != self._cached_shape:
+            self._cached_shape = frame_shape[:2]
+            self._cached_scale = auto_detection_scale(frame_shape, self.min_size)
+        return self._cached_scale
+
+    def detect(self, gray_frame):
+        """Retorna a lista de caixas (x, y, w, h) em coordenadas do quadro original."""
+        scale = self.scale_for(gray_frame.shape)
+        if scale >= 1.0:
+            faces = self.cascade.detectMultiScale(gray_frame, scaleFactor=self.scale_factor,
+                                                  minNeighbors=self.min_neighbors, minSize=self.min_size)
+            return [tuple(int(v) for v in face) for face in faces]
+
+        small = cv2.resize(gray_frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        small_min_size = (max(int(self.min_size[0] * scale), 1), max(int(self.min_size[1] * scale), 1))
+        faces = self.cascade.detectMultiScale(small, scaleFactor=self.scale_factor,
+                                              minNeighbors=self.min_neighbors, minSize=small_min_size)
+        frame_h, frame_w = gray_frame.shape[:2]
+        boxes = []
+        for (x, y, w, h) in faces:
+            full_x, full_y = int(round(x / scale)), int(round(y / scale))
+            full_w = min(int(round(w / scale)), frame_w - full_x)
+            full_h = min(int(round(h / scale)), frame_h - full_y)
+            # Mesmo critério de tamanho mínimo da resolução original, com a tolerância do arredondamento
+            if full_w >= self.min_size[0] * DOWNSCALE_SIZE_TOLERANCE and full_h >= self.min_size[1] * DOWNSCALE_SIZE_TOLERANCE:
+                boxes.append((full_x, full_y, full_w, full_h))
+        return boxes
+
+    __call__ = detect
+
+############################################# BENCHMARK ################################################
+
+def _latency_summary_ms(samples):
+    if not samples:
+        return {"mean_ms": None, "p50_ms": None, "p95_ms": None}
+    samples_ms = np.asarray(samples) * 1000.0
+    return {"mean_ms": round(float(samples_ms.mean()), 3),
+            "p50_ms": round(float(np.percentile(samples_ms, 50)), 3),
+            "p95_ms": round(float(np.percentile(samples_ms, 95)), 3)}
+
+
+def benchmark_detection(source_spec, cascade_file, max_frames=300, scale_factor=1.2, min_neighbors=5,
+                        min_size=(DETECTION_MIN_FACE_PX, DETECTION_MIN_FACE_PX), downscale=DETECTION_DOWNSCALE):
+    """
+    Compara a latência da detecção na resolução original com a detecção reduzida
+    sobre os mesmos quadros gravados, além da concordância entre as caixas (IoU).
+    """
+    from frame_sources import open_frame_source
+
+    full_detector = FaceDetector(cascade_file, scale_factor, min_neighbors, min_size, downscale=None)
+    fast_detector = FaceDetector(cascade_file, scale_factor, min_neighbors, min_size, downscale=downscale)
+    source = open_frame_source(source_spec)
+    if not source.open():
+        raise IOError(f"Não foi possível abrir a fonte {source_spec}")
+
+    full_times, fast_times = [], []
+    full_faces = fast_faces = matched_faces = 0
+    matched_ious = []
+    scale_used = 1.0
+    try:
+        while len(full_times) < max_frames:
+            ret, frame = source.read()
+            if not ret:
+                break
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            scale_used = fast_detector.scale_for(gray.shape)
+
+            start = time.perf_counter()
+            full_boxes = full_detector.detect(gray)
+            full_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            fast_boxes = fast_detector.detect(gray)
+            fast_times.append(time.perf_counter() - start)
+
+            full_faces += len(full_boxes)
+            fast_faces += len(fast_boxes)
+            for box in full_boxes:
+                best_iou = max((box_iou(box, other) for other in fast_boxes), default=0.0)
+                if best_iou >= 0.5:
+                    matched_faces += 1
+                    matched_ious.append(best_iou)
+    finally:
+        source.release()
+
+    return {
+        "source": str(source_spec),
+        "frames": len(full_times),
+        "scale": round(scale_used, 4),
+        "full_resolution": dict(faces=full_faces, **_latency_summary_ms(full_times)),
+        "downscaled": dict(faces=fast_faces, **_latency_summary_ms(fast_times)),
+        "face_recall_vs_full": round(matched_faces / float(full_faces), 4) if full_faces else None,
+        "mean_iou_vs_full": round(float(np.mean(matched_ious)), 4) if matched_ious else None,
+        "speedup": round(float(np.mean(full_times)) / float(np.mean(fast_times)), 2) if fast_times and np.mean(fast_times) > 0 else None,
+    }
+
+
+if __name__ == "__main__":
+    # Uso: python face_detection.py <video|pasta|synthetic> [max_quadros]
+    if len(sys.argv) < 2:
+        print("Uso: python face_detection.py <video|pasta|synthetic> [max_quadros]")
+        sys.exit(1)
+    cascade_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "haarcascade_frontalface_default.xml")
+    frames_limit = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    print(json.dumps(benchmark_detection(sys.argv[1], cascade_path, max_frames=frames_limit), indent=2))
@@ -0,0 +1,294 @@
+############################################# IMPORTING ################################################
+import sys
+import time
+import cv2
+import numpy as np
+
+############################################# CONSTANTS ################################################
+LBP_RADIUS = 1 # Mesmos padrões do cv2.face.LBPHFaceRecognizer_create()
+LBP_NEIGHBORS = 8
+LBP_GRID_X = 8
+LBP_GRID_Y = 8
+GALLERY_METRIC = "chisqr" # "chisqr" (igual ao LBPH) ou "l1"
+GALLERY_TOP_K = None # None = varredura exata (mesmos rótulos do LBPH); K = só os K melhores candidatos pelo limite inferior (aproximado)
+EXACT_BLOCK_BINS = 128 # Bins da consulta processados por vez na varredura exata (o bloco cabe no cache)
+RERANK_CHUNK = 32 # Candidatos verificados por vez com a distância exata
+BOUND_SLACK = 1e-4 # Folga relativa no limite inferior calculado em float32
+UNKNOWN_LABEL = -1
+MAX_DISTANCE = sys.float_info.max # O LBPH devolve DBL_MAX quando nada fica abaixo do limiar
+
+############################################# LBP ######################################################
+
+def _neighbor_weights(radius, neighbors):
+    """Deslocamentos e pesos da interpolação bilinear de cada vizinho, como no elbp do OpenCV."""
+    weights = []
+    for n in range(neighbors):
+        angle = 2.0 * np.pi * n / float(neighbors) # Ângulo em double; só o resultado vira float32
+        x = np.float32(radius * np.cos(angle))
+        y = np.float32(-radius * np.sin(angle))
+        fx, fy = int(np.floor(x)), int(np.floor(y))
+        cx, cy = int(np.ceil(x)), int(np.ceil(y))
+        ty, tx = np.float32(y - fy), np.float32(x - fx)
+        one = np.float32(1.0)
+        weights.append((fx, fy, cx, cy, (one - tx) * (one - ty), tx * (one - ty), (one - tx) * ty, tx * ty))
+    return weights
+
+
+def lbp_codes(gray, radius=LBP_RADIUS, neighbors=LBP_NEIGHBORS):
+    """Códigos LBP circulares estendidos (mesma aritmética float32 do OpenCV), sem a borda de raio."""
+    src = np.asarray(gray, dtype=np.float32)
+    rows, cols = src.shape
+    inner_rows, inner_cols = rows - 2 * radius, cols - 2 * radius
+    codes = np.zeros((max(inner_rows, 0), max(inner_cols, 0)), dtype=np.int32)
+    if inner_rows <= 0 or inner_cols <= 0:
+        return codes
+    center = src[radius:rows - radius, radius:cols - radius]
+    eps = np.finfo(np.float32).eps
+
+    def shifted(dy, dx):
+        return src[radius + dy:rows - radius + dy, radius + dx:cols - radius + dx]
+
+    for n, (fx, fy, cx, cy, w1, w2, w3, w4) in enumerate(_neighbor_weights(radius, neighbors)):
+        t = w1 * shifted(fy, fx) + w2 * shifted(fy, cx) + w3 * shifted(cy, fx) + w4 * shifted(cy, cx)
+        codes |= ((t > center) | (np.abs(t - center) < eps)).astype(np.int32) << n
+    return codes
+
+
+def spatial_histogram(gray, radius=LBP_RADIUS, neighbors=LBP_NEIGHBORS, grid_x=LBP_GRID_X, grid_y=LBP_GRID_Y):
+    """Histograma LBP por célula da grade, normalizado pela área da célula (vetor float32 como no LBPH)."""
+    codes = lbp_codes(gray, radius, neighbors)
+    patterns = 1 << neighbors
+    cell_h, cell_w = codes.shape[0] // grid_y, codes.shape[1] // grid_x
+    if cell_h == 0 or cell_w == 0:
+        return np.zeros(grid_x * grid_y * patterns, dtype=np.float32)
+    # Recorta para um múltiplo da grade e conta os códigos de todas as células em um único bincount
+    cells = codes[:cell_h * grid_y, :cell_w * grid_x].reshape(grid_y, cell_h, grid_x, cell_w)
+    cell_index = (np.arange(grid_y)[:, None, None, None] * grid_x + np.arange(grid_x)[None, None, :, None])
+    flat = (cell_index * patterns + cells).ravel()
+    histogram = np.bincount(flat, minlength=grid_x * grid_y * patterns).astype(np.float32)
+    histogram /= np.float32(cell_h * cell_w)
+    return histogram
+
+############################################# GALLERY ##################################################
+
+class LBPHGallery:
+    """
+    Alternativa vetorizada ao LBPHFaceRecognizer: os histogramas de treinamento ficam em uma
+    matriz float32 contígua (amostras x bins) e todos os rostos de um quadro são buscados juntos.
+    Com metric="chisqr" os rótulos e distâncias são os do LBPH.
+
+    Por padrão (top_k=None) a busca é exata: a distância a toda a galeria é calculada com a
+    galeria guardada por bin (bins x amostras) e com os inversos já calculados, já que
+    ab/(a+b) = 1/(1/a + 1/b) e um bin vazio da galeria (1/0 = inf) contribui com zero. Só os bins
+    não nulos da consulta são visitados, em blocos que cabem no cache.
+    Com top_k a busca é aproximada: um produto de matrizes (BLAS) entre as raízes dos histogramas
+    dá a distância de Hellinger H, que limita o chi-quadrado por baixo (chi >= 2H; L1 >= H), e só
+    os K melhores candidatos por esse limite recebem a distância exata.
+    Interface compatível com o recognizer do OpenCV: train, update, predict -> (label, confiança).
+    """
+
+    def __init__(self, radius=LBP_RADIUS, neighbors=LBP_NEIGHBORS, grid_x=LBP_GRID_X, grid_y=LBP_GRID_Y,
+                 threshold=MAX_DISTANCE, metric=GALLERY_METRIC, top_k=GALLERY_TOP_K):
+        if metric not in ("chisqr", "l1"):
+            raise ValueError(f"Métrica desconhecida: {metric}")
+        self.radius = radius
+        self.neighbors = neighbors
+        self.grid_x = grid_x
+        self.grid_y = grid_y
+        self.threshold = threshold
+        self.metric = metric
+        self.top_k = top_k
+        self.set_gallery(np.zeros((0, grid_x * grid_y * (1 << neighbors)), dtype=np.float32),
+                         np.zeros(0, dtype=np.int32))
+
+    @classmethod
+    def from_recognizer(cls, recognizer, **kwargs):
+        """Reaproveita os histogramas de um LBPHFaceRecognizer já treinado (ex.: lido do Trainner.yml)."""
+        gallery = cls(radius=recognizer.getRadius(), neighbors=recognizer.getNeighbors(),
+                      grid_x=recognizer.getGridX(), grid_y=recognizer.getGridY(),
+                      threshold=recognizer.getThreshold(), **kwargs)
+        histograms = recognizer.getHistograms()
+        if histograms:
+            gallery.set_gallery(np.vstack([np.asarray(h, dtype=np.float32).reshape(1, -1) for h in histograms]),
+                                np.asarray(recognizer.getLabels(), dtype=np.int32).ravel())
+        return gallery
+
+    @classmethod
+    def from_binary_model(cls, model, **kwargs):
+        """Usa diretamente os histogramas mapeados de um model_store.BinaryModel (sem cópia)."""
+        gallery = cls(radius=model.radius, neighbors=model.neighbors, grid_x=model.grid_x, grid_y=model.grid_y,
+                      threshold=model.threshold, **kwargs)
+        if len(model):
+            gallery.set_gallery(model.histograms, model.labels)
+        return gallery
+
+    def __len__(self):
+        return self.labels.size
+
+    def histogram(self, gray):
+        return spatial_histogram(gray, self.radius, self.neighbors, self.grid_x, self.grid_y)
+
+    def set_gallery(self, histograms, labels):
+        """histograms pode ser um np.memmap (ver model_store): nada é lido do disco até o primeiro predict."""
+        self.histograms = np.ascontiguousarray(histograms, dtype=np.float32)
+        self.labels = np.ascontiguousarray(labels, dtype=np.int32).ravel()
+        self._roots = None # Raízes usadas no limite inferior via produto de matrizes (calculadas sob demanda)
+        self._inverses = None # Inversos por bin (bins x amostras) da varredura exata (calculados sob demanda)
+        self._sums = None
+
+    def _prepare(self):
+        if self._sums is None:
+            self._sums = self.histograms.sum(axis=1, dtype=np.float64)
+
+    def _prepare_roots(self):
+        self._prepare()
+        if self._roots is None:
+            self._roots = np.sqrt(self.histograms)
+
+    def _prepare_inverses(self):
+        self._prepare()
+        if self._inverses is None:
+            with np.errstate(divide='ignore'):
+                self._inverses = np.ascontiguousarray(np.float32(1.0) / self.histograms.T)
+
+    def train(self, faces, labels):
+        self.set_gallery(self.histograms[:0], self.labels[:0])
+        self.update(faces, labels)
+
+    def update(self, faces, labels):
+        if not len(faces):
+            return
+        new_histograms = np.vstack([self.histogram(face)[None, :] for face in faces])
+        self.set_gallery(np.vstack([self.histograms, new_histograms]),
+                         np.concatenate([self.labels, np.asarray(labels, dtype=np.int32).ravel()]))
+
+    def distances(self, query, candidates):
+        """Distância exata entre um histograma e as amostras indicadas (mesma fórmula do compareHist)."""
+        self._prepare()
+        if self.metric == "l1":
+            return np.abs(self.histograms[candidates] - query).sum(axis=1, dtype=np.float64)
+        # (a - b)^2 / (a + b) = a + b - 4ab / (a + b): só os bins não nulos da consulta precisam ser visitados
+        nonzero = np.flatnonzero(query)
+        a = query[nonzero]
+        b = self.histograms[np.ix_(candidates, nonzero)]
+        shared = (a * b / (a + b)).sum(axis=1, dtype=np.float64)
+        return 2.0 * (query.sum(dtype=np.float64) + self._sums[candidates] - 4.0 * shared)
+
+    def all_distances(self, query):
+        """Distância exata entre um histograma e todas as amostras da galeria."""
+        return self.distance_matrix(query[None, :])[0]
+
+    def distance_matrix(self, queries):
+        """
+        Distâncias exatas (consultas x amostras) de uma vez. Os bins não nulos de todas as consultas
+        formam uma única lista (consulta, bin) percorrida em blocos; cada bloco é somado por consulta.
+        """
+        if self.metric == "l1":
+            candidates = np.arange(self.labels.size)
+            return np.vstack([self.distances(query, candidates)[None, :] for query in queries])
+        self._prepare_inverses()
+        owners, bins = np.nonzero(queries) # Ordenados por consulta
+        query_inverses = np.float32(1.0) / queries[owners, bins]
+        shared = np.zeros((len(queries), self.labels.size), dtype=np.float64)
+        block = np.empty((min(EXACT_BLOCK_BINS, bins.size), self.labels.size), dtype=np.float32)
+        for start in range(0, bins.size, EXACT_BLOCK_BINS):
+            rows = bins[start:start + EXACT_BLOCK_BINS]
+            block_owners = owners[start:start + EXACT_BLOCK_BINS]
+            terms = block[:rows.size]
+            np.take(self._inverses, rows, axis=0, out=terms)
+            terms += query_inverses[start:start + EXACT_BLOCK_BINS, None]
+            np.reciprocal(terms, out=terms) # ab/(a+b) por bin e amostra
+            firsts = np.flatnonzero(np.r_[True, block_owners[1:] != block_owners[:-1]])
+            shared[block_owners[firsts]] += np.add.reduceat(terms, firsts, axis=0)
+        distances = 2.0 * (queries.sum(axis=1, dtype=np.float64)[:, None] + self._sums[None, :] - 4.0 * shared)
+        return np.maximum(distances, 0.0, out=distances) # Amostra idêntica: o arredondamento pode dar -0.0001
+
+    def lower_bounds(self, queries):
+        """Limite inferior da distância para toda a galeria, para todas as consultas (um GEMM)."""
+        self._prepare_roots()
+        roots = np.sqrt(queries)
+        hellinger = queries.sum(axis=1, dtype=np.float64)[:, None] + self._sums[None, :] \
+            - 2.0 * (roots @ self._roots.T)
+        hellinger = np.maximum(hellinger * (1.0 - BOUND_SLACK) - BOUND_SLACK, 0.0) # Folga para o arredondamento do float32
+        return 2.0 * hellinger if self.metric == "chisqr" else hellinger
+
+    def _search(self, query, bounds):
+        """Busca aproximada: só os top_k candidatos com menor limite inferior recebem a distância exata."""
+        order = np.argsort(bounds, kind='stable')[:self.top_k]
+        best_index, best_distance = -1, np.inf
+        for start in range(0, order.size, RERANK_CHUNK):
+            if bounds[order[start]] > best_distance:
+                break # Nenhum candidato restante pode ser melhor
+            chunk = order[start:start + RERANK_CHUNK]
+            exact = self.distances(query, chunk)
+            for index, distance in zip(chunk, exact):
+                # Empate: vence a amostra que vem antes na galeria, como no laço do LBPH
+                if distance < best_distance or (distance == best_distance and index < best_index):
+                    best_index, best_distance = int(index), float(distance)
+        return best_index, best_distance
+
+    def predict_batch(self, faces):
+        """Prediz vários recortes de uma vez. Retorna a lista de (label, confiança)."""
+        if not len(faces):
+            return []
+        if not self.labels.size:
+            return [(UNKNOWN_LABEL, MAX_DISTANCE)] * len(faces)
+        queries = np.vstack([self.histogram(face)[None, :] for face in faces])
+        if self.top_k:
+            matches = [self._search(query, bounds) for query, bounds in zip(queries, self.lower_bounds(queries))]
+        else:
+            distances = self.distance_matrix(queries)
+            indices = np.argmin(distances, axis=1) # Empate: a primeira amostra, como no laço do LBPH
+            matches = [(int(index), float(distances[row, index])) for row, index in enumerate(indices)]
+        predictions = []
+        for index, distance in matches:
+            if distance < self.threshold:
+                predictions.append((int(self.labels[index]), distance))
+            else:
+                predictions.append((UNKNOWN_LABEL, MAX_DISTANCE))
+        return predictions
+
+    def predict(self, face):
+        return self.predict_batch([face])[0]
+
+############################################# BENCHMARK ################################################
+
+def benchmark_gallery(galleries, queries_per_gallery=20, faces_per_frame=(1, 4), top_k=64):
+    """
+    Compara LBPHFaceRecognizer.predict com a galeria vetorizada (exata e aproximada com top_k) para
+    vários tamanhos de galeria. Verifica também se os rótulos coincidem com os do LBPH.
+    """
+    from benchmark import build_synthetic_gallery # Mesmos recortes sintéticos do benchmark do pipeline
+    report = []
+    for people, samples in galleries:
+        faces, labels = build_synthetic_gallery(people, samples)
+        queries, _ = build_synthetic_gallery(people, 1, seed=1) # Outras amostras, mesma textura por pessoa
+        queries = [queries[i % len(queries)] for i in range(queries_per_gallery)]
+        recognizer = cv2.face.LBPHFaceRecognizer_create()
+        recognizer.train(faces, labels)
+        exact = LBPHGallery.from_recognizer(recognizer, top_k=None)
+        pruned = LBPHGallery.from_recognizer(recognizer, top_k=top_k)
+
+        start = time.perf_counter()
+        expected = [recognizer.predict(face) for face in queries]
+        lbph_ms = (time.perf_counter() - start) * 1000.0 / len(queries)
+        row = {"gallery_size": people * samples, "people": people, "lbph_ms": round(lbph_ms, 3)}
+        for name, gallery in (("exact", exact), (f"top{top_k}", pruned)):
+            gallery.predict(queries[0]) # Prepara as matrizes auxiliares fora da medição
+            for batch in faces_per_frame:
+                predicted = []
+                start = time.perf_counter()
+                for i in range(0, len(queries), batch):
+                    predicted.extend(gallery.predict_batch(queries[i:i + batch]))
+                row[f"{name}_batch{batch}_ms"] = round((time.perf_counter() - start) * 1000.0 / len(queries), 3)
+            row[f"{name}_same_labels"] = sum(p[0] == e[0] for p, e in zip(predicted, expected)) / len(queries)
+        report.append(row)
+    return report
+
+
+if __name__ == "__main__":
+    # Uso: python face_gallery.py [galerias, ex.: 10x60,50x60,100x60]
+    from benchmark import parse_galleries
+    spec = sys.argv[1] if len(sys.argv) > 1 else "10x60,50x60,100x60"
+    for row in benchmark_gallery(parse_galleries(spec)):
+        print(" | ".join(f"{key}={value}" for key, value in row.items()))
@@ -0,0 +1,293 @@
+############################################# IMPORTING ################################################
+import itertools
+import math
+import time
+from collections import Counter, deque
+import cv2
+
+############################################# CONSTANTS ################################################
+DETECT_EVERY_N_FRAMES = 5 # Detecção completa (Haar) a cada N quadros; nos demais apenas rastreia
+REDETECT_POLICY = "on_lost" # "interval", "on_lost" ou "on_lost_or_empty" (ver FaceTracker)
+TRACKER_TYPE = "template" # "template" (busca local por correlação) ou um rastreador OpenCV: "KCF", "MOSSE", "CSRT", "MIL"
+IOU_MATCH_THRESHOLD = 0.3 # IoU mínimo para associar uma detecção a um rastro existente
+MAX_MISSED_DETECTIONS = 1 # Detecções seguidas sem encontrar o rastro antes de descartá-lo
+TEMPLATE_MIN_MATCH_SCORE = 0.55 # Correlação mínima para considerar o rosto ainda rastreado
+TEMPLATE_WIDTH = 48 # Largura (px) do modelo reduzido usado na busca local
+TEMPLATE_SEARCH_MARGIN = 0.5 # Margem da janela de busca, em fração do tamanho da caixa
+RECOGNITION_VOTES_REQUIRED = 5 # Predições (K) acumuladas por rastro antes de fixar a identidade
+RECOGNITION_MAJORITY_RATIO = 0.6 # Fração mínima dos K votos que a identidade vencedora precisa ter
+RECOGNITION_REVERIFY_SECONDS = 10 # Após esse tempo a identidade fixada é verificada novamente
+RECOGNITION_UNKNOWN_REVERIFY_SECONDS = 1.0 # Intervalo (curto) para verificar novamente um "Desconhecido"
+
+REDETECT_POLICIES = ("interval", "on_lost", "on_lost_or_empty")
+
+############################################# HELPERS ##################################################
+
+def box_iou(box_a, box_b):
+    """Intersecção sobre união de duas caixas (x, y, w, h)."""
+    ax, ay, aw, ah = box_a
+    bx, by, bw, bh = box_b
+    inter_w = min(ax + aw, bx + bw) - max(ax, bx)
+    inter_h = min(ay + ah, by + bh) - max(ay, by)
+    if inter_w <= 0 or inter_h <= 0:
+        return 0.0
+    intersection = inter_w * inter_h
+    return intersection / float(aw * ah + bw * bh - intersection)
+
+
+def _create_opencv_tracker(tracker_type):
+    """Procura a fábrica do rastreador OpenCV em cv2 e cv2.legacy (varia conforme a versão)."""
+    factory_name = f"Tracker{tracker_type}_create"
+    for module in (cv2, getattr(cv2, "legacy", None)):
+        factory = getattr(module, factory_name, None) if module is not None else None
+        if factory is not None:
+            return factory()
+    return None
+
+############################################# TRACKS ###################################################
+
+class Track:
+    """Rosto rastreado entre quadros. O track_id é estável enquanto o rosto não se perde."""
+    __slots__ = ("track_id", "box", "misses", "age", "lost", "recognition",
+                 "_template", "_template_scale", "_cv_tracker")
+
+    def __init__(self, track_id, box):
+        self.track_id = track_id
+        self.box = tuple(int(v) for v in box)
+        self.misses = 0
+        self.age = 0
+        self.lost = False
+        self.recognition = None # RecognitionState, criado pelo RecognitionVoter
+        self._template = None
+        self._template_scale = 1.0
+        self._cv_tracker = None
+
+
+class FaceTracker:
+    """
+    Executa a detecção completa apenas a cada detect_every_n quadros e, entre elas,
+    carrega as caixas dos rostos com um rastreador barato.
+
+    Política de nova detecção (redetect_policy):
+      "interval"         - somente a cada N quadros;
+      "on_lost"          - a cada N quadros ou assim que algum rastro se perde;
+      "on_lost_or_empty" - como "on_lost" e também em todo quadro sem rostos rastreados.
+    """
+
+    def __init__(self, detect_every_n=DETECT_EVERY_N_FRAMES, redetect_policy=REDETECT_POLICY,
+                 tracker_type=TRACKER_TYPE, iou_threshold=IOU_MATCH_THRESHOLD,
+                 max_missed_detections=MAX_MISSED_DETECTIONS):
+        if redetect_policy not in REDETECT_POLICIES:
+            raise ValueError(f"Política de detecção inválida: {redetect_policy}. Use uma de {REDETECT_POLICIES}.")
+        self.detect_every_n = max(1, int(detect_every_n))
+        self.redetect_policy = redetect_policy
+        self.tracker_type = tracker_type
+        self.iou_threshold = iou_threshold
+        self.max_missed_detections = max_missed_detections
+        self.tracks = []
+        self.frame_index = 0
+        self.detections_run = 0
+        self._frames_since_detection = None
+        self._track_ids = itertools.count(1)
+
+    def reset(self):
+        self.tracks = []
+        self._frames_since_detection = None
+
+    def _should_detect(self):
+        if self._frames_since_detection is None or self._frames_since_detection + 1 >= self.detect_every_n:
+            return True
+        if self.redetect_policy in ("on_lost", "on_lost_or_empty") and any(t.lost for t in self.tracks):
+            return True
+        if self.redetect_policy == "on_lost_or_empty" and not self.tracks:
+            return True
+        return False
+
+    def update(self, gray_frame, detect_fn, frame=None):
+        """
+        Processa um quadro e retorna a lista de rastros ativos.
+        detect_fn(gray_frame) deve devolver as caixas (x, y, w, h) como detectMultiScale.
+        frame (BGR) só é necessário para os rastreadores OpenCV.
+        """
+        self.frame_index += 1
+        if self._should_detect():
+            self._associate(gray_frame, frame, detect_fn(gray_frame))
+            self.detections_run += 1
+            self._frames_since_detection = 0
+        else:
+            self._propagate(gray_frame, frame)
+            self._frames_since_detection += 1
+        return [t for t in self.tracks if not t.lost]
+
+    ##### Associação nas detecções #####
+
+    def _associate(self, gray_frame, frame, detections):
+        detections = [tuple(int(v) for v in d) for d in detections]
+        candidate_pairs = sorted(((box_iou(t.box, d), ti, di)
+                                  for ti, t in enumerate(self.tracks) for di, d in enumerate(detections)),
+                                 reverse=True)
+        matched_tracks, matched_detections = set(), set()
+        for iou, ti, di in candidate_pairs:
+            if iou < self.iou_threshold:
+                break
+            if ti in matched_tracks or di in matched_detections:
+                continue
+            matched_tracks.add(ti)
+            matched_detections.add(di)
+            track = self.tracks[ti]
+            track.box, track.misses, track.lost = detections[di], 0, False
+            self._init_track_model(track, gray_frame, frame)
+
+        surviving = []
+        for ti, track in enumerate(self.tracks):
+            if ti not in matched_tracks:
+                track.misses += 1
+                if track.misses > self.max_missed_detections:
+                    continue
+                # A detecção não o encontrou: a caixa antiga não vale mais para este quadro. O rastreador
+                # tenta acompanhá-lo; se falhar, o rastro fica perdido (não é devolvido nem abre a porta)
+                # até voltar a casar com uma detecção.
+                if not track.lost and not self._step(track, gray_frame, frame):
+                    track.lost = True
+            track.age += 1
+            surviving.append(track)
+        for di, det in enumerate(detections):
+            if di not in matched_detections:
+                track = Track(next(self._track_ids), det)
+                self._init_track_model(track, gray_frame, frame)
+                surviving.append(track)
+        self.tracks = surviving
+
+    ##### Propagação entre detecções #####
+
+    def _init_track_model(self, track, gray_frame, frame):
+        x, y, w, h = track.box
+        if self.tracker_type != "template" and frame is not None:
+            track._cv_tracker = _create_opencv_tracker(self.tracker_type)
+            if track._cv_tracker is not None:
+                track._cv_tracker.init(frame, track.box)
+                return
+        track._cv_tracker = None
+        scale = min(1.0, TEMPLATE_WIDTH / float(w))
+        patch = gray_frame[y:y + h, x:x + w]
+        if scale < 1.0:
+            patch = cv2.resize(patch, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        track._template = patch
+        track._template_scale = scale
+
+    def _propagate(self, gray_frame, frame):
+        for track in self.tracks:
+            track.age += 1
+            if not track.lost and not self._step(track, gray_frame, frame):
+                track.lost = True
+
+    def _step(self, track, gray_frame, frame):
+        """Move a caixa do rastro para o quadro atual. Retorna False se o rosto se perdeu."""
+        if track._cv_tracker is not None and frame is not None:
+            ok, box = track._cv_tracker.update(frame)
+            if ok:
+                track.box = tuple(int(v) for v in box)
+            return bool(ok)
+        return track._template is not None and self._template_step(track, gray_frame)
+
+    def _template_step(self, track, gray_frame):
+        x, y, w, h = track.box
+        frame_h, frame_w = gray_frame.shape[:2]
+        margin_x, margin_y = int(w * TEMPLATE_SEARCH_MARGIN), int(h * TEMPLATE_SEARCH_MARGIN)
+        sx0, sy0 = max(x - margin_x, 0), max(y - margin_y, 0)
+        sx1, sy1 = min(x + w + margin_x, frame_w), min(y + h + margin_y, frame_h)
+        scale = track._template_scale
+        search = gray_frame[sy0:sy1, sx0:sx1]
+        if scale < 1.0:
+            search = cv2.resize(search, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        template = track._template
+        if search.shape[0] < template.shape[0] or search.shape[1] < template.shape[1]:
+            return False
+        result = cv2.matchTemplate(search, template, cv2.TM_CCOEFF_NORMED)
+        _, max_score, _, max_loc = cv2.minMaxLoc(result)
+        if max_score < TEMPLATE_MIN_MATCH_SCORE:
+            return False
+        new_x = min(max(sx0 + int(round(max_loc[0] / scale)), 0), frame_w - w)
+        new_y = min(max(sy0 + int(round(max_loc[1] / scale)), 0), frame_h - h)
+        track.box = (new_x, new_y, w, h)
+        return True
+
+############################################# RECOGNITION CACHE ########################################
+
+class RecognitionState:
+    """
+    Estado de reconhecimento de um rastro: votos recentes e a identidade já confirmada.
+    label None representa "Desconhecido".
+    """
+    __slots__ = ("votes", "confirmed", "label", "confidence", "confirmed_at", "predict_calls")
+
+    def __init__(self, votes_required):
+        self.votes = deque(maxlen=votes_required)
+        self.confirmed = False
+        self.label = None
+        self.confidence = None
+        self.confirmed_at = None
+        self.predict_calls = 0
+
+
+class RecognitionVoter:
+    """
+    Cache de reconhecimento por rastro com votação temporal.
+    recognizer.predict só é chamado até que uma maioria confiável entre os últimos K votos
+    seja atingida, ou novamente após reverify_seconds; no resto do tempo a identidade
+    confirmada é reutilizada. Enquanto não há maioria, a identidade anterior é mantida,
+    o que evita a alternância entre "Desconhecido" e um nome a cada quadro.
+    "Desconhecido" fica em cache só por unknown_reverify_seconds (curto): um estranho não custa
+    um predict por quadro, e uma pessoa cadastrada cujos primeiros quadros saíram borrados é
+    reconhecida logo na verificação seguinte, sem esperar reverify_seconds.
+    """
+
+    def __init__(self, confidence_threshold, votes_required=RECOGNITION_VOTES_REQUIRED,
+                 majority_ratio=RECOGNITION_MAJORITY_RATIO, reverify_seconds=RECOGNITION_REVERIFY_SECONDS,
+                 unknown_reverify_seconds=RECOGNITION_UNKNOWN_REVERIFY_SECONDS):
+        self.confidence_threshold = confidence_threshold
+        self.votes_required = max(1, int(votes_required))
+        self.majority_votes = max(1, math.ceil(self.votes_required * majority_ratio))
+        self.reverify_seconds = reverify_seconds
+        self.unknown_reverify_seconds = unknown_reverify_seconds
+        self.predict_calls = 0
+        self.cache_hits = 0
+
+    def needs_predict(self, state, now):
+        if not state.confirmed:
+            return True
+        interval = self.unknown_reverify_seconds if state.label is None else self.reverify_seconds
+        return interval is not None and now - state.confirmed_at >= interval
+
+    def recognize(self, track, predict_fn, now=None):
+        """
+        Atualiza o estado de reconhecimento do rastro e o retorna.
+        predict_fn() deve devolver (label, confiança) como recognizer.predict.
+        """
+        now = time.monotonic() if now is None else now
+        state = track.recognition
+        if state is None:
+            state = track.recognition = RecognitionState(self.votes_required)
+        if not self.needs_predict(state, now):
+            self.cache_hits += 1
+            return state
+
+        label, confidence = predict_fn()
+        self.predict_calls += 1
+        state.predict_calls += 1
+        state.votes.append((label if confidence < self.confidence_threshold else None, confidence))
+        if not state.confirmed:
+            state.confidence = confidence # Mostra a confiança atual enquanto ainda verifica
+
+        if len(state.votes) >= self.majority_votes:
+            winner, count = Counter(vote for vote, _ in state.votes).most_common(1)[0]
+            if count >= self.majority_votes:
+                winner_confidences = [conf for vote, conf in state.votes if vote == winner]
+                state.label = winner
+                state.confidence = sum(winner_confidences) / len(winner_confidences)
+                state.confirmed = True
+                state.confirmed_at = now
+                # A próxima verificação parte de votos novos: até reunir outra maioria, confirmed_at
+                # continua vencido e o predict roda a cada quadro
+                state.votes.clear()
+        return state
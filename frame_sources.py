@@ -0,0 +1,358 @@
+############################################# IMPORTING ################################################
+import os
+import queue
+import threading
+import time
+import cv2
+import numpy as np
+
+############################################# CONSTANTS ################################################
+FRAME_QUEUE_SIZE = 2 # Tamanho da fila entre a thread de captura e o loop de reconhecimento
+FRAME_READ_TIMEOUT_SECONDS = 2.0 # Tempo máximo esperando um quadro antes de considerar falha
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+SYNTHETIC_SOURCE_PREFIX = "synthetic" # Ex.: "synthetic", "synthetic:640x480", "synthetic:640x480:300"
+
+_END_OF_STREAM = object() # Sentinela colocada na fila quando a fonte termina
+
+############################################# FRAME SOURCES ############################################
+
+class FrameSource:
+    """
+    Interface base para fontes de quadros (câmera, vídeo, pasta de imagens, gerador sintético).
+    Segue a mesma convenção do cv2.VideoCapture: read() retorna (ret, frame).
+    """
+    is_live = False # Fontes ao vivo descartam quadros antigos; fontes de arquivo não precisam
+
+    def open(self):
+        return True
+
+    def read(self):
+        raise NotImplementedError
+
+    def release(self):
+        pass
+
+    def describe(self):
+        return self.__class__.__name__
+
+
+class CameraSource(FrameSource):
+    """Câmera ao vivo via cv2.VideoCapture(índice)."""
+    is_live = True
+
+    def __init__(self, index=0):
+        self.index = index
+        self.cap = None
+
+    def open(self):
+        self.cap = cv2.VideoCapture(self.index)
+        if not self.cap.isOpened():
+            return False
+        # Evita que o driver acumule quadros antigos no buffer interno
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        return True
+
+    def read(self):
+        if self.cap is None:
+            return False, None
+        return self.cap.read()
+
+    def release(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+    def describe(self):
+        return f"Câmera {self.index}"
+
+
+class VideoFileSource(FrameSource):
+    """
+    Arquivo de vídeo gravado. Com realtime=True respeita o FPS do arquivo,
+    simulando uma câmera; caso contrário entrega os quadros o mais rápido possível.
+    """
+
+    def __init__(self, path, realtime=False, loop=False):
+        self.path = path
+        self.realtime = realtime
+        self.loop = loop
+        self.is_live = realtime
+        self.cap = None
+        self._frame_interval = 0.0
+        self._next_frame_time = 0.0
+
+    def open(self):
+        if not os.path.isfile(self.path):
+            return False
+        self.cap = cv2.VideoCapture(self.path)
+        if not self.cap.isOpened():
+            return False
+        fps = self.cap.get(cv2.CAP_PROP_FPS)
+        self._frame_interval = 1.0 / fps if self.realtime and fps and fps > 0 else 0.0
+        self._next_frame_time = time.monotonic()
+        return True
+
+    def read(self):
+        if self.cap is None:
+            return False, None
+        if self._frame_interval:
+            delay = self._next_frame_time - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self._next_frame_time = max(self._next_frame_time + self._frame_interval, time.monotonic())
+        ret, frame = self.cap.read()
+        if not ret and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read()
+        return ret, frame
+
+    def release(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+    def describe(self):
+        return f"Vídeo {os.path.basename(self.path)}"
+
+
+class ImageDirectorySource(FrameSource):
+    """Pasta de imagens lidas em ordem alfabética, uma por quadro."""
+
+    def __init__(self, directory, loop=False):
+        self.directory = directory
+        self.loop = loop
+        self.image_paths = []
+        self._position = 0
+
+    def open(self):
+        if not os.path.isdir(self.directory):
+            return False
+        self.image_paths = sorted(os.path.join(self.directory, f) for f in os.listdir(self.directory)
+                                  if f.lower().endswith(IMAGE_EXTENSIONS))
+        self._position = 0
+        return bool(self.image_paths)
+
+    def read(self):
+        while True:
+            if self._position >= len(self.image_paths):
+                if not self.loop or not self.image_paths:
+                    return False, None
+                self._position = 0
+            image_path = self.image_paths[self._position]
+            self._position += 1
+            frame = cv2.imread(image_path, cv2.IMREAD_COLOR)
+            if frame is not None:
+                return True, frame
+            print(f"Aviso: Não foi possível ler a imagem {image_path}. Pulando.")
+
+    def describe(self):
+        return f"Pasta {self.directory}"
+
+
+class SyntheticSource(FrameSource):
+    """
+    Gerador sintético de quadros BGR para testes sem câmera.
+    Se face_images (recortes em tons de cinza) for informado, os rostos são colados
+    em posições que se movem lentamente; caso contrário desenha um rosto simples.
+    """
+
+    def __init__(self, width=640, height=480, num_frames=None, face_images=None, fps=None, seed=0):
+        self.width = width
+        self.height = height
+        self.num_frames = num_frames # None = infinito
+        self.face_images = list(face_images or [])
+        self.fps = fps
+        self.is_live = bool(fps)
+        self.rng = np.random.default_rng(seed)
+        self._frame_index = 0
+        self._background = None
+        self._next_frame_time = 0.0
+
+    def open(self):
+        self._frame_index = 0
+        noise = self.rng.integers(60, 100, size=(self.height, self.width, 1), dtype=np.uint8)
+        self._background = np.repeat(noise, 3, axis=2)
+        self._next_frame_time = time.monotonic()
+        return True
+
+    def _draw_default_face(self, frame, x, y, size):
+        center = (x + size // 2, y + size // 2)
+        cv2.ellipse(frame, center, (size // 2 - 4, int(size * 0.6) - 4), 0, 0, 360, (180, 190, 210), -1)
+        eye_y = y + int(size * 0.4)
+        cv2.circle(frame, (x + int(size * 0.33), eye_y), max(size // 14, 2), (40, 40, 40), -1)
+        cv2.circle(frame, (x + int(size * 0.67), eye_y), max(size // 14, 2), (40, 40, 40), -1)
+        cv2.ellipse(frame, (center[0], y + int(size * 0.75)), (size // 6, size // 14), 0, 0, 180, (60, 60, 120), 2)
+
+    def read(self):
+        if self._background is None:
+            return False, None
+        if self.num_frames is not None and self._frame_index >= self.num_frames:
+            return False, None
+        if self.fps:
+            delay = self._next_frame_time - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self._next_frame_time = max(self._next_frame_time + 1.0 / self.fps, time.monotonic())
+
+        frame = self._background.copy()
+        faces_to_draw = self.face_images or [None]
+        slot_width = self.width // len(faces_to_draw)
+        for slot, face in enumerate(faces_to_draw):
+            size = min(slot_width - 10, self.height - 20, 160) if face is None else min(face.shape[0], face.shape[1])
+            if size <= 0:
+                continue
+            # Movimento lento e determinístico para que o rastreamento tenha algo a seguir
+            offset = int(10 * np.sin((self._frame_index + slot * 7) / 15.0))
+            x = min(max(slot * slot_width + (slot_width - size) // 2 + offset, 0), self.width - size)
+            y = min(max((self.height - size) // 2 + offset // 2, 0), self.height - size)
+            if face is None:
+                self._draw_default_face(frame, x, y, size)
+            else:
+                crop = face[:size, :size]
+                frame[y:y + size, x:x + size] = cv2.cvtColor(crop, cv2.COLOR_GRAY2BGR) if crop.ndim == 2 else crop
+        self._frame_index += 1
+        return True, frame
+
+    def release(self):
+        self._background = None
+
+    def describe(self):
+        return f"Sintético {self.width}x{self.height}"
+
+
+def open_frame_source(spec):
+    """
+    Cria a fonte de quadros a partir de uma especificação simples:
+    índice inteiro (ou string numérica) = câmera, pasta = imagens,
+    "synthetic[:LxA[:N]]" = gerador sintético, qualquer outro caminho = arquivo de vídeo.
+    """
+    if isinstance(spec, FrameSource):
+        return spec
+    if isinstance(spec, int) or (isinstance(spec, str) and spec.strip().isdigit()):
+        return CameraSource(int(spec))
+    spec = str(spec)
+    if spec.lower().startswith(SYNTHETIC_SOURCE_PREFIX):
+        parts = spec.split(":")
+        width, height, num_frames = 640, 480, None
+        if len(parts) > 1 and "x" in parts[1]:
+            width, height = (int(v) for v in parts[1].lower().split("x"))
+        if len(parts) > 2 and parts[2].isdigit():
+            num_frames = int(parts[2])
+        return SyntheticSource(width, height, num_frames=num_frames)
+    if os.path.isdir(spec):
+        return ImageDirectorySource(spec)
+    return VideoFileSource(spec)
+
+############################################# THREADED READER ##########################################
+
+class ThreadedFrameReader:
+    """
+    Executa a captura da fonte em uma thread própria, entregando os quadros por uma fila limitada.
+    Em fontes ao vivo a fila descarta o quadro mais antigo quando cheia, e read() sempre devolve
+    o quadro mais recente disponível; em fontes de arquivo nenhum quadro é perdido.
+    """
+
+    def __init__(self, source, queue_size=FRAME_QUEUE_SIZE, drop_oldest=None):
+        self.source = open_frame_source(source)
+        self.drop_oldest = self.source.is_live if drop_oldest is None else drop_oldest
+        self.frames = queue.Queue(maxsize=max(1, queue_size))
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._finished = False
+
+    def start(self):
+        """Abre a fonte e inicia a thread de captura. Retorna False se a fonte não abrir."""
+        if not self.source.open():
+            return False
+        self._stop_event.clear()
+        self._finished = False
+        self._thread = threading.Thread(target=self._capture_loop, name="FrameCapture", daemon=True)
+        self._thread.start()
+        return True
+
+    def _put(self, item):
+        while not self._stop_event.is_set():
+            if self.drop_oldest:
+                try:
+                    self.frames.put_nowait(item)
+                    return
+                except queue.Full:
+                    try:
+                        self.frames.get_nowait()
+                        self.frames_dropped += 1
+                    except queue.Empty:
+                        pass
+            else:
+                try:
+                    self.frames.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+
+    def _capture_loop(self):
+        try:
+            while not self._stop_event.is_set():
+                ret, frame = self.source.read()
+                if not ret:
+                    break
+                self.frames_captured += 1
+                self._put(frame)
+        except Exception as e:
+            print(f"Erro na thread de captura ({self.source.describe()}): {e}")
+        finally:
+            self._put(_END_OF_STREAM)
+
+    def read(self, timeout=FRAME_READ_TIMEOUT_SECONDS):
+        """
+        Retorna (ret, frame) como cv2.VideoCapture.read().
+        ret=False indica fim da fonte, falha de captura ou tempo esgotado.
+        """
+        if self._finished:
+            return False, None
+        try:
+            item = self.frames.get(timeout=timeout)
+        except queue.Empty:
+            return False, None
+        if self.drop_oldest:
+            # Descarta quadros acumulados enquanto o loop processava o anterior
+            while item is not _END_OF_STREAM:
+                try:
+                    newer = self.frames.get_nowait()
+                except queue.Empty:
+                    break
+                if newer is _END_OF_STREAM:
+                    self.frames.put(newer)
+                    break
+                item = newer
+                self.frames_dropped += 1
+        if item is _END_OF_STREAM:
+            self._finished = True
+            return False, None
+        return True, item
+
+    def read_nowait(self):
+        """
+        Versão sem espera de read(), para loops dirigidos por timer (ex.: window.after):
+        (True, frame) com um quadro novo, (None, None) se ainda não chegou nenhum, (False, None) no fim da fonte.
+        """
+        if self._finished:
+            return False, None
+        if self.frames.empty():
+            return None, None
+        return self.read(timeout=0)
+
+    def stop(self):
+        """Encerra a thread de captura e libera a fonte."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=FRAME_READ_TIMEOUT_SECONDS)
+            self._thread = None
+        self.source.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
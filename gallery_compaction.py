@@ -0,0 +1,164 @@
+############################################# IMPORTING ################################################
+import os
+import sys
+import tempfile
+import time
+import cv2
+import numpy as np
+
+from face_gallery import spatial_histogram
+
+############################################# CONSTANTS ################################################
+PROTOTYPES_PER_PERSON = None # k amostras representativas por pessoa; None mantém todas
+KMEANS_ITERATIONS = 10
+COMPACTION_SEED = 0 # Sementes fixas: o mesmo conjunto de imagens sempre gera o mesmo modelo
+HOLDOUT_EVERY = 5 # No relatório, 1 a cada N amostras de cada pessoa fica fora do treinamento
+REPORT_THRESHOLD = 65 # Mesmo limiar de confiança usado no reconhecimento
+
+############################################# PROTOTYPES ###############################################
+
+def select_prototypes(histograms, k, seed=COMPACTION_SEED):
+    """
+    Escolhe até k amostras representativas entre os histogramas de uma pessoa.
+    k-means (inicialização k-means++) sobre a raiz dos histogramas, onde a distância euclidiana
+    é a de Hellinger, próxima do chi-quadrado do LBPH; de cada grupo fica a amostra real mais
+    próxima do centro (medoide), para o modelo continuar sendo treinado com recortes de verdade.
+    Retorna os índices escolhidos, em ordem crescente.
+    """
+    count = len(histograms)
+    if k is None or count <= k:
+        return list(range(count))
+    points = np.sqrt(np.asarray(histograms, dtype=np.float32))
+    rng = np.random.default_rng(seed)
+
+    centers = [points[rng.integers(count)]]
+    closest = ((points - centers[0]) ** 2).sum(axis=1)
+    for _ in range(1, k):
+        total = closest.sum()
+        index = rng.choice(count, p=closest / total) if total > 0 else rng.integers(count)
+        centers.append(points[index])
+        closest = np.minimum(closest, ((points - points[index]) ** 2).sum(axis=1))
+    centers = np.vstack(centers)
+
+    squared = (points ** 2).sum(axis=1)
+    for _ in range(KMEANS_ITERATIONS):
+        distances = squared[:, None] + (centers ** 2).sum(axis=1)[None, :] - 2.0 * points @ centers.T
+        assignment = distances.argmin(axis=1)
+        new_centers = centers.copy()
+        for cluster in range(k):
+            members = assignment == cluster
+            if members.any():
+                new_centers[cluster] = points[members].mean(axis=0)
+        if np.allclose(new_centers, centers):
+            break
+        centers = new_centers
+
+    distances = squared[:, None] + (centers ** 2).sum(axis=1)[None, :] - 2.0 * points @ centers.T
+    chosen = set()
+    for cluster in range(k):
+        for index in np.argsort(distances[:, cluster]): # Medoide; se já usado, a próxima amostra mais próxima
+            if int(index) not in chosen:
+                chosen.add(int(index))
+                break
+    return sorted(chosen)
+
+
+def compact_training_set(faces, labels, paths=None, k=PROTOTYPES_PER_PERSON, progress=None):
+    """
+    Reduz as amostras de cada pessoa a k protótipos. Retorna (faces, labels, paths) filtrados,
+    preservando a ordem original. Com k=None nada é alterado.
+    progress(pessoas_feitas, total_de_pessoas) é chamado a cada pessoa processada.
+    """
+    if k is None:
+        if progress:
+            persons = len(set(labels))
+            progress(persons, persons)
+        return faces, labels, paths
+    by_label = {}
+    for i, label in enumerate(labels):
+        by_label.setdefault(int(label), []).append(i)
+    keep = []
+    for done, (label, indices) in enumerate(by_label.items(), 1):
+        if len(indices) <= k:
+            keep.extend(indices)
+        else:
+            histograms = np.vstack([spatial_histogram(faces[i])[None, :] for i in indices])
+            keep.extend(indices[j] for j in select_prototypes(histograms, k, seed=COMPACTION_SEED + label))
+        if progress:
+            progress(done, len(by_label))
+    keep.sort()
+    compact_paths = [paths[i] for i in keep] if paths is not None else None
+    return [faces[i] for i in keep], [labels[i] for i in keep], compact_paths
+
+############################################# REPORT ###################################################
+
+def _split_holdout(faces, labels, every=HOLDOUT_EVERY):
+    train_faces, train_labels, test_faces, test_labels = [], [], [], []
+    seen = {}
+    for face, label in zip(faces, labels):
+        seen[label] = seen.get(label, 0) + 1
+        if seen[label] % every == 0:
+            test_faces.append(face)
+            test_labels.append(label)
+        else:
+            train_faces.append(face)
+            train_labels.append(label)
+    return train_faces, train_labels, test_faces, test_labels
+
+
+def compaction_report(faces, labels, ks, threshold=REPORT_THRESHOLD):
+    """
+    Para cada k (None = todas as amostras) treina um LBPH com os protótipos e mede, contra as
+    amostras separadas: acerto, aceitos abaixo do limiar, confiança média, tamanho do
+    Trainner.yml, tempo de leitura do arquivo e tempo médio de predict.
+    """
+    train_faces, train_labels, test_faces, test_labels = _split_holdout(faces, labels)
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for k in ks:
+            start = time.perf_counter()
+            k_faces, k_labels, _ = compact_training_set(train_faces, train_labels, k=k)
+            compact_seconds = time.perf_counter() - start
+            recognizer = cv2.face.LBPHFaceRecognizer_create()
+            recognizer.train(k_faces, np.array(k_labels))
+            model_path = os.path.join(tmp_dir, f"Trainner_{k or 'all'}.yml")
+            recognizer.save(model_path)
+
+            start = time.perf_counter()
+            loaded = cv2.face.LBPHFaceRecognizer_create()
+            loaded.read(model_path)
+            load_seconds = time.perf_counter() - start
+
+            correct = accepted = 0
+            confidences = []
+            start = time.perf_counter()
+            for face, label in zip(test_faces, test_labels):
+                predicted, confidence = loaded.predict(face)
+                correct += predicted == label
+                accepted += predicted == label and confidence < threshold
+                confidences.append(confidence)
+            predict_ms = (time.perf_counter() - start) * 1000.0 / max(len(test_faces), 1)
+            rows.append({"k": k or "todas", "samples": len(k_faces),
+                         "model_mb": round(os.path.getsize(model_path) / 1e6, 2),
+                         "load_s": round(load_seconds, 3), "predict_ms": round(predict_ms, 2),
+                         "accuracy": round(correct / max(len(test_faces), 1), 4),
+                         "accepted": round(accepted / max(len(test_faces), 1), 4),
+                         "mean_conf": round(float(np.mean(confidences)), 2) if confidences else None,
+                         "compact_s": round(compact_seconds, 2)})
+    return rows
+
+
+if __name__ == "__main__":
+    # Uso: python gallery_compaction.py [pasta_de_imagens|synthetic] [k1,k2,...]
+    # Mostra o compromisso tamanho/velocidade x acerto para cada k, contra amostras separadas do treino.
+    from training import list_training_images, load_images_and_labels
+    source = sys.argv[1] if len(sys.argv) > 1 else "synthetic"
+    ks = [None] + [int(k) for k in (sys.argv[2] if len(sys.argv) > 2 else "30,15,8,4").split(",")]
+    if source == "synthetic":
+        from benchmark import build_synthetic_gallery
+        all_faces, all_labels = build_synthetic_gallery(30, 60)
+        all_labels = [int(label) for label in all_labels]
+    else:
+        all_faces, all_labels, _ = load_images_and_labels(list_training_images(source))
+    for row in compaction_report(all_faces, all_labels, ks):
+        print(" | ".join(f"{key}={value}" for key, value in row.items()))
@@ -5,31 +5,37 @@ from PIL import Image, ImageTk
 import cv2
 import os
 import csv
-import numpy as np
+import sqlite3
 import pandas as pd
 import datetime
 import time
-import serial  # Para comunicação com o servo
+import queue
 import atexit  # Para garantir o fechamento da porta serial
-# --- ADICIONAR ESTAS IMPORTAÇÕES PARA O E-MAIL ---
-import smtplib
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from email.mime.base import MIMEBase
-from email import encoders
-# ---------------------------------------------
-
-# Variável global para o ID do timer de fechamento automático da porta
-auto_close_door_timer_id = None # Mantido como global
+from frame_sources import ThreadedFrameReader, FRAME_QUEUE_SIZE # Captura de quadros em thread própria
+from face_detection import FaceDetector, DETECTION_MIN_FACE_PX # Detecção Haar em quadro reduzido
+from student_registry import StudentRegistry # Índice em memória do StudentDetails.csv
+from recognition_engine import RecognitionEngine, EngineError # Reconhecimento sem dependência da GUI
+from metrics import create_metrics, draw_metrics_overlay # Tempos por etapa, contadores e exportação
+from training_worker import BackgroundTrainer, MESSAGE_PROGRESS, MESSAGE_DONE, MESSAGE_ERROR # Treino fora da thread do Tk
+from sample_capture import SampleQualityGate, SampleWriter # Filtro de qualidade e gravação em segundo plano no cadastro
+from sample_archive import sample_archive_path, SAMPLE_ARCHIVE_EXTENSION, SAMPLE_CROP_SIZE # Amostras de cada pessoa em um único arquivo
+from attendance_store import AttendanceStore, AttendanceWriter, ATTENDANCE_DB_FILENAME # Presenças em SQLite, CSV só na exportação
+from attendance_view import AttendanceView # Treeview de presenças atualizada ao vivo
+from tk_preview import TkPreview, CameraLoop, SESSION_CAMERA_ERROR, SESSION_END_OF_STREAM # Câmera dentro da janela do Tk
+from door_controller import DoorController # Servo da porta em thread própria (conexão e comandos fora da GUI)
+from email_outbox import EmailOutbox, EmailSettings, load_email_settings, RESULT_SENT, RESULT_FAILED, JOB_MANUAL # Fila de e-mails em segundo plano
+
+attendance_store = None # Aberto na primeira utilização (get_attendance_store)
 
 ############################################# CONSTANTS ################################################
 # --- Configurações do Servo ---
-SERVO_SERIAL_PORT = "COM7"  # <<< --- Configure com a porta correta do seu Arduino
+SERVO_SERIAL_PORT = "COM7"  # <<< --- Configure com a porta correta do seu Arduino ("mock" ou "loop://" para testar sem Arduino)
 SERVO_BAUD_RATE = 9600
 SERVO_OPEN_COMMAND = 'O'
 SERVO_CLOSE_COMMAND = 'F'
 SERVO_CONNECTION_TIMEOUT = 1 # Segundos para timeout da conexão serial
-SERVO_ARDUINO_BOOT_DELAY = 2 # Segundos para aguardar o Arduino reiniciar
+SERVO_ARDUINO_BOOT_DELAY = 2 # Segundos para aguardar o Arduino reiniciar (na thread da porta, não na GUI)
+SERVO_RECONNECT_INTERVAL_SECONDS = 5 # Espera entre tentativas de reconexão com o Arduino
 
 # --- Diretórios e Arquivos ---
 BASE_DIR = os.path.dirname(os.path.abspath(__file__)) # Diretório base do script
@@ -37,16 +43,52 @@ TRAINING_IMAGE_LABEL_DIR = os.path.join(BASE_DIR, "TrainingImageLabel")
 STUDENT_DETAILS_DIR = os.path.join(BASE_DIR, "StudentDetails")
 TRAINING_IMAGE_DIR = os.path.join(BASE_DIR, "TrainingImage")
 ATTENDANCE_DIR = os.path.join(BASE_DIR, "Attendance") # 
+ATTENDANCE_DB_FILE = os.path.join(ATTENDANCE_DIR, ATTENDANCE_DB_FILENAME) # Todas as presenças; os Attendance_*.csv são exportados dele
+ATTENDANCE_FLUSH_INTERVAL_SECONDS = 1.0 # Tempo máximo entre o reconhecimento e a presença gravada no banco
+
+CONFIG_FILE = os.path.join(BASE_DIR, "config.ini") # [Email]: remetente, senha, servidor SMTP e relatório diário
+OUTBOX_DIR = os.path.join(BASE_DIR, "Outbox") # E-mails aguardando envio (sobrevivem a reinícios)
+EMAIL_RESULT_POLL_MS = 500 # Intervalo entre leituras dos resultados de envio na thread do Tk
 
 HAARCASCADE_FILE = os.path.join(BASE_DIR, "haarcascade_frontalface_default.xml")
 PASSWORD_FILE = os.path.join(TRAINING_IMAGE_LABEL_DIR, "psd.txt")
 STUDENT_DETAILS_CSV = os.path.join(STUDENT_DETAILS_DIR, "StudentDetails.csv")
 TRAINER_FILE = os.path.join(TRAINING_IMAGE_LABEL_DIR, "Trainner.yml")
+TRAINER_MANIFEST_FILE = os.path.join(TRAINING_IMAGE_LABEL_DIR, "Trainner_manifest.json") # Imagens já incluídas no modelo
+TRAINER_BINARY_FILE = os.path.join(TRAINING_IMAGE_LABEL_DIR, "Trainner.lbph") # Cópia binária do modelo (abertura por mmap)
+TRAINING_SAMPLE_FORMAT = "archive" # "archive" (um .samples por pessoa) ou "jpg" (um arquivo por amostra, formato antigo)
+TRAINING_CACHE_DIR = os.path.join(TRAINING_IMAGE_LABEL_DIR, "cache") # Recortes já decodificados (evita reler os JPGs)
+TRAINING_POLL_INTERVAL_MS = 200 # Intervalo de leitura do progresso do treinamento em segundo plano
+TRAINING_PROTOTYPES_PER_PERSON = None # Amostras representativas por pessoa no modelo (ex.: 10); None usa todas as 60
 
 # --- Configurações da Câmera e Reconhecimento ---
 MAX_SAMPLES_PER_PERSON = 60 # Número de amostras de imagem por pessoa 
+CAPTURE_QUALITY_GATE = True # Só guarda recortes nítidos, bem iluminados e diferentes dos já aceitos
+CAPTURE_TARGET_SAMPLES = 30 # Amostras por pessoa com o filtro de qualidade (sem ele: MAX_SAMPLES_PER_PERSON)
 RECOGNITION_CONFIDENCE_THRESHOLD = 65 # Limiar de confiança para reconhecimento facial (menor é melhor) 
 AUTO_CLOSE_DOOR_DELAY_SECONDS = 4 # Tempo em segundos para fechar a porta automaticamente
+CAMERA_SOURCE = 0 # Índice da câmera, caminho de vídeo, pasta de imagens ou "synthetic" para testes sem câmera
+TRACKING_ENABLED = True # Se False, roda a detecção Haar em todos os quadros (comportamento antigo)
+DETECT_EVERY_N_FRAMES = 5 # Com rastreamento: detecção completa a cada N quadros
+REDETECT_POLICY = "on_lost" # "interval", "on_lost" ou "on_lost_or_empty"
+DETECTION_DOWNSCALE = "auto" # "auto" (escala escolhida pelo minSize), um fator fixo (ex.: 0.5) ou None
+RECOGNITION_VOTES_REQUIRED = 5 # Com rastreamento: predições (K) por rosto antes de fixar a identidade
+RECOGNITION_MAJORITY_RATIO = 0.6 # Fração dos K votos exigida para confirmar a identidade
+RECOGNITION_REVERIFY_SECONDS = 10 # Intervalo para verificar novamente uma identidade já confirmada
+RECOGNITION_UNKNOWN_REVERIFY_SECONDS = 1.0 # Intervalo (curto) para verificar novamente um rosto "Desconhecido"
+RECOGNIZER_BACKEND = "gallery" # "gallery" (abre o Trainner.lbph por mmap; busca exata em lote, mesmos rótulos) ou "lbph" (lê o Trainner.yml)
+MODEL_HOT_RELOAD = True # Um modelo salvo durante o reconhecimento entra em uso sem reiniciar a câmera
+
+# --- Pré-visualização da Câmera ---
+PREVIEW_ENABLED = True # False em quiosques sem monitor: a câmera e o reconhecimento continuam, sem desenhar a imagem
+PREVIEW_MAX_FPS = 15 # Atualizações da imagem por segundo, independente do ritmo de processamento
+PREVIEW_MAX_WIDTH = 540 # Largura da imagem na janela (o quadro é reduzido uma vez, antes das sobreposições)
+
+# --- Instrumentação ---
+METRICS_ENABLED = False # Mede o tempo de cada etapa do reconhecimento (custo desprezível quando desligado)
+METRICS_OVERLAY = True # Mostra FPS e latências na janela de reconhecimento quando as métricas estão ligadas
+METRICS_EXPORT_FILE = os.path.join(BASE_DIR, "metrics.prom") # .csv para CSV; outra extensão = texto Prometheus
+METRICS_EXPORT_INTERVAL_SECONDS = 10
 
 # --- Globais da GUI (usadas por várias funções) ---
 window = None
@@ -56,6 +98,12 @@ name_entry = None
 registration_status_label = None
 total_registrations_label = None
 attendance_treeview = None
+attendance_view = None # AttendanceView sobre a attendance_treeview
+preview_panel = None # Painel da câmera, sobreposto ao de registro durante uma sessão
+preview_title_label = None
+preview_status_label = None
+preview = None # TkPreview do painel da câmera
+camera_session = None # CameraLoop em andamento (captura ou reconhecimento)
 change_password_window = None
 old_password_entry = None
 new_password_entry = None
@@ -63,91 +111,31 @@ confirm_new_password_entry = None
 # --- Globais para o email ---
 recipient_email_entry = None
 domain_var = None
+email_status_label = None
 #----------------------------
 
 
-servo_ser = None  # Objeto para a conexão serial
+door_controller = None  # DoorController criado na primeira sessão de reconhecimento
+email_outbox = None # EmailOutbox iniciado com a janela
+background_trainer = None # BackgroundTrainer em execução (no máximo um por vez)
+student_registry = StudentRegistry(STUDENT_DETAILS_CSV) # Busca O(1) por serial/ID, recarregada quando o CSV muda
 
 ############################################# SERVO CONFIG & FUNCTIONS #################################
 
-def init_servo_serial():
-    """
-    Inicializa a conexão serial com o servo motor (Arduino).
-    Retorna True se a conexão for bem-sucedida, False caso contrário.
-    """
-    global servo_ser # 
-    try:
-        if servo_ser and servo_ser.is_open: # 
-            print("Conexão serial do servo já ativa.") # 
-            return True # 
-        print(f"Tentando conectar ao servo em {SERVO_SERIAL_PORT}...") # 
-        servo_ser = serial.Serial(SERVO_SERIAL_PORT, SERVO_BAUD_RATE, timeout=SERVO_CONNECTION_TIMEOUT) # 
-        time.sleep(SERVO_ARDUINO_BOOT_DELAY)  # Aguarda o Arduino reiniciar # 
-        print(f"Conectado ao servo em {SERVO_SERIAL_PORT}.") # 
-        return True # 
-    except serial.SerialException as e:
-        print(f"Erro: Não foi possível conectar ao servo em {SERVO_SERIAL_PORT}. {e}") # 
-        messagebox.showerror("Erro de Conexão com Servo",
-                             f"Não foi possível conectar ao servo em {SERVO_SERIAL_PORT}.\n"
-                             "Verifique a porta e a conexão do Arduino.\n"
-                             "O controle da porta será desativado.") # 
-        servo_ser = None # 
-        return False # 
-
-def send_servo_command(command):
+def get_door_controller():
     """
-    Envia um comando para o servo motor via serial.
-    Tenta reconectar se a conexão estiver inativa.
-    Retorna True se o comando for enviado com sucesso, False caso contrário.
+    Cria e inicia o controlador da porta na primeira chamada. Volta na hora: a conexão com o
+    Arduino (e a espera do boot) acontece na thread do controlador, que tenta reconectar
+    sozinha se a serial cair. Ao sair do programa a porta é fechada (atexit).
     """
-    global servo_ser
-    if not servo_ser or not servo_ser.is_open:
-        print("Servo não conectado. Tentando conectar...")
-        if not init_servo_serial():
-            print("Falha ao conectar ao servo. Comando não enviado.")
-            return False
-    try:
-        servo_ser.write(command.encode('utf-8'))
-        print(f"Comando '{command}' enviado ao servo.")
-        return True
-    except serial.SerialException as e: # 
-        print(f"Erro de comunicação serial ao enviar '{command}': {e}") # 
-        return False # 
-    except AttributeError:
-        print(f"Erro: Objeto servo_ser é None ao tentar enviar comando '{command}'.")
-        return False
-
-
-def close_servo_serial():
-    """
-    Fecha a conexão serial com o servo e cancela timers pendentes.
-    Chamada automaticamente ao sair do programa via atexit.
-    """
-    global servo_ser, auto_close_door_timer_id, window # auto_close_door_timer_id é global
-
-    if auto_close_door_timer_id and window and window.winfo_exists():
-        try:
-            window.after_cancel(auto_close_door_timer_id)
-            print(f"Timer de fechamento automático (ID: {auto_close_door_timer_id}) cancelado ao sair do programa.")
-        except tk.TclError:
-            print(f"Erro ao tentar cancelar timer (ID: {auto_close_door_timer_id}) ao sair do programa. Janela pode já estar destruída.")
-        auto_close_door_timer_id = None
-
-    if servo_ser and servo_ser.is_open:
-        try:
-            print(f"Enviando comando para {SERVO_CLOSE_COMMAND} (FECHAR) a porta antes de desconectar (atexit)...")
-            send_servo_command(SERVO_CLOSE_COMMAND)
-            time.sleep(0.5)
-
-            print("Fechando porta serial do servo (atexit).") # 
-            servo_ser.close() # 
-            print("Desconectado do controlador de servo (atexit).") # 
-        except serial.SerialException as e: # 
-            print(f"Erro ao fechar porta serial ou enviar comando final (atexit): {e}")
-        finally:
-            servo_ser = None # 
-
-atexit.register(close_servo_serial) # 
+    global door_controller
+    if door_controller is None:
+        door_controller = DoorController(SERVO_SERIAL_PORT, SERVO_BAUD_RATE, SERVO_OPEN_COMMAND, SERVO_CLOSE_COMMAND, # 
+                                         auto_close_seconds=AUTO_CLOSE_DOOR_DELAY_SECONDS, # 
+                                         boot_delay=SERVO_ARDUINO_BOOT_DELAY, # 
+                                         reconnect_interval=SERVO_RECONNECT_INTERVAL_SECONDS).start() # 
+        atexit.register(door_controller.stop) # 
+    return door_controller
 
 ############################################# DIRECTORY & FILE SETUP #####################################
 def assure_path_exists(path):
@@ -165,43 +153,17 @@ assure_path_exists(STUDENT_DETAILS_DIR) #
 assure_path_exists(TRAINING_IMAGE_DIR) # 
 assure_path_exists(ATTENDANCE_DIR) # 
 
-############################################# AUTOMATIC DOOR CONTROL #####################################
-
-def auto_close_door():
-    global auto_close_door_timer_id, window # auto_close_door_timer_id é global
-
-    if not (window and window.winfo_exists()):
-        print("Janela principal não existe mais. Cancelando fechamento automático da porta.")
-        auto_close_door_timer_id = None
-        return
-
-    print("Tempo expirado. Enviando comando para fechar a porta automaticamente.")
-    if send_servo_command(SERVO_CLOSE_COMMAND):
-        print("Comando de fechar porta enviado automaticamente.")
-
-    else:
-        print("Falha ao enviar comando de fechar porta automaticamente.")
-
-    auto_close_door_timer_id = None
-
-
-def schedule_auto_close_door(delay_seconds=AUTO_CLOSE_DOOR_DELAY_SECONDS):
-    global window, auto_close_door_timer_id # auto_close_door_timer_id é global
-
-    if not (window and window.winfo_exists()):
-        print("Janela principal não existe. Não é possível agendar fechamento da porta.")
-        return
-
-    if auto_close_door_timer_id:
-        try:
-            window.after_cancel(auto_close_door_timer_id)
-            print(f"Timer de fechamento automático anterior (ID: {auto_close_door_timer_id}) cancelado.")
-        except tk.TclError:
-            print(f"Erro ao tentar cancelar timer anterior (ID: {auto_close_door_timer_id}). Pode já ter sido executado.")
-        auto_close_door_timer_id = None
-
-    print(f"Agendando fechamento automático da porta em {delay_seconds} segundos.")
-    auto_close_door_timer_id = window.after(delay_seconds * 1000, auto_close_door)
+def get_attendance_store():
+    """Abre o banco de presenças na primeira chamada; um banco novo recebe os Attendance_*.csv já existentes."""
+    global attendance_store
+    if attendance_store is None:
+        attendance_store = AttendanceStore(ATTENDANCE_DB_FILE)
+        atexit.register(attendance_store.close)
+        if attendance_store.created:
+            imported = attendance_store.import_csv_directory(ATTENDANCE_DIR)
+            if imported:
+                print(f"{imported} presença(s) importada(s) dos CSVs para {os.path.basename(ATTENDANCE_DB_FILE)}.")
+    return attendance_store
 
 ############################################# GUI HELPER FUNCTIONS #######################################
 def tick(): # 
@@ -297,7 +259,7 @@ def open_change_password_window(): #
     cancel_btn = tk.Button(button_frame, text="Cancelar", command=change_password_window.destroy, fg="black", bg="red", height=1, width=10, font=('comic', 10, 'bold')) # 
     cancel_btn.pack(side=tk.LEFT, padx=10) # 
 
-def prompt_password_for_profile_save(): # 
+def prompt_password_for_profile_save(full_retrain=False): # 
     global window
     if not os.path.isfile(PASSWORD_FILE): # 
         new_pas = tsd.askstring('Senha não encontrada', # 
@@ -320,7 +282,7 @@ def prompt_password_for_profile_save(): #
     password_attempt = tsd.askstring('Senha Necessária', 'Digite a senha para Salvar Perfil:', show='*', parent=window) # 
 
     if password_attempt == key_from_file: # 
-        train_images_action() # Chama a função de treinamento # 
+        train_images_action(full_retrain=full_retrain) # Chama a função de treinamento # 
     elif password_attempt is None: # 
         pass # 
     else: # 
@@ -402,364 +364,368 @@ def take_images_action(): #
         messagebox.showerror("Erro de Arquivo", f"Não foi possível ler/escrever os detalhes dos estudantes: {e}", parent=window) # 
         return # 
 
-    cam = cv2.VideoCapture(0) # 
-    if not cam.isOpened(): # 
+    if camera_session_busy(): # 
+        return # 
+    try:
+        detector = FaceDetector(HAARCASCADE_FILE, scale_factor=1.3, min_neighbors=5, # 
+                                min_size=(DETECTION_MIN_FACE_PX, DETECTION_MIN_FACE_PX), # Mesmo limite do filtro de qualidade
+                                downscale=DETECTION_DOWNSCALE) # Detecta no quadro reduzido, caixas em resolução original
+    except IOError as e: # Antes de abrir a câmera: nada para liberar
+        messagebox.showerror("Arquivo Ausente", str(e), parent=window) # 
+        return # 
+    cam = ThreadedFrameReader(CAMERA_SOURCE, queue_size=FRAME_QUEUE_SIZE) # Captura em thread separada
+    if not cam.start(): # 
         messagebox.showerror("Erro de Câmera", "Não foi possível abrir a câmera.", parent=window) # 
         return # 
 
-    detector = cv2.CascadeClassifier(HAARCASCADE_FILE) # 
+    target_samples = CAPTURE_TARGET_SAMPLES if CAPTURE_QUALITY_GATE else MAX_SAMPLES_PER_PERSON
+    gate = SampleQualityGate(target_samples=target_samples) if CAPTURE_QUALITY_GATE else None
+    if TRAINING_SAMPLE_FORMAT == "archive":
+        writer = SampleWriter(sample_archive_path(TRAINING_IMAGE_DIR, student_name, next_serial_no, student_id_str),
+                              next_serial_no, student_id_str, student_name) # Gravação fora do loop da câmera
+    else:
+        writer = SampleWriter() # cv2.imwrite fora do loop da câmera
     sample_num = 0 # 
-
-    window_title_capture = "Capturando Imagens - Pressione Q para Sair" # 
-    cv2.namedWindow(window_title_capture, cv2.WINDOW_AUTOSIZE) # 
-
-    try:
-        while True: # 
-            ret, img = cam.read() # 
-            if not ret: # 
-                messagebox.showerror("Erro de Câmera", "Falha ao capturar imagem da câmera.", parent=window) # 
-                break # 
-
-            gray_img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) # 
-            faces = detector.detectMultiScale(gray_img, scaleFactor=1.3, minNeighbors=5, minSize=(100,100)) # 
-            display_img = img.copy() # 
-
-            for (x, y, w, h) in faces: # 
-                cv2.rectangle(display_img, (x, y), (x + w, y + h), (255, 0, 0), 2) # 
-                if sample_num < MAX_SAMPLES_PER_PERSON: # 
+    last_sample_time = 0.0 # 
+
+    def capture_frame(img): # Um quadro novo da câmera; devolve False quando as amostras estão completas
+        nonlocal sample_num, last_sample_time
+        gray_img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) # 
+        faces = detector.detect(gray_img) # 
+        boxes = [] # (caixa, cor, texto) para a pré-visualização
+
+        for (x, y, w, h) in faces: # 
+            color = (255, 0, 0) # 
+            status_text = ""
+            # Sem o filtro, as amostras seguem o ritmo do antigo waitKey(100) para não serem todas iguais
+            if sample_num < target_samples and (gate or time.monotonic() - last_sample_time >= 0.1): # 
+                face_roi_gray = gray_img[y:y + h, x:x + w] # 
+                quality = gate.offer(face_roi_gray) if gate else None
+                if quality is None or quality.acceptable:
                     sample_num += 1 # 
+                    last_sample_time = time.monotonic() # 
                     img_filename = f"{student_name}.{next_serial_no}.{student_id_str}.{sample_num}.jpg" # 
-                    face_roi_gray = gray_img[y:y + h, x:x + w] # 
-                    cv2.imwrite(os.path.join(TRAINING_IMAGE_DIR, img_filename), face_roi_gray) # 
-
-                progress_text = f"Amostras: {sample_num}/{MAX_SAMPLES_PER_PERSON}" # 
-                cv2.putText(display_img, progress_text, (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2) # 
-
-            cv2.imshow(window_title_capture, display_img) # 
-
-            key = cv2.waitKey(100) & 0xFF # 
-            if key == ord('q') or key == 27: # 
-                break # 
-            if sample_num >= MAX_SAMPLES_PER_PERSON: # 
-                break # 
-    finally:
-        cam.release() # 
-        cv2.destroyAllWindows() # 
-
-    if sample_num > 0: # 
-        res_msg = f"Imagens Capturadas para ID: {student_id_str} (Serial Interno: {next_serial_no})" # 
-        row_to_add = [next_serial_no, student_id_str, student_name] # 
-        try:
-            with open(STUDENT_DETAILS_CSV, 'a+', newline='') as csv_file: # 
-                writer = csv.writer(csv_file) # 
-                writer.writerow(row_to_add) # 
-            registration_status_label.configure(text=res_msg) # 
-            update_registration_count_display() # 
-        except Exception as e: # 
-             messagebox.showerror("Erro de Arquivo", f"Não foi possível salvar os detalhes do estudante: {e}", parent=window) # 
-             registration_status_label.configure(text="Erro ao salvar detalhes.") # 
-    else: # 
-        registration_status_label.configure(text="Nenhuma imagem capturada. Face não detectada ou processo interrompido.") # 
+                    writer.submit(face_roi_gray, os.path.join(TRAINING_IMAGE_DIR, img_filename)) # 
+                else:
+                    color = (0, 165, 255) # Laranja: recorte descartado
+                    status_text = f" ({quality.reason})"
+            boxes.append(((x, y, w, h), color, f"Amostras: {sample_num}/{target_samples}{status_text}")) # 
+
+        def draw(image, scale): # Desenha já no quadro reduzido da pré-visualização
+            for box, color, progress_text in boxes: # 
+                x, y, w, h = (int(round(v * scale)) for v in box) # 
+                cv2.rectangle(image, (x, y), (x + w, y + h), color, 2) # 
+                cv2.putText(image, progress_text, (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2) # 
+        preview.show(img, draw) # 
+        set_preview_status(f"Amostras: {sample_num}/{target_samples}") # 
+        return sample_num < target_samples # 
+
+    def finish_capture(reason): # 
+        if reason in (SESSION_CAMERA_ERROR, SESSION_END_OF_STREAM): # 
+            messagebox.showerror("Erro de Câmera", "Falha ao capturar imagem da câmera.", parent=window) # 
+        writer.close() # Espera as gravações pendentes antes de registrar o aluno
+        if gate:
+            print(f"Cadastro {student_id_str}: {gate.describe()}")
+        for error in writer.errors:
+            print(f"Erro ao gravar amostra: {error}")
+
+        if writer.written > 0: # 
+            res_msg = f"Imagens Capturadas para ID: {student_id_str} (Serial Interno: {next_serial_no})" # 
+            row_to_add = [next_serial_no, student_id_str, student_name] # 
+            try:
+                with open(STUDENT_DETAILS_CSV, 'a+', newline='') as csv_file: # 
+                    csv_writer = csv.writer(csv_file) # 
+                    csv_writer.writerow(row_to_add) # 
+                registration_status_label.configure(text=res_msg) # 
+                update_registration_count_display() # 
+            except Exception as e: # 
+                 messagebox.showerror("Erro de Arquivo", f"Não foi possível salvar os detalhes do estudante: {e}", parent=window) # 
+                 registration_status_label.configure(text="Erro ao salvar detalhes.") # 
+        else: # 
+            registration_status_label.configure(text="Nenhuma imagem capturada. Face não detectada ou processo interrompido.") # 
 
-def train_images_action(): # 
-    global registration_status_label, window
-    if not check_haarcascadefile(): # 
-        return
+    start_camera_session("Capturando Imagens - Pressione Q para Sair", cam, capture_frame, finish_capture) # 
 
-    recognizer = cv2.face.LBPHFaceRecognizer_create() # 
-    faces, serial_ids_for_training = get_images_and_labels(TRAINING_IMAGE_DIR) # 
+###########################################################################################
+#                                   CAMERA PREVIEW                                      #
+###########################################################################################
 
-    if not faces or not serial_ids_for_training: # 
-        messagebox.showerror(title='Sem Dados', # 
-                             message='Nenhuma imagem encontrada para treinamento ou IDs não puderam ser extraídos.\n' # 
-                                     'Por favor, registre alguém primeiro e capture as imagens.', # 
-                             parent=window)
+def start_camera_session(title, cam, on_frame, on_finish): # 
+    """Mostra o painel da câmera e processa os quadros pelo loop do Tk (a janela continua respondendo)."""
+    global camera_session
+    preview_title_label.configure(text=title) # 
+    set_preview_status("" if PREVIEW_ENABLED else "Pré-visualização desativada") # 
+    preview_panel.place(relx=0.52, rely=0.17, relwidth=0.43, relheight=0.80) # Sobre o painel de registro
+    preview_panel.lift() # 
+
+    def finish(reason): # 
+        global camera_session
+        camera_session = None # 
+        preview.clear() # 
+        preview_panel.place_forget() # 
+        on_finish(reason) # 
+
+    camera_session = CameraLoop(window, cam, on_frame, finish).start() # 
+
+def stop_camera_session(event=None): # 
+    if event is not None and isinstance(event.widget, tk.Entry): # "q" digitado em um campo de texto
         return # 
+    if camera_session: # 
+        camera_session.stop() # 
 
-    if len(set(serial_ids_for_training)) < 1: # 
-        messagebox.showerror(title='Dados Insuficientes', # 
-                             message='É necessário registrar pelo menos uma pessoa com imagens para o treinamento.', # 
-                             parent=window)
-        return # 
+def camera_session_busy(): # 
+    if camera_session is not None: # 
+        messagebox.showinfo("Câmera em Uso", "Encerre a sessão de câmera atual (botão Parar ou tecla Q) antes de iniciar outra.", parent=window) # 
+        return True # 
+    return False # 
 
-    try:
-        recognizer.train(faces, np.array(serial_ids_for_training)) # 
-    except cv2.error as e: # 
-        error_message = f'Não foi possível treinar o reconhecedor: {e}\n' # 
-        if "src.size() > 0" in str(e) or "empty" in str(e).lower(): # 
-             error_message += "Verifique se há imagens de treinamento válidas.\n" # 
-        if "labels" in str(e).lower() and "int" in str(e).lower(): # 
-             error_message += "Os IDs (labels) para treinamento devem ser inteiros.\n" # 
-        if len(set(serial_ids_for_training)) < 2 and "two" in str(e).lower(): # 
-            error_message += "Alguns algoritmos de treinamento podem requerer pelo menos duas pessoas diferentes registradas.\n" # 
-        messagebox.showerror(title='Erro de Treinamento', message=error_message, parent=window) # 
-        return # 
-    except Exception as e: # 
-        messagebox.showerror(title='Erro de Treinamento', # 
-                             message=f'Um erro inesperado ocorreu durante o treinamento: {e}', # 
-                             parent=window)
-        return # 
+def set_preview_status(text): # 
+    if preview_status_label.cget("text") != text: # Evita reconfigurar o rótulo a cada quadro
+        preview_status_label.configure(text=text) # 
 
-    try:
-        recognizer.save(TRAINER_FILE) # 
-    except Exception as e: # 
-        messagebox.showerror(title='Erro ao Salvar', # 
-                             message=f'Não foi possível salvar o arquivo de treinamento {os.path.basename(TRAINER_FILE)}: {e}', # 
-                             parent=window)
-        return # 
+def quit_application(): # 
+    stop_camera_session() # Libera a câmera e grava as presenças pendentes antes de fechar
+    window.destroy() # 
 
-    num_trained_unique_ids = len(set(serial_ids_for_training)) # 
-    res = f"Perfil Salvo! Treinado para {num_trained_unique_ids} indivíduo(s) único(s)." # 
-    registration_status_label.configure(text=res) # 
-    messagebox.showinfo(title='Sucesso', message=res, parent=window) # 
+TRAINING_PHASE_TEXTS = {"loading": "carregando imagens", "persons": "processando pessoas",
+                        "training": "treinando o modelo", "saving": "salvando o modelo"}
 
-def get_images_and_labels(path_to_images): # 
-    image_paths = [os.path.join(path_to_images, f) for f in os.listdir(path_to_images) # 
-                   if f.lower().endswith(('.jpg', '.png', '.jpeg'))]
-    faces = [] # 
-    serial_ids = [] # 
+def train_images_action(full_retrain=False): # 
+    """
+    Salva o perfil: por padrão só as imagens novas são adicionadas ao Trainner.yml
+    (LBPH update); full_retrain=True reconstrói o modelo com todas as imagens.
+    O treinamento roda em outro processo; a janela continua respondendo (inclusive para
+    capturar novos cadastros) e o progresso aparece no rótulo de status.
+    """
+    global registration_status_label, window, background_trainer
+    if not check_haarcascadefile(): # 
+        return
+    if background_trainer is not None and background_trainer.running: # Novo clique durante o treino: oferece cancelar
+        if messagebox.askyesno("Treinamento em Andamento",
+                               "Um treinamento já está em andamento. Deseja cancelá-lo?", parent=window):
+            background_trainer.cancel()
+            registration_status_label.configure(text="Cancelando treinamento...")
+        return
 
-    for image_path in image_paths: # 
-        try:
-            pil_image = Image.open(image_path).convert('L') # 
-            image_np = np.array(pil_image, 'uint8') # 
-
-            filename_parts = os.path.basename(image_path).split(".") # 
-            if len(filename_parts) >= 4: # 
-                internal_serial_id = int(filename_parts[1]) # 
-                faces.append(image_np) # 
-                serial_ids.append(internal_serial_id) # 
+    background_trainer = BackgroundTrainer(image_dir=TRAINING_IMAGE_DIR, trainer_file=TRAINER_FILE, # 
+                                           manifest_file=TRAINER_MANIFEST_FILE, full_retrain=full_retrain,
+                                           cache_dir=TRAINING_CACHE_DIR,
+                                           prototypes_per_person=TRAINING_PROTOTYPES_PER_PERSON,
+                                           binary_model_file=TRAINER_BINARY_FILE).start()
+    registration_status_label.configure(text="Treinamento iniciado...") # 
+    window.after(TRAINING_POLL_INTERVAL_MS, poll_training_progress) # 
+
+def poll_training_progress(): # 
+    """Lê as mensagens do processo de treinamento (chamada pelo window.after)."""
+    global registration_status_label, window, background_trainer
+    if background_trainer is None:
+        return
+    for message in background_trainer.poll(): # 
+        kind = message[0]
+        if kind == MESSAGE_PROGRESS: # 
+            _, phase, done, total = message
+            phase_text = TRAINING_PHASE_TEXTS.get(phase, phase)
+            registration_status_label.configure(text=f"Treinando: {phase_text} ({done}/{total})...") # 
+        elif kind == MESSAGE_DONE: # 
+            _, mode, images_added, total_images, unique_ids = message
+            if mode == "up_to_date": # 
+                res = f"Modelo já atualizado. {unique_ids} indivíduo(s) único(s) treinado(s)." # 
+            elif mode == "incremental": # 
+                res = f"Perfil Salvo! {images_added} imagem(ns) nova(s) adicionada(s); {unique_ids} indivíduo(s) único(s)." # 
             else: # 
-                print(f"Aviso: Pulando arquivo com formato de nome inesperado: {image_path}") # 
-        except ValueError: # 
-            print(f"Aviso: Erro ao converter ID para inteiro no arquivo: {image_path}. Pulando.") # 
-        except Exception as e: # 
-            print(f"Erro ao processar imagem {image_path}: {e}. Pulando.") # 
-
-    return faces, serial_ids # 
+                res = f"Perfil Salvo! Treinado para {unique_ids} indivíduo(s) único(s)." # 
+            registration_status_label.configure(text=res) # 
+            messagebox.showinfo(title='Sucesso', message=res, parent=window) # 
+        elif kind == MESSAGE_ERROR: # 
+            _, title, error_message = message
+            registration_status_label.configure(text="Treinamento não concluído.") # 
+            messagebox.showerror(title=title, message=error_message, parent=window) # 
+        else: # Cancelado
+            registration_status_label.configure(text="Treinamento cancelado. O modelo anterior foi mantido.") # 
+    if background_trainer.running: # 
+        window.after(TRAINING_POLL_INTERVAL_MS, poll_training_progress) # 
 
 ###########################################################################################
 #                               TRACKING & ATTENDANCE LOGIC                             #
 ###########################################################################################
 
 def track_images_action(): # 
-    global attendance_treeview, window, auto_close_door_timer_id # Declarar auto_close_door_timer_id como global AQUI
+    global attendance_treeview, window
 
     if not check_haarcascadefile(): return # 
-    if attendance_treeview: # 
-        for item in attendance_treeview.get_children(): # 
-            attendance_treeview.delete(item) # 
-
-    servo_enabled = init_servo_serial() # 
-    if not servo_enabled: # 
-        messagebox.showwarning("Aviso Servo", # 
-                               "Controle da porta desativado devido a falha na conexão com o servo.\n" # 
-                               "O sistema de presença continuará sem controle de porta.", # 
-                               parent=window)
+    if camera_session_busy(): return # 
+    populate_attendance_treeview() # Presenças de hoje; as novas entram ao vivo durante a sessão
 
-    recognizer = cv2.face.LBPHFaceRecognizer_create() # 
-    if not os.path.isfile(TRAINER_FILE): # 
-        messagebox.showerror(title='Arquivo de Treinamento Ausente', # 
-                             message=f'{os.path.basename(TRAINER_FILE)} não encontrado. Por favor, Salve um Perfil primeiro.', # 
-                             parent=window)
-        return # 
-    recognizer.read(TRAINER_FILE) # 
+    door = get_door_controller() # Conecta em segundo plano; o reconhecimento começa sem esperar o Arduino
 
-    face_cascade = cv2.CascadeClassifier(HAARCASCADE_FILE) # 
-
-    if not os.path.isfile(STUDENT_DETAILS_CSV): # 
-        messagebox.showerror(title='Detalhes Ausentes', # 
-                             message=f'{os.path.basename(STUDENT_DETAILS_CSV)} está ausente. Não é possível mapear rostos para nomes.', # 
-                             parent=window)
+    door_was_opened_this_session = False # Flag para rastrear se a porta foi aberta
+    metrics = create_metrics(METRICS_ENABLED, METRICS_EXPORT_FILE, METRICS_EXPORT_INTERVAL_SECONDS) # 
+
+    def record_attendance(student_id, name, date_str, time_str): # Chamado no loop da câmera: só enfileira
+        attendance_writer.submit(student_id, name, date_str, time_str) # Gravada no banco em segundo plano
+        if attendance_view: # 
+            attendance_view.push(student_id, name, date_str, time_str) # Linha nova na tabela
+
+    def open_door_for(result): # Evento de acesso concedido vindo do motor de reconhecimento
+        nonlocal door_was_opened_this_session
+        t = metrics.now() # 
+        if door.open(): # Chamado a cada quadro com acesso concedido: com a porta já aberta só adia o fechamento
+            print(f"Acesso concedido para: {result.name}. Abrindo a porta.") # 
+            door_was_opened_this_session = True # MARCA QUE A PORTA FOI ABERTA
+            metrics.incr("door_opens") # 
+        metrics.record("servo", t) # 
+
+    engine = RecognitionEngine(trainer_file=TRAINER_FILE, cascade_file=HAARCASCADE_FILE, # 
+                               student_csv=STUDENT_DETAILS_CSV, registry=student_registry, # 
+                               confidence_threshold=RECOGNITION_CONFIDENCE_THRESHOLD, tracking=TRACKING_ENABLED, # 
+                               detect_every_n=DETECT_EVERY_N_FRAMES, redetect_policy=REDETECT_POLICY, # 
+                               downscale=DETECTION_DOWNSCALE, votes_required=RECOGNITION_VOTES_REQUIRED, # 
+                               majority_ratio=RECOGNITION_MAJORITY_RATIO, reverify_seconds=RECOGNITION_REVERIFY_SECONDS, # 
+                               unknown_reverify_seconds=RECOGNITION_UNKNOWN_REVERIFY_SECONDS, # 
+                               backend=RECOGNIZER_BACKEND, hot_reload=MODEL_HOT_RELOAD, on_door=open_door_for, # 
+                               query_crop_size=SAMPLE_CROP_SIZE if TRAINING_SAMPLE_FORMAT == "archive" else None, # Mesma escala das amostras do treino
+                               on_attendance=record_attendance, metrics=metrics) # 
+    try:
+        engine.load() # 
+    except EngineError as e: # 
+        messagebox.showerror(title=e.title, message=e.message, parent=window) # 
         return # 
+
     try:
-        df_students = pd.read_csv(STUDENT_DETAILS_CSV) # 
-        if df_students.empty: # 
-            messagebox.showerror(title='Detalhes Vazios', # 
-                                 message=f'{os.path.basename(STUDENT_DETAILS_CSV)} está vazio. Registre estudantes primeiro.', # 
-                                 parent=window)
-            return # 
-        if not all(col in df_students.columns for col in ['SERIAL NO.', 'ID', 'NAME']): # 
-            messagebox.showerror(title='Arquivo de Detalhes Inválido', # 
-                                 message=f'{os.path.basename(STUDENT_DETAILS_CSV)} não contém as colunas esperadas (SERIAL NO., ID, NAME).', # 
-                                 parent=window)
-            return # 
-    except Exception as e: # 
-        messagebox.showerror(title='Erro ao Ler Detalhes', # 
-                             message=f'Erro ao ler {os.path.basename(STUDENT_DETAILS_CSV)}: {e}', # 
-                             parent=window)
+        store = get_attendance_store() # 
+    except sqlite3.Error as e: # 
+        messagebox.showerror("Erro de Arquivo", f"Não foi possível abrir o banco de presenças: {e}", parent=window) # 
         return # 
 
-    cam = cv2.VideoCapture(0) # 
-    if not cam.isOpened(): # 
+    cam = ThreadedFrameReader(CAMERA_SOURCE, queue_size=FRAME_QUEUE_SIZE) # Sempre entrega o quadro mais recente
+    if not cam.start(): # 
         messagebox.showerror("Erro de Câmera", "Não foi possível abrir a câmera.", parent=window) # 
         return # 
-
-    font = cv2.FONT_HERSHEY_SIMPLEX # 
-    recognized_today_session = {} # 
-    door_was_opened_this_session = False # Flag para rastrear se a porta foi aberta
-
-    window_title_tracking = "Pressione Q para Sair" # 
-    cv2.namedWindow(window_title_tracking, cv2.WINDOW_AUTOSIZE) # 
-
-    try:
-        while True: # 
-            ret, frame = cam.read() # 
-            if not ret: # 
-                messagebox.showerror("Erro de Câmera", "Falha ao capturar imagem da câmera.", parent=window) # 
-                break # 
-
-            gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) # 
-            faces = face_cascade.detectMultiScale(gray_frame, scaleFactor=1.2, minNeighbors=5, minSize=(100, 100)) # 
-            display_frame = frame.copy() # 
-
-            for (x, y, w, h) in faces: # 
-                cv2.rectangle(display_frame, (x, y), (x + w, y + h), (225, 0, 0), 2) # 
-
-                predicted_serial_no, confidence = recognizer.predict(gray_frame[y:y + h, x:x + w]) # 
-
-                name_display = "Desconhecido" # 
-                student_id_display = "N/A" # 
-
-                if confidence < RECOGNITION_CONFIDENCE_THRESHOLD: # 
-                    student_info = df_students[df_students['SERIAL NO.'] == predicted_serial_no] # 
-
-                    if not student_info.empty: # 
-                        name_display = student_info['NAME'].values[0] # 
-                        student_id_display = str(student_info['ID'].values[0]) # 
-
-                        if servo_enabled: # 
-                            print(f"Acesso concedido para: {name_display}. Enviando comando para abrir a porta.") # 
-                            if send_servo_command(SERVO_OPEN_COMMAND): # 
-                                schedule_auto_close_door() # 
-                                door_was_opened_this_session = True # MARCA QUE A PORTA FOI ABERTA
-                        current_time_obj = datetime.datetime.now() # 
-                        date_str = current_time_obj.strftime('%d-%m-%Y') # 
-                        time_str = current_time_obj.strftime('%I:%M:%S %p') # 
-
-                        if (student_id_display, date_str) not in recognized_today_session: # 
-                            recognized_today_session[(student_id_display, date_str)] = time_str # 
-                            print(f"Presença registrada para {name_display} (ID: {student_id_display}) em {date_str} às {time_str}") # 
-                    else: # 
-                        name_display = "Face Conhecida, ID não Cadastrado" # 
-                        student_id_display = f"Serial: {predicted_serial_no}" # 
-                else: # 
-                    name_display = "Desconhecido" # 
-
-                cv2.putText(display_frame, f"{name_display} (ID:{student_id_display})", (x, y + h + 20), font, 0.6, (255, 255, 255), 1) # 
-                conf_text_color = (0,0,255) if confidence >= RECOGNITION_CONFIDENCE_THRESHOLD else (0,255,0) # 
-                cv2.putText(display_frame, f"Conf: {round(confidence,2)}", (x, y-5), font, 0.5, conf_text_color, 1) # 
-
-            cv2.imshow(window_title_tracking, display_frame) # 
-
-            key = cv2.waitKey(1) & 0xFF # 
-            if key == ord('q') or key == 27: # 
-                break # 
-    finally:
-        cam.release() # 
-        cv2.destroyAllWindows() # 
+    attendance_writer = AttendanceWriter(store, ATTENDANCE_FLUSH_INTERVAL_SECONDS) # Presenças vão para o banco durante a sessão
+
+    def track_frame(frame): # Um quadro novo da câmera
+        frame_start = camera_session.waiting_since # Desde o fim do quadro anterior: o quadro inclui a espera
+        metrics.record("capture", frame_start) # Espera pelo próximo quadro
+        face_results = engine.process_frame(frame) # 
+
+        def draw(image, scale): # Sobreposições desenhadas no quadro já reduzido, sem copiar o original
+            engine.draw_overlay(image, face_results, copy=False, scale=scale) # 
+            if METRICS_OVERLAY: # 
+                draw_metrics_overlay(image, metrics) # 
+        t = metrics.now() # 
+        if preview.show(frame, draw): # Só nos quadros que chegam à tela (PREVIEW_MAX_FPS)
+            metrics.record("display", t) # 
+        set_preview_status(f"Porta: {door.describe()}") # Conectando / aberta / fechada / desconectada
+        metrics.record("frame", frame_start) # 
+        metrics.frame_done() # 
+
+    def finish_tracking(reason): # 
+        if reason in (SESSION_CAMERA_ERROR, SESSION_END_OF_STREAM): # 
+            messagebox.showerror("Erro de Câmera", "Falha ao capturar imagem da câmera.", parent=window) # 
+        metrics.export() # Última exportação com os números da sessão
+        attendance_writer.close() # Grava o que ainda estiver na fila
 
         # --- LÓGICA PARA FECHAR A PORTA AO SAIR COM 'Q' ---
-        if door_was_opened_this_session and servo_enabled: # 
-            print("Saindo do reconhecimento (tecla Q pressionada). Fechando a porta manualmente...") # 
-
-            # Cancela qualquer timer de fechamento automático pendente, pois vamos fechar manualmente agora.
-            if auto_close_door_timer_id: # Verifica se existe um timer # 
-                if window and window.winfo_exists(): # Verifica se a janela principal ainda existe # 
-                    try:
-                        window.after_cancel(auto_close_door_timer_id) # 
-                        print(f"Timer de fechamento automático (ID: {auto_close_door_timer_id}) cancelado ao sair do reconhecimento.") # 
-                    except tk.TclError: # 
-                        print(f"Erro ao cancelar timer (ID: {auto_close_door_timer_id}) ao sair do reconhecimento - janela pode não existir mais.") # 
-                auto_close_door_timer_id = None # Anula o ID do timer globalmente para evitar execuções futuras # 
-
-            if send_servo_command(SERVO_CLOSE_COMMAND): # 
-                print("Porta fechada com sucesso ao sair do reconhecimento.") # 
-            else: # 
-                print("Falha ao enviar comando para fechar a porta ao sair do reconhecimento.") # 
+        if door_was_opened_this_session: # 
+            print("Saindo do reconhecimento. Fechando a porta...") # 
+            door.close() # Cancela o fechamento automático pendente e fecha agora
         # ----------------------------------------------------
 
-    if recognized_today_session: # 
-        save_attendance_to_csv(recognized_today_session, df_students) # 
-        populate_treeview_from_csv() # 
-
-def save_attendance_to_csv(recognized_this_session, df_all_students): # 
-    if not recognized_this_session: # 
-        return
-
-    first_entry_date_str = next(iter(recognized_this_session.keys()))[1] # 
-    attendance_csv_filename = f"Attendance_{first_entry_date_str}.csv" # 
-    attendance_csv_path = os.path.join(ATTENDANCE_DIR, attendance_csv_filename) # 
-
-    col_names_attendance = ['Registered_ID', 'Name', 'Date', 'Time'] # 
-
-    existing_records_in_file = set() # 
-    if os.path.isfile(attendance_csv_path): # 
-        try:
-            df_existing_attendance = pd.read_csv(attendance_csv_path) # 
-            if not df_existing_attendance.empty: # 
-                for _, row in df_existing_attendance.iterrows(): # 
-                    existing_records_in_file.add((str(row['Registered_ID']), row['Date'])) # 
-        except Exception as e: # 
-            print(f"Erro ao ler arquivo de presença existente {attendance_csv_path}: {e}") # 
-
+        for att_date in attendance_writer.dates: # Cada dia da sessão (inclusive depois da meia-noite) tem seu CSV
+            try:
+                store.export_csv(att_date, ATTENDANCE_DIR) # Attendance_dd-mm-AAAA.csv continua disponível
+            except (sqlite3.Error, OSError) as e: # 
+                print(f"Erro ao exportar presença de {att_date}: {e}") # 
+        if attendance_writer.pending: # 
+            messagebox.showerror("Erro de Arquivo", f"{len(attendance_writer.pending)} presença(s) não puderam ser salvas. " # 
+                                                    "Verifique o console.", parent=window) # 
+        if engine.recognized_today_session: # 
+            print(f"{attendance_writer.written} presença(s) nova(s) salva(s) de {len(engine.recognized_today_session)} reconhecida(s) na sessão.") # 
+
+    start_camera_session("Reconhecimento - Pressione Q para Sair", cam, track_frame, finish_tracking) # 
+
+def populate_attendance_treeview(): # 
+    """Recarrega a tabela com as presenças de hoje (na abertura e quando o dia é apagado)."""
+    global attendance_view, window
+    if not attendance_view: return # 
+
+    today = datetime.date.today() # 
     try:
-        with open(attendance_csv_path, 'a+', newline='') as csv_file: # 
-            writer = csv.writer(csv_file) # 
-            if os.path.getsize(attendance_csv_path) == 0 and not existing_records_in_file: # 
-                writer.writerow(col_names_attendance) # 
-
-            for (student_id, att_date), att_time in recognized_this_session.items(): # 
-                if (student_id, att_date) not in existing_records_in_file: # 
-                    student_info_for_csv = df_all_students[df_all_students['ID'].astype(str) == student_id] # 
-                    att_name = student_info_for_csv['NAME'].values[0] if not student_info_for_csv.empty else "Nome N/A" # 
-
-                    writer.writerow([student_id, att_name, att_date, att_time]) # 
-                    print(f"Salvo no CSV: ID {student_id}, Nome {att_name}, Data {att_date}, Hora {att_time}") # 
-    except IOError as e: # 
-        print(f"Erro de I/O ao salvar presença no CSV: {e}") # 
-        messagebox.showerror("Erro de Arquivo", f"Não foi possível salvar o arquivo de presença: {e}", parent=window) # 
-    except Exception as e: # 
-        print(f"Erro inesperado ao salvar presença no CSV: {e}") # 
-        messagebox.showerror("Erro Inesperado", f"Ocorreu um erro ao salvar a presença: {e}", parent=window) # 
-
-def populate_treeview_from_csv(): # 
-    global attendance_treeview, window
-    if not attendance_treeview: return # 
-
-    for item in attendance_treeview.get_children(): # Limpa a treeview # 
-        attendance_treeview.delete(item) # 
+        attendance_view.load_day(today.strftime('%d-%m-%Y'), get_attendance_store().day(today)) # 
+    except sqlite3.Error as e: # 
+        print(f"Erro ao ler presenças para a treeview: {e}") # 
+        messagebox.showerror("Erro na Treeview", f"Não foi possível carregar presença na tabela: {e}", parent=window) # 
 
-    current_date_filename_part = datetime.datetime.now().strftime('%d-%m-%Y') # 
-    attendance_csv_path = os.path.join(ATTENDANCE_DIR, f"Attendance_{current_date_filename_part}.csv") # 
+############################################# DATA DELETION FUNCTIONS ###################################
 
-    if os.path.isfile(attendance_csv_path): # 
+# --- ENVIO DE EMAIL (FILA EM SEGUNDO PLANO) ---
+def build_attendance_report(date_str): # 
+    """Exporta o CSV do dia a partir do banco. Retorna (assunto, corpo, caminho do anexo) ou None sem o arquivo."""
+    attachment_path = os.path.join(ATTENDANCE_DIR, f"Attendance_{date_str}.csv") # 
+    try:
+        get_attendance_store().export_csv(date_str, ATTENDANCE_DIR) # CSV do dia atualizado a partir do banco
+    except (sqlite3.Error, OSError) as e: # 
+        print(f"Aviso: Não foi possível exportar a presença de {date_str}: {e}") # 
+    if not os.path.isfile(attachment_path): # 
+        return None # 
+    current_time_str = time.strftime('%I:%M:%S %p') # 
+    subject = f"Relatório de Presença - Data: {date_str}, Hora: {current_time_str}" # 
+    body = f"Prezado(a),\n\nSegue em anexo o relatório de presença para {date_str}.\n\nAtenciosamente,\nSistema de Presença" # 
+    return subject, body, attachment_path # 
+
+def build_daily_report(day): # Chamado pela thread da fila no horário de daily_report_time
+    report = build_attendance_report(day.strftime('%d-%m-%Y')) # 
+    if report is None: # 
+        print(f"Relatório diário de {day.strftime('%d-%m-%Y')} sem arquivo de presença; nada enviado.") # 
+        return None # 
+    subject, body, attachment_path = report # 
+    return email_outbox.settings.daily_recipients, subject, body, [attachment_path] # 
+
+def get_email_outbox(): # 
+    """Inicia a fila de e-mails (reenviando o que ficou pendente) e agenda o relatório diário, se configurado."""
+    global email_outbox
+    if email_outbox is None:
         try:
-            with open(attendance_csv_path, 'r', newline='') as csv_file: # 
-                reader = csv.reader(csv_file) # 
-                header = next(reader, None) # Pula o cabeçalho # 
-
-                displayed_in_treeview_today = set() # (student_id, date) para evitar duplicatas na exibição # 
-
-                if header: # Garante que o arquivo não está completamente vazio após o cabeçalho # 
-                    for row_num, line_parts in enumerate(reader, 1): # Começa contagem de linha em 1 para logs # 
-                        if len(line_parts) >= 4: # 
-                            reg_id_val, name_val, date_val, time_val = line_parts[0], line_parts[1], line_parts[2], line_parts[3] # 
-
-                            if (reg_id_val, date_val) not in displayed_in_treeview_today: # 
-                                attendance_treeview.insert('', 'end', text=reg_id_val, values=(name_val, date_val, time_val)) # 
-                                displayed_in_treeview_today.add((reg_id_val, date_val)) # 
-                        else: # 
-                            print(f"Aviso: Linha {row_num+1} no CSV de presença tem formato incorreto: {line_parts}") # 
-        except StopIteration: # Arquivo CSV tem apenas cabeçalho ou está vazio # 
-             print(f"Arquivo de presença {os.path.basename(attendance_csv_path)} está vazio ou contém apenas cabeçalho.") # 
-        except Exception as e: # 
-            print(f"Erro ao ler ou analisar CSV de presença para treeview: {e}") # 
-            messagebox.showerror("Erro na Treeview", f"Não foi possível carregar presença na tabela: {e}", parent=window) # 
-
-############################################# DATA DELETION FUNCTIONS ###################################
+            settings = load_email_settings(CONFIG_FILE) # 
+        except ValueError as e: # 
+            print(f"Aviso: [Email] inválido em {os.path.basename(CONFIG_FILE)}: {e}") # 
+            settings = EmailSettings() # Sem credenciais: o envio pede a configuração
+        email_outbox = EmailOutbox(OUTBOX_DIR, settings).start() # 
+        atexit.register(email_outbox.stop) # 
+        if settings.configured and settings.daily_time and settings.daily_recipients: # 
+            email_outbox.schedule_daily(settings.daily_time, build_daily_report) # 
+            print(f"Relatório diário agendado para {settings.daily_time} ({', '.join(settings.daily_recipients)}).") # 
+    return email_outbox
+
+def set_email_status(text): # 
+    if email_status_label and email_status_label.winfo_exists(): # 
+        email_status_label.configure(text=text) # 
+
+def poll_email_results(): # Resultados da thread de envio, lidos na thread do Tk
+    outbox = get_email_outbox() # 
+    while True:
+        try:
+            job, status, error = outbox.results.get_nowait() # 
+        except queue.Empty: # 
+            break
+        recipients = ", ".join(job.recipients) # 
+        if status == RESULT_SENT and job.refused: # Aceito só para parte dos destinatários
+            delivered, refused = ", ".join(job.delivered_to), ", ".join(job.refused) # 
+            set_email_status(f"Relatório enviado para {delivered}; recusado para {refused}.") # 
+            messagebox.showwarning(title='E-mail Parcialmente Enviado', # 
+                                   message=f'Relatório enviado para {delivered}.\nO servidor recusou: {refused}', parent=window) # 
+        elif status == RESULT_SENT: # 
+            set_email_status(f"Relatório enviado para {recipients}.") # 
+            if job.kind == JOB_MANUAL: # 
+                messagebox.showinfo(title='Sucesso', message=f'Relatório de presença enviado para {recipients}.', parent=window) # 
+        elif status == RESULT_FAILED: # 
+            set_email_status(f"Falha definitiva no envio para {recipients}.") # 
+            messagebox.showerror(title='Erro de E-mail', message=f'Não foi possível enviar o e-mail para {recipients}: {error}', parent=window) # 
+        else: # 
+            set_email_status(f"Falha no envio ({error}). Nova tentativa automática em " # 
+                             f"{max(0, job.next_attempt - time.time()):.0f}s.") # 
+    window.after(EMAIL_RESULT_POLL_MS, poll_email_results) # 
 
-# --- FUNÇÃO DE ENVIO DE EMAIL COMPLETA ---
 def send_email(): # 
     global recipient_email_entry, domain_var, window # Adiciona as globais da GUI para email
 
@@ -772,72 +738,27 @@ def send_email(): #
 
     full_recipient_email = f"{recipient_email_user}@{selected_domain}" # 
 
-    # ATENÇÃO: Substitua com suas credenciais reais de e-mail
-    # É altamente recomendável usar senhas de aplicativo se o seu provedor de e-mail (como Gmail) as suportar.
-    from_email = "seu_email_remetente@gmail.com"  # SEU EMAIL AQUI 
-    password = "sua_senha_de_aplicativo_ou_normal"    # SUA SENHA AQUI 
-
-    if from_email == "seu_email_remetente@gmail.com" or password == "sua_senha_de_aplicativo_ou_normal": # 
+    outbox = get_email_outbox() # 
+    if not outbox.settings.configured: # 
         messagebox.showwarning("Configuração Necessária", # 
                                "As credenciais do remetente de e-mail não estão configuradas.\n" # 
-                               "Por favor, configure-as no script (variáveis 'from_email' e 'password' na função send_email).", # 
+                               f"Preencha address e password na seção [Email] de {os.path.basename(CONFIG_FILE)}.", # 
                                parent=window)
         return # 
 
-    msg = MIMEMultipart() # 
-    msg['From'] = from_email # 
-    msg['To'] = full_recipient_email # 
-    
     current_date_str = datetime.datetime.now().strftime('%d-%m-%Y') # 
-    current_time_str = time.strftime('%I:%M:%S %p') # 
-    msg['Subject'] = f"Relatório de Presença - Data: {current_date_str}, Hora: {current_time_str}" # 
-
-    body = f"Prezado(a),\n\nSegue em anexo o relatório de presença para {current_date_str}.\n\nAtenciosamente,\nSistema de Presença" # 
-    msg.attach(MIMEText(body, 'plain')) # 
-
-    attendance_filename_to_send = f"Attendance_{current_date_str}.csv" # 
-    attachment_path = os.path.join(ATTENDANCE_DIR, attendance_filename_to_send) # 
-
-    if not os.path.isfile(attachment_path): # 
-        messagebox.showerror(title='Erro', message=f'Arquivo de anexo "{attendance_filename_to_send}" não encontrado.', parent=window) # 
+    report = build_attendance_report(current_date_str) # 
+    if report is None: # 
+        messagebox.showerror(title='Erro', message=f'Arquivo de anexo "Attendance_{current_date_str}.csv" não encontrado.', parent=window) # 
         return # 
+    subject, body, attachment_path = report # 
 
     try:
-        with open(attachment_path, "rb") as attachment: # 
-            part = MIMEBase('application', 'octet-stream') # 
-            part.set_payload(attachment.read()) # 
-        encoders.encode_base64(part) # 
-        part.add_header('Content-Disposition', f"attachment; filename= {os.path.basename(attachment_path)}") # 
-        msg.attach(part) # 
-    except Exception as e: # 
-        messagebox.showerror(title='Erro no Anexo', message=f'Não foi possível anexar o arquivo: {e}', parent=window) # 
+        outbox.enqueue([full_recipient_email], subject, body, [attachment_path]) # Só grava na fila; o envio é em segundo plano
+    except OSError as e: # 
+        messagebox.showerror(title='Erro no Anexo', message=f'Não foi possível preparar o e-mail: {e}', parent=window) # 
         return # 
-
-    try:
-        # Configurações do servidor SMTP (exemplo para Gmail)
-        smtp_server = 'smtp.gmail.com' # 
-        smtp_port = 587 # 
-        # Adaptação para outros provedores populares (exemplo)
-        if "yahoo.com" in selected_domain.lower(): # 
-             smtp_server = 'smtp.mail.yahoo.com' # 
-        elif "hotmail.com" in selected_domain.lower() or "outlook.com" in selected_domain.lower(): # 
-              smtp_server = 'smtp.office365.com' # 
-
-
-        server = smtplib.SMTP(smtp_server, smtp_port) # 
-        server.starttls() # 
-        server.login(from_email, password) # 
-        text = msg.as_string() # 
-        server.sendmail(from_email, full_recipient_email, text) # 
-        server.quit() # 
-        messagebox.showinfo(title='Sucesso', message=f'Relatório de presença enviado para {full_recipient_email}.', parent=window) # 
-    except smtplib.SMTPAuthenticationError: # 
-        messagebox.showerror(title='Erro de E-mail', message='Erro de Autenticação SMTP. Verifique seu e-mail/senha e ' # 
-                                                           'certifique-se de que "acesso a app menos seguro" está habilitado se estiver usando Gmail com senha normal (ou use uma Senha de App).', parent=window) # 
-    except Exception as e: # 
-        print(f"Falha no envio do e-mail: {e}") # 
-        messagebox.showerror(title='Erro de E-mail', message=f'Falha ao enviar e-mail: {e}.\n' # 
-                                                           'Verifique sua conexão com a internet e configurações de e-mail.', parent=window) # 
+    set_email_status(f"Enviando relatório para {full_recipient_email}...") # 
 
 # --------------------------------------------
 
@@ -855,6 +776,8 @@ def delete_registration_csv_action(): #
                 if os.path.exists(TRAINER_FILE): # 
                     if messagebox.askyesno("Ação Adicional", "Deseja excluir também o arquivo de treinamento (Trainner.yml)?", parent=window): # 
                         os.remove(TRAINER_FILE) # 
+                        if os.path.exists(TRAINER_MANIFEST_FILE): os.remove(TRAINER_MANIFEST_FILE) # 
+                        if os.path.exists(TRAINER_BINARY_FILE): os.remove(TRAINER_BINARY_FILE) # 
                         messagebox.showinfo("Sucesso", "Arquivo de treinamento (Trainner.yml) excluído.", parent=window) # 
 
             except Exception as e: # 
@@ -866,19 +789,26 @@ def delete_today_attendance_csv_action(): #
     global window
     current_date_filename_part = datetime.datetime.now().strftime('%d-%m-%Y') # 
     file_path = os.path.join(ATTENDANCE_DIR, f"Attendance_{current_date_filename_part}.csv") # 
+    try:
+        store = get_attendance_store() # 
+        recorded_today = store.count(current_date_filename_part) # 
+    except sqlite3.Error as e: # 
+        messagebox.showerror("Erro de Arquivo", f"Não foi possível abrir o banco de presenças: {e}", parent=window) # 
+        return # 
 
-    if os.path.exists(file_path): # 
+    if os.path.exists(file_path) or recorded_today: # 
         if messagebox.askyesno("Confirmar Exclusão", # 
-                               f"Tem certeza que deseja excluir o arquivo de presença de hoje ({os.path.basename(file_path)})?", # 
+                               f"Tem certeza que deseja excluir a presença de hoje ({os.path.basename(file_path)})?", # 
                                parent=window):
             try:
-                os.remove(file_path) # 
-                messagebox.showinfo("Sucesso", "Arquivo de presença de hoje excluído.", parent=window) # 
-                populate_treeview_from_csv() # 
+                store.delete_day(current_date_filename_part) # Senão o CSV voltaria na próxima exportação
+                if os.path.exists(file_path): os.remove(file_path) # 
+                messagebox.showinfo("Sucesso", "Presença de hoje excluída.", parent=window) # 
+                populate_attendance_treeview() # 
             except Exception as e: # 
-                messagebox.showerror("Erro", f"Não foi possível excluir o arquivo: {e}", parent=window) # 
+                messagebox.showerror("Erro", f"Não foi possível excluir a presença: {e}", parent=window) # 
     else: # 
-        messagebox.showinfo("Aviso", "Arquivo de presença de hoje não encontrado.", parent=window) # 
+        messagebox.showinfo("Aviso", "Nenhuma presença registrada hoje.", parent=window) # 
 
 def delete_all_registered_images_action(): # 
     global window
@@ -891,7 +821,7 @@ def delete_all_registered_images_action(): #
         for filename in os.listdir(TRAINING_IMAGE_DIR): # 
             file_path = os.path.join(TRAINING_IMAGE_DIR, filename) # 
             try:
-                if os.path.isfile(file_path) and filename.lower().endswith(('.png', '.jpg', '.jpeg')): # 
+                if os.path.isfile(file_path) and filename.lower().endswith(('.png', '.jpg', '.jpeg', SAMPLE_ARCHIVE_EXTENSION)): # 
                     os.remove(file_path) # 
                     count_deleted += 1 # 
             except Exception as e: # 
@@ -909,6 +839,8 @@ def delete_all_registered_images_action(): #
         if os.path.exists(TRAINER_FILE): # 
             try:
                 os.remove(TRAINER_FILE) # 
+                if os.path.exists(TRAINER_MANIFEST_FILE): os.remove(TRAINER_MANIFEST_FILE) # 
+                if os.path.exists(TRAINER_BINARY_FILE): os.remove(TRAINER_BINARY_FILE) # 
                 print("Arquivo Trainner.yml excluído.") # 
                 messagebox.showinfo("Sucesso", "Arquivo de treinamento (Trainner.yml) também foi excluído.", parent=window) # 
             except Exception as e: # 
@@ -926,8 +858,9 @@ def delete_all_registered_images_action(): #
 ######################################## GUI FRONT-END SETUP ###########################################
 def setup_gui():
     global window, clock_label, id_entry, name_entry, registration_status_label, \
-           total_registrations_label, attendance_treeview, \
-           recipient_email_entry, domain_var # Adiciona as globais do email para a GUI
+           total_registrations_label, attendance_treeview, attendance_view, \
+           preview_panel, preview_title_label, preview_status_label, preview, \
+           recipient_email_entry, domain_var, email_status_label # Adiciona as globais do email para a GUI
 
     window = tk.Tk() # 
     window.geometry("1280x720") # 
@@ -1027,6 +960,8 @@ def setup_gui():
 
     send_email_button = tk.Button(email_frame, text="Enviar Relatório", command=send_email, fg="white", bg="#007bff", width=12, font=('sans-serif', 9, 'bold')) # CHAMANDO A FUNÇÃO send_email COMPLETA 
     send_email_button.grid(row=0, column=4, padx=(5,2), pady=2, sticky='e') # 
+    email_status_label = tk.Label(email_frame, text="", fg="black", bg="#DDDDDD", font=('sans-serif', 8), anchor='w') # Andamento da fila de e-mails
+    email_status_label.grid(row=1, column=0, columnspan=5, padx=2, sticky='ew') # 
     email_frame.grid_columnconfigure(1, weight=1) # 
     email_frame.grid_columnconfigure(3, weight=1) # 
     # ---------------------------------
@@ -1073,22 +1008,43 @@ def setup_gui():
     xscroll.pack(side='bottom', fill='x') # 
     attendance_treeview.pack(side='left', fill='both', expand=True) # 
 
-    populate_treeview_from_csv() # 
-
-    tk.Button(frame_attendance_actions, text="Sair do Sistema", command=window.destroy, fg="white", bg="#eb4600", # 
+    attendance_view = AttendanceView(attendance_treeview, window) # Mostra só as linhas mais recentes do dia
+    populate_attendance_treeview() # 
+    attendance_view.start() # Lê a fila de presenças com window.after
+
+    # --- PAINEL DA CÂMERA (exibido só durante a captura/reconhecimento) ---
+    preview_panel = tk.Frame(window, bg="#2d420a") # 
+    preview_title_label = tk.Label(preview_panel, text="", fg="black", bg="#00fcca", # 
+                                   font=('sans-serif', 15, 'bold'), anchor='w') # 
+    preview_title_label.pack(side="top", fill="x", pady=(0,5)) # 
+    preview_image_label = tk.Label(preview_panel, bg="#2d420a") # 
+    preview_image_label.pack(side="top", expand=True) # 
+    preview_status_label = tk.Label(preview_panel, text="", fg="white", bg="#2d420a", font=('sans-serif', 14, 'bold')) # 
+    preview_status_label.pack(side="top", pady=5) # 
+    tk.Button(preview_panel, text="Parar (Q)", command=stop_camera_session, fg="white", bg="#eb4600", # 
+              width=15, height=1, activebackground="white", font=('sans-serif', 15, 'bold')).pack(side="bottom", pady=10) # 
+    preview = TkPreview(preview_image_label, max_width=PREVIEW_MAX_WIDTH, max_fps=PREVIEW_MAX_FPS, enabled=PREVIEW_ENABLED) # 
+    window.bind('<Escape>', stop_camera_session) # 
+    window.bind('<KeyPress-q>', stop_camera_session) # 
+    window.protocol("WM_DELETE_WINDOW", quit_application) # 
+
+    tk.Button(frame_attendance_actions, text="Sair do Sistema", command=quit_application, fg="white", bg="#eb4600", # 
               width=35, height=1, activebackground="white", font=('sans-serif', 15, 'bold')).pack(side="bottom", fill="x", pady=10, padx=5) # 
 
     # --- MENUBAR (COMO ESTAVA NO SEU ARQUIVO .TXT) ---
     menubar = tk.Menu(window, relief='ridge') # 
     filemenu = tk.Menu(menubar, tearoff=0) # 
     filemenu.add_command(label='Change Password', command=open_change_password_window) # Alterado para chamar a função correta 
+    filemenu.add_command(label='Retreinar Modelo Completo', command=lambda: prompt_password_for_profile_save(full_retrain=True)) # Reconstrói o Trainner.yml do zero
     filemenu.add_command(label='Contact Us', command=contact) # 
     filemenu.add_separator() # 
-    filemenu.add_command(label='Exit', command=window.destroy) # 
+    filemenu.add_command(label='Exit', command=quit_application) # 
     menubar.add_cascade(label='Help', font=('comic', 12, ' normal '), menu=filemenu) # 
     window.configure(menu=menubar) # 
     # ---------------------------------------------
 
+    get_email_outbox() # Envia o que ficou na fila da última execução
+    window.after(EMAIL_RESULT_POLL_MS, poll_email_results) # 
     window.mainloop()
 
 ############################################# MAIN EXECUTION ###########################################
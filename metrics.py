@@ -0,0 +1,263 @@
+############################################# IMPORTING ################################################
+import csv
+import os
+import threading
+import time
+import cv2
+import numpy as np
+
+############################################# CONSTANTS ################################################
+HISTOGRAM_WINDOW = 1024 # Amostras mantidas por etapa para os percentis móveis
+METRICS_EXPORT_INTERVAL_SECONDS = 10
+METRICS_PREFIX = "biometria"
+PERCENTILES = (50, 95, 99)
+
+############################################# HISTOGRAMS ###############################################
+
+class RollingHistogram:
+    """Janela circular de amostras (pré-alocada) para percentis móveis sem alocação por quadro."""
+    __slots__ = ("values", "count", "total_count", "total_sum", "_index")
+
+    def __init__(self, window=HISTOGRAM_WINDOW):
+        self.values = np.zeros(window, dtype=np.float64)
+        self.count = 0
+        self.total_count = 0
+        self.total_sum = 0.0
+        self._index = 0
+
+    def add(self, value):
+        self.values[self._index] = value
+        self._index = (self._index + 1) % self.values.size
+        if self.count < self.values.size:
+            self.count += 1
+        self.total_count += 1
+        self.total_sum += value
+
+    def percentiles(self, percentiles=PERCENTILES):
+        if not self.count:
+            return [0.0] * len(percentiles)
+        return [float(v) for v in np.percentile(self.values[:self.count], percentiles)]
+
+    def mean(self):
+        return float(self.values[:self.count].mean()) if self.count else 0.0
+
+############################################# METRICS ##################################################
+
+class Metrics:
+    """
+    Instrumentação do loop de reconhecimento: tempo por etapa (histogramas móveis),
+    contadores e valores por quadro. Uso no loop quente:
+        t = metrics.now(); ...; t = metrics.record("detect", t)
+    """
+    enabled = True
+
+    def __init__(self, window=HISTOGRAM_WINDOW, exporters=(), export_interval=METRICS_EXPORT_INTERVAL_SECONDS):
+        self.window = window
+        self.stages = {} # nome -> RollingHistogram (segundos)
+        self.values = {} # nome -> RollingHistogram (ex.: rostos por quadro)
+        self.counters = {} # nome -> total acumulado
+        self.exporters = list(exporters)
+        self.export_interval = export_interval
+        self.started_at = time.monotonic()
+        self._frame_times = RollingHistogram(128) # Instantes dos últimos quadros, para o FPS
+        self._last_export = time.monotonic()
+        self._last_counters = {}
+        self._lock = threading.Lock()
+
+    now = staticmethod(time.perf_counter)
+
+    def record(self, stage, start):
+        """Registra a duração desde start na etapa e retorna o instante atual (início da próxima etapa)."""
+        end = time.perf_counter()
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages[stage] = RollingHistogram(self.window)
+        histogram.add(end - start)
+        return end
+
+    def observe(self, name, value):
+        histogram = self.values.get(name)
+        if histogram is None:
+            histogram = self.values[name] = RollingHistogram(self.window)
+        histogram.add(value)
+
+    def incr(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def frame_done(self):
+        """Marca o fim de um quadro (FPS) e exporta se o intervalo tiver passado."""
+        now = time.monotonic()
+        self._frame_times.add(now)
+        self.incr("frames")
+        if self.exporters and now - self._last_export >= self.export_interval:
+            self.export(now)
+
+    def fps(self):
+        count = self._frame_times.count
+        if count < 2:
+            return 0.0
+        values = self._frame_times.values
+        newest = values[(self._frame_times._index - 1) % values.size]
+        oldest = values[(self._frame_times._index - count) % values.size]
+        return (count - 1) / (newest - oldest) if newest > oldest else 0.0
+
+    def snapshot(self):
+        """Estado atual em um dicionário simples (ms para etapas, taxas por segundo para contadores)."""
+        now = time.monotonic()
+        with self._lock:
+            elapsed = max(now - self._last_export, 1e-9)
+            rates = {name: (total - self._last_counters.get(name, 0)) / elapsed for name, total in self.counters.items()}
+        stages = {}
+        for stage, histogram in self.stages.items():
+            p50, p95, p99 = histogram.percentiles()
+            stages[stage] = {"mean_ms": histogram.mean() * 1000.0, "p50_ms": p50 * 1000.0,
+                             "p95_ms": p95 * 1000.0, "p99_ms": p99 * 1000.0, "count": histogram.total_count}
+        values = {name: {"mean": h.mean(), "p95": h.percentiles((95,))[0]} for name, h in self.values.items()}
+        return {"timestamp": time.time(), "uptime_s": now - self.started_at, "fps": self.fps(),
+                "stages": stages, "values": values, "counters": dict(self.counters), "rates": rates}
+
+    def export(self, now=None):
+        snapshot = self.snapshot()
+        for exporter in self.exporters:
+            try:
+                exporter.write(snapshot)
+            except OSError as e:
+                print(f"Aviso: Falha ao exportar métricas para {exporter.path}: {e}")
+        with self._lock:
+            self._last_export = time.monotonic() if now is None else now
+            self._last_counters = dict(self.counters)
+
+
+class NullMetrics:
+    """Substituto sem custo quando a instrumentação está desligada."""
+    enabled = False
+
+    @staticmethod
+    def now():
+        return 0.0
+
+    def record(self, stage, start):
+        return 0.0
+
+    def observe(self, name, value):
+        pass
+
+    def incr(self, name, amount=1):
+        pass
+
+    def frame_done(self):
+        pass
+
+    def export(self, now=None):
+        pass
+
+
+NULL_METRICS = NullMetrics()
+
+############################################# EXPORTERS ################################################
+
+class PrometheusTextExporter:
+    """Grava as métricas no formato texto do Prometheus (para o textfile collector do node_exporter)."""
+
+    def __init__(self, path, prefix=METRICS_PREFIX):
+        self.path = path
+        self.prefix = prefix
+
+    def write(self, snapshot):
+        p = self.prefix
+        lines = [f"# TYPE {p}_fps gauge", f"{p}_fps {snapshot['fps']:.3f}",
+                 f"# TYPE {p}_stage_seconds summary"]
+        for stage, data in sorted(snapshot["stages"].items()):
+            for quantile, key in (("0.5", "p50_ms"), ("0.95", "p95_ms"), ("0.99", "p99_ms")):
+                lines.append(f'{p}_stage_seconds{{stage="{stage}",quantile="{quantile}"}} {data[key] / 1000.0:.6f}')
+            lines.append(f'{p}_stage_seconds_count{{stage="{stage}"}} {data["count"]}')
+        for name, data in sorted(snapshot["values"].items()):
+            lines.append(f"# TYPE {p}_{name} gauge")
+            lines.append(f"{p}_{name} {data['mean']:.4f}")
+        for name, total in sorted(snapshot["counters"].items()):
+            lines.append(f"# TYPE {p}_{name}_total counter")
+            lines.append(f"{p}_{name}_total {total}")
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as out_file:
+            out_file.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, self.path)
+
+
+class CsvMetricsExporter:
+    """
+    Acrescenta uma linha por exportação: FPS, p50/p95 de cada etapa e taxas dos contadores.
+    Etapas e contadores surgem ao longo da sessão (predict, lookup, door_opens...): quando uma
+    linha traz colunas que o cabeçalho não tem, o arquivo é regravado com o cabeçalho ampliado
+    e as células ausentes ficam vazias, então cada valor continua sob a sua coluna.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.fieldnames = None # Cabeçalho atual do arquivo (lido na primeira exportação)
+
+    def _read_header(self):
+        try:
+            with open(self.path, newline='', encoding='utf-8') as csv_file:
+                return next(csv.reader(csv_file), None)
+        except FileNotFoundError:
+            return None
+
+    def _rewrite(self, fieldnames, row):
+        rows = []
+        if self.fieldnames:
+            with open(self.path, newline='', encoding='utf-8') as csv_file:
+                rows = list(csv.DictReader(csv_file))
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', newline='', encoding='utf-8') as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=fieldnames, restval='')
+            writer.writeheader()
+            writer.writerows(rows)
+            writer.writerow(row)
+        os.replace(tmp_path, self.path)
+        self.fieldnames = fieldnames
+
+    def write(self, snapshot):
+        row = {"timestamp": time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(snapshot["timestamp"])),
+               "fps": round(snapshot["fps"], 2)}
+        for stage, data in sorted(snapshot["stages"].items()):
+            row[f"{stage}_p50_ms"] = round(data["p50_ms"], 3)
+            row[f"{stage}_p95_ms"] = round(data["p95_ms"], 3)
+        for name, data in sorted(snapshot["values"].items()):
+            row[name] = round(data["mean"], 3)
+        for name, rate in sorted(snapshot["rates"].items()):
+            row[f"{name}_per_s"] = round(rate, 3)
+        if self.fieldnames is None:
+            self.fieldnames = self._read_header()
+        new_columns = [name for name in row if name not in (self.fieldnames or ())]
+        if new_columns or not self.fieldnames:
+            self._rewrite((self.fieldnames or []) + new_columns, row)
+            return
+        with open(self.path, 'a', newline='', encoding='utf-8') as csv_file:
+            csv.DictWriter(csv_file, fieldnames=self.fieldnames, restval='').writerow(row)
+
+
+def create_metrics(enabled, export_file=None, export_interval=METRICS_EXPORT_INTERVAL_SECONDS):
+    """Cria Metrics (ou NullMetrics se desligado). O exportador é escolhido pela extensão: .csv ou Prometheus."""
+    if not enabled:
+        return NULL_METRICS
+    exporters = []
+    if export_file:
+        exporters.append(CsvMetricsExporter(export_file) if export_file.lower().endswith('.csv')
+                         else PrometheusTextExporter(export_file))
+    return Metrics(exporters=exporters, export_interval=export_interval)
+
+############################################# OVERLAY ##################################################
+
+def draw_metrics_overlay(frame, metrics, stages=("detect", "predict", "frame")):
+    """Escreve FPS e p50/p95 das etapas principais no canto superior esquerdo do quadro."""
+    if not metrics.enabled:
+        return frame
+    lines = [f"FPS: {metrics.fps():.1f}"]
+    for stage in stages:
+        histogram = metrics.stages.get(stage)
+        if histogram is not None and histogram.count:
+            p50, p95 = histogram.percentiles((50, 95))
+            lines.append(f"{stage}: {p50 * 1000.0:.1f}/{p95 * 1000.0:.1f} ms")
+    for i, text in enumerate(lines):
+        cv2.putText(frame, text, (10, 20 + i * 18), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 1)
+    return frame
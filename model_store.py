@@ -0,0 +1,195 @@
+############################################# IMPORTING ################################################
+import os
+import struct
+import sys
+import threading
+import time
+import cv2
+import numpy as np
+
+############################################# CONSTANTS ################################################
+BINARY_MODEL_MAGIC = b"LBPHBIN\0"
+BINARY_MODEL_VERSION = 1
+BINARY_MODEL_EXTENSION = ".lbph"
+# Cabeçalho: magic, versão, raio, vizinhos, grid_x, grid_y, limiar, amostras, bins
+HEADER_FORMAT = "<8sIiiiidQQ"
+HEADER_SIZE = 64 # Cabeçalho preenchido até 64 bytes; os blocos seguintes começam alinhados
+YAML_ROOT_NODE = "opencv_lbphfaces"
+
+############################################# EXCEPTIONS ###############################################
+
+class ModelFormatError(Exception):
+    """Arquivo de modelo ausente, corrompido ou de versão incompatível."""
+
+############################################# MODEL ####################################################
+
+class BinaryModel:
+    """
+    Modelo LBPH em formato binário: parâmetros, rótulos (int32) e histogramas (float32, amostras x bins).
+    Lido com np.memmap, a abertura só lê o cabeçalho; as páginas dos histogramas vêm do disco
+    (ou do cache do sistema) à medida que a busca as usa.
+    """
+
+    def __init__(self, histograms, labels, radius, neighbors, grid_x, grid_y, threshold, path=None):
+        self.histograms = histograms
+        self.labels = labels
+        self.radius = radius
+        self.neighbors = neighbors
+        self.grid_x = grid_x
+        self.grid_y = grid_y
+        self.threshold = threshold
+        self.path = path
+
+    def __len__(self):
+        return len(self.labels)
+
+
+def binary_model_path(trainer_file):
+    """Trainner.yml -> Trainner.lbph, na mesma pasta."""
+    return os.path.splitext(trainer_file)[0] + BINARY_MODEL_EXTENSION
+
+
+def _aligned(offset, alignment=HEADER_SIZE):
+    return (offset + alignment - 1) // alignment * alignment
+
+
+def save_binary_model(path, histograms, labels, radius, neighbors, grid_x, grid_y, threshold):
+    """Grava o modelo binário (arquivo temporário + os.replace, quem lê nunca vê um arquivo pela metade)."""
+    histograms = np.ascontiguousarray(histograms, dtype=np.float32)
+    labels = np.ascontiguousarray(labels, dtype=np.int32).ravel()
+    if histograms.ndim != 2 or histograms.shape[0] != labels.size:
+        raise ValueError("Histogramas e rótulos com quantidades diferentes.")
+    count, bins = histograms.shape
+    header = struct.pack(HEADER_FORMAT, BINARY_MODEL_MAGIC, BINARY_MODEL_VERSION, radius, neighbors,
+                         grid_x, grid_y, float(threshold), count, bins)
+    histograms_offset = _aligned(HEADER_SIZE + labels.nbytes)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp" # Treino e motor podem gravar ao mesmo tempo
+    with open(tmp_path, 'wb') as model_file:
+        model_file.write(header.ljust(HEADER_SIZE, b"\0"))
+        model_file.write(labels.tobytes())
+        model_file.write(b"\0" * (histograms_offset - HEADER_SIZE - labels.nbytes))
+        model_file.write(histograms.tobytes())
+    os.replace(tmp_path, path)
+
+
+def load_binary_model(path, mmap=True):
+    """Abre um modelo binário. Com mmap=False os histogramas são lidos inteiros para a memória."""
+    try:
+        with open(path, 'rb') as model_file:
+            header = model_file.read(HEADER_SIZE)
+    except OSError as e:
+        raise ModelFormatError(f"Não foi possível abrir {os.path.basename(path)}: {e}")
+    if len(header) < HEADER_SIZE:
+        raise ModelFormatError(f"{os.path.basename(path)} está truncado.")
+    magic, version, radius, neighbors, grid_x, grid_y, threshold, count, bins = \
+        struct.unpack_from(HEADER_FORMAT, header)
+    if magic != BINARY_MODEL_MAGIC:
+        raise ModelFormatError(f"{os.path.basename(path)} não é um modelo binário LBPH.")
+    if version != BINARY_MODEL_VERSION:
+        raise ModelFormatError(f"{os.path.basename(path)} tem versão {version}; esperada {BINARY_MODEL_VERSION}.")
+    histograms_offset = _aligned(HEADER_SIZE + count * 4)
+    if os.path.getsize(path) < histograms_offset + count * bins * 4:
+        raise ModelFormatError(f"{os.path.basename(path)} está truncado.")
+    if mmap and count:
+        labels = np.memmap(path, dtype=np.int32, mode='r', offset=HEADER_SIZE, shape=(count,))
+        histograms = np.memmap(path, dtype=np.float32, mode='r', offset=histograms_offset, shape=(count, bins))
+    else:
+        with open(path, 'rb') as model_file:
+            model_file.seek(HEADER_SIZE)
+            labels = np.fromfile(model_file, dtype=np.int32, count=count)
+            model_file.seek(histograms_offset)
+            histograms = np.fromfile(model_file, dtype=np.float32, count=count * bins).reshape(count, bins)
+    return BinaryModel(histograms, labels, radius, neighbors, grid_x, grid_y, threshold, path)
+
+
+def save_recognizer_binary(recognizer, path):
+    """Grava um LBPHFaceRecognizer já treinado no formato binário."""
+    histograms = recognizer.getHistograms()
+    bins = recognizer.getGridX() * recognizer.getGridY() * (1 << recognizer.getNeighbors())
+    matrix = np.vstack([np.asarray(h, dtype=np.float32).reshape(1, -1) for h in histograms]) if histograms \
+        else np.zeros((0, bins), dtype=np.float32)
+    save_binary_model(path, matrix, np.asarray(recognizer.getLabels(), dtype=np.int32).ravel(),
+                      recognizer.getRadius(), recognizer.getNeighbors(), recognizer.getGridX(),
+                      recognizer.getGridY(), recognizer.getThreshold())
+
+############################################# CONVERSION ###############################################
+
+def convert_yaml_model(trainer_file, output_file=None):
+    """
+    Converte um Trainner.yml existente para o formato binário, lendo o YAML com cv2.FileStorage
+    (sem criar o reconhecedor). Retorna o caminho gravado.
+    """
+    output_file = output_file or binary_model_path(trainer_file)
+    storage = cv2.FileStorage(trainer_file, cv2.FILE_STORAGE_READ)
+    if not storage.isOpened():
+        raise ModelFormatError(f"Não foi possível abrir {os.path.basename(trainer_file)}.")
+    try:
+        root = storage.getNode(YAML_ROOT_NODE)
+        if root.empty():
+            root = storage.root() # Modelos gravados sem o nó raiz nomeado
+        params = {name: root.getNode(name) for name in ("radius", "neighbors", "grid_x", "grid_y", "threshold")}
+        if any(node.empty() for node in params.values()):
+            raise ModelFormatError(f"{os.path.basename(trainer_file)} não é um modelo LBPH.")
+        radius, neighbors = int(params["radius"].real()), int(params["neighbors"].real())
+        grid_x, grid_y = int(params["grid_x"].real()), int(params["grid_y"].real())
+        threshold = params["threshold"].real()
+        histograms_node = root.getNode("histograms")
+        rows = [histograms_node.at(i).mat().reshape(1, -1) for i in range(histograms_node.size())]
+        labels = root.getNode("labels").mat()
+    finally:
+        storage.release() # Os nós deixam de ser válidos depois disso
+    bins = grid_x * grid_y * (1 << neighbors)
+    histograms = np.vstack(rows).astype(np.float32) if rows else np.zeros((0, bins), dtype=np.float32)
+    labels = np.zeros(0, dtype=np.int32) if labels is None else labels.astype(np.int32).ravel()
+    save_binary_model(output_file, histograms, labels, radius, neighbors, grid_x, grid_y, threshold)
+    return output_file
+
+############################################# BENCHMARK ################################################
+
+def benchmark_load(trainer_file, binary_file=None):
+    """
+    Mede o tempo até o primeiro predict: recognizer.read do YAML + predict do LBPH
+    contra abertura do binário (mmap) + predict da galeria vetorizada.
+    """
+    from face_gallery import LBPHGallery
+    binary_file = binary_file or binary_model_path(trainer_file)
+    if not os.path.isfile(binary_file):
+        start = time.perf_counter()
+        convert_yaml_model(trainer_file, binary_file)
+        print(f"Conversão: {time.perf_counter() - start:.3f}s")
+    probe = np.random.default_rng(0).integers(0, 256, (120, 120), dtype=np.uint8)
+
+    start = time.perf_counter()
+    recognizer = cv2.face.LBPHFaceRecognizer_create()
+    recognizer.read(trainer_file)
+    yaml_load = time.perf_counter() - start
+    expected = recognizer.predict(probe)
+    yaml_first = time.perf_counter() - start
+    del recognizer
+
+    start = time.perf_counter()
+    model = load_binary_model(binary_file)
+    binary_open = time.perf_counter() - start
+    gallery = LBPHGallery.from_binary_model(model)
+    predicted = gallery.predict(probe)
+    binary_first = time.perf_counter() - start
+
+    print(f"{len(model)} amostras | YAML: {os.path.getsize(trainer_file) / 1e6:.1f} MB, "
+          f"binário: {os.path.getsize(binary_file) / 1e6:.1f} MB")
+    print(f"YAML   (recognizer.read): leitura {yaml_load:.3f}s | até o 1º predict {yaml_first:.3f}s")
+    print(f"Binário (mmap + galeria): abertura {binary_open * 1000.0:.2f}ms | até o 1º predict {binary_first:.3f}s")
+    print(f"Mesmo resultado: {expected[0] == predicted[0]} ({expected} / {predicted})")
+
+
+if __name__ == "__main__":
+    # Uso: python model_store.py convert <Trainner.yml> [saida.lbph]
+    #      python model_store.py bench <Trainner.yml> [modelo.lbph]
+    if len(sys.argv) < 3 or sys.argv[1] not in ("convert", "bench"):
+        print("Uso: python model_store.py convert|bench <Trainner.yml> [modelo.lbph]")
+        sys.exit(1)
+    output = sys.argv[3] if len(sys.argv) > 3 else None
+    if sys.argv[1] == "convert":
+        start = time.perf_counter()
+        print(f"Gravado {convert_yaml_model(sys.argv[2], output)} em {time.perf_counter() - start:.2f}s")
+    else:
+        benchmark_load(sys.argv[2], output)
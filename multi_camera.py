@@ -0,0 +1,292 @@
+############################################# IMPORTING ################################################
+import argparse
+import heapq
+import itertools
+import multiprocessing as mp
+import os
+import queue
+import sys
+import time
+import cv2
+
+from attendance_store import AttendanceStore, AttendanceWriter, ATTENDANCE_DB_FILENAME
+from door_controller import DoorController
+from frame_sources import ThreadedFrameReader
+from recognition_engine import (RecognitionEngine, EngineError, load_recognizer, DEFAULT_TRAINER_FILE,
+                                DEFAULT_STUDENT_DETAILS_CSV, RECOGNIZER_BACKEND)
+
+############################################# CONSTANTS ################################################
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ATTENDANCE_DIR = os.path.join(BASE_DIR, "Attendance")
+ATTENDANCE_DB_FILE = os.path.join(ATTENDANCE_DIR, ATTENDANCE_DB_FILENAME) # Mesmo banco da interface gráfica
+EVENT_REORDER_WINDOW_SECONDS = 0.25 # Tempo que um evento espera para ser ordenado com os das outras câmeras
+DOOR_EVENT_MIN_INTERVAL_SECONDS = 0.5 # Eventos de porta por câmera são agrupados neste intervalo
+WORKER_STOP_TIMEOUT_SECONDS = 5.0
+
+EVENT_RECOGNITION = "recognition"
+EVENT_DOOR = "door"
+EVENT_ATTENDANCE = "attendance"
+EVENT_ERROR = "error"
+EVENT_STOPPED = "stopped"
+
+# Modelo carregado uma única vez no processo principal. Com o método "fork" os workers herdam
+# o mesmo objeto (cópia sob demanda); com "spawn" (Windows) cada worker precisa ler o arquivo.
+_SHARED_RECOGNIZER = None
+
+############################################# EVENTS ###################################################
+
+class CameraConfig:
+    """Uma entrada monitorada: nome da câmera, fonte de quadros e porta associada."""
+    __slots__ = ("name", "source", "door")
+
+    def __init__(self, name, source, door=None):
+        self.name = name
+        self.source = source
+        self.door = door
+
+    @classmethod
+    def parse(cls, spec):
+        """'nome=fonte[@porta]', ex.: 'entrada=0@porta1' ou 'fundos=gravacao.mp4'."""
+        name, _, rest = spec.partition("=")
+        if not rest:
+            raise ValueError(f"Câmera inválida: {spec!r}. Use nome=fonte[@porta].")
+        source, _, door = rest.rpartition("@") if "@" in rest else (rest, "", "")
+        return cls(name.strip(), source.strip(), door.strip() or None)
+
+
+class CameraEvent:
+    """Evento vindo de um worker. Ordenado por (timestamp, câmera, sequência)."""
+    __slots__ = ("timestamp", "camera", "seq", "kind", "door", "data")
+
+    def __init__(self, timestamp, camera, seq, kind, door=None, data=None):
+        self.timestamp = timestamp
+        self.camera = camera
+        self.seq = seq
+        self.kind = kind
+        self.door = door
+        self.data = data or {}
+
+    def sort_key(self):
+        return (self.timestamp, self.camera, self.seq)
+
+    def __lt__(self, other):
+        return self.sort_key() < other.sort_key()
+
+    def __repr__(self):
+        return f"CameraEvent({self.timestamp:.3f}, {self.camera!r}, {self.kind!r}, door={self.door!r}, {self.data})"
+
+############################################# WORKER ###################################################
+
+def _camera_worker(config, engine_kwargs, trainer_file, event_queue, stop_event):
+    """Processo de uma câmera: captura, reconhecimento e envio dos eventos para o processo principal."""
+    cv2.setNumThreads(1) # O paralelismo vem dos processos; evita disputa entre os pools internos do OpenCV
+    seq = itertools.count()
+    last_door_event = {"t": 0.0}
+
+    def emit(kind, **data):
+        event_queue.put(CameraEvent(time.time(), config.name, next(seq), kind, config.door, data))
+
+    def on_recognition(result):
+        emit(EVENT_RECOGNITION, student_id=result.student_id, name=result.name,
+             confidence=result.confidence, track_id=result.track_id)
+
+    def on_door(result):
+        now = time.monotonic()
+        if now - last_door_event["t"] >= DOOR_EVENT_MIN_INTERVAL_SECONDS:
+            last_door_event["t"] = now
+            emit(EVENT_DOOR, student_id=result.student_id, name=result.name)
+
+    def on_attendance(student_id, name, date_str, time_str):
+        emit(EVENT_ATTENDANCE, student_id=student_id, name=name, date=date_str, time=time_str)
+
+    engine = RecognitionEngine(trainer_file=trainer_file, on_recognition=on_recognition, on_door=on_door,
+                               on_attendance=on_attendance, **engine_kwargs)
+    try:
+        engine.load(recognizer=_SHARED_RECOGNIZER)
+    except EngineError as e:
+        emit(EVENT_ERROR, title=e.title, message=e.message)
+        emit(EVENT_STOPPED, frames=0)
+        return
+
+    reader = ThreadedFrameReader(config.source)
+    if not reader.start():
+        emit(EVENT_ERROR, title="Erro de Câmera", message=f"Não foi possível abrir a fonte {config.source}.")
+        emit(EVENT_STOPPED, frames=0)
+        return
+    try:
+        while not stop_event.is_set():
+            ret, frame = reader.read()
+            if not ret:
+                break
+            engine.process_frame(frame)
+    except Exception as e:
+        emit(EVENT_ERROR, title="Erro no Reconhecimento", message=str(e))
+    finally:
+        reader.stop()
+        emit(EVENT_STOPPED, frames=engine.frames_processed)
+
+############################################# SUPERVISOR ###############################################
+
+class MultiCameraSupervisor:
+    """
+    Inicia um processo de reconhecimento por câmera e junta os eventos em um único fluxo
+    ordenado por horário. O modelo é lido uma vez aqui e compartilhado com os workers.
+    Presenças são deduplicadas entre câmeras (a mesma pessoa em duas entradas conta uma vez) e,
+    com attendance_writer (AttendanceWriter), gravadas no banco assim que são liberadas.
+    Um worker que morre sem enviar EVENT_STOPPED é detectado pelo exitcode do processo.
+    """
+
+    def __init__(self, cameras, trainer_file=DEFAULT_TRAINER_FILE, engine_kwargs=None, start_method=None,
+                 attendance_writer=None):
+        if not cameras:
+            raise ValueError("Nenhuma câmera configurada.")
+        names = [camera.name for camera in cameras]
+        if len(set(names)) != len(names):
+            raise ValueError("Os nomes das câmeras devem ser únicos.")
+        self.cameras = list(cameras)
+        self.trainer_file = trainer_file
+        self.engine_kwargs = dict(engine_kwargs or {})
+        self.attendance_writer = attendance_writer
+        if start_method is None:
+            start_method = "fork" if "fork" in mp.get_all_start_methods() else "spawn"
+        self.context = mp.get_context(start_method)
+        self.event_queue = self.context.Queue()
+        self.stop_event = self.context.Event()
+        self.processes = {}
+        self.recognized_today_session = {} # (student_id, date_str) -> (time_str, câmera)
+        self._pending = [] # heap de eventos aguardando a janela de ordenação
+        self._running = set()
+
+    def start(self):
+        global _SHARED_RECOGNIZER
+        if self.context.get_start_method() == "fork":
+            _SHARED_RECOGNIZER = load_recognizer(self.trainer_file, self.engine_kwargs.get("backend", RECOGNIZER_BACKEND)) # Lido uma única vez para todos os workers
+        for camera in self.cameras:
+            process = self.context.Process(target=_camera_worker, name=f"Camera-{camera.name}",
+                                           args=(camera, self.engine_kwargs, self.trainer_file,
+                                                 self.event_queue, self.stop_event),
+                                           daemon=True)
+            process.start()
+            self.processes[camera.name] = process
+            self._running.add(camera.name)
+        return self
+
+    @property
+    def running(self):
+        return bool(self._running) or bool(self._pending)
+
+    def poll(self, timeout=0.1):
+        """Retorna os eventos já liberados pela janela de ordenação, em ordem de horário."""
+        # Verificado antes de esvaziar a fila: o que um processo já encerrado enviou está na fila
+        exited = [name for name in self._running if not self.processes[name].is_alive()]
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            try:
+                event = self.event_queue.get(timeout=max(remaining, 0.0)) if remaining > 0 else self.event_queue.get_nowait()
+            except queue.Empty:
+                break
+            if event.kind == EVENT_STOPPED:
+                self._running.discard(event.camera)
+            heapq.heappush(self._pending, event)
+        for name in exited:
+            if name in self._running: # Morreu sem avisar (falha nativa, kill, falta de memória)
+                self._running.discard(name)
+                camera = next(camera for camera in self.cameras if camera.name == name)
+                message = f"O processo da câmera terminou inesperadamente (código {self.processes[name].exitcode})."
+                heapq.heappush(self._pending, CameraEvent(time.time(), name, -1, EVENT_ERROR, camera.door,
+                                                          {"title": "Câmera Encerrada", "message": message}))
+
+        # Sem câmeras ativas não há mais o que esperar: libera tudo
+        horizon = time.time() - EVENT_REORDER_WINDOW_SECONDS if self._running else float("inf")
+        ready = []
+        while self._pending and self._pending[0].timestamp <= horizon:
+            event = heapq.heappop(self._pending)
+            if event.kind == EVENT_ATTENDANCE:
+                key = (event.data["student_id"], event.data["date"])
+                if key in self.recognized_today_session:
+                    continue
+                self.recognized_today_session[key] = (event.data["time"], event.camera)
+                if self.attendance_writer is not None:
+                    self.attendance_writer.submit(event.data["student_id"], event.data["name"], event.data["date"],
+                                                  event.data["time"], timestamp=event.timestamp, camera=event.camera)
+            ready.append(event)
+        return ready
+
+    def stop(self):
+        self.stop_event.set()
+        for process in self.processes.values():
+            process.join(timeout=WORKER_STOP_TIMEOUT_SECONDS)
+            if process.is_alive():
+                process.terminate()
+        self._running.clear()
+        return self.poll(timeout=0.0)
+
+############################################# CLI ######################################################
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reconhecimento em várias câmeras, um processo por câmera.")
+    parser.add_argument("--camera", action="append", required=True,
+                        help="nome=fonte[@porta], pode ser repetido. Ex.: entrada=0@porta1")
+    parser.add_argument("--door", action="append", default=[],
+                        help="porta=serial, pode ser repetido. Ex.: porta1=COM7 (ou porta1=mock para simular)")
+    parser.add_argument("--duration", type=float, default=None, help="Encerra após N segundos")
+    parser.add_argument("--trainer", default=DEFAULT_TRAINER_FILE)
+    parser.add_argument("--students", default=DEFAULT_STUDENT_DETAILS_CSV)
+    parser.add_argument("--db", default=ATTENDANCE_DB_FILE,
+                        help="Banco de presenças; os Attendance_*.csv são exportados na mesma pasta ao final")
+    args = parser.parse_args(argv)
+
+    cameras = [CameraConfig.parse(spec) for spec in args.camera]
+    door_ports = {}
+    for spec in args.door:
+        door_name, _, port = spec.partition("=")
+        if not port:
+            parser.error(f"Porta inválida: {spec!r}. Use porta=serial.")
+        door_ports[door_name.strip()] = port.strip()
+    attendance_dir = os.path.dirname(os.path.abspath(args.db))
+    os.makedirs(attendance_dir, exist_ok=True)
+    store = AttendanceStore(args.db)
+    writer = AttendanceWriter(store)
+    supervisor = MultiCameraSupervisor(cameras, trainer_file=args.trainer,
+                                       engine_kwargs={"student_csv": args.students}, attendance_writer=writer)
+    try:
+        supervisor.start()
+    except EngineError as e:
+        print(f"{e.title}: {e.message}")
+        writer.close()
+        store.close()
+        return 1
+    # Um controlador por porta; todos compartilham o mesmo agendador de fechamento automático
+    doors = {name: DoorController(port, name=name).start() for name, port in door_ports.items()}
+    started = time.monotonic()
+    try:
+        while supervisor.running:
+            for event in supervisor.poll(timeout=0.2):
+                stamp = time.strftime('%H:%M:%S', time.localtime(event.timestamp))
+                print(f"[{stamp}] {event.camera:<10} {event.kind:<11} porta={event.door or '-'} {event.data}")
+                if event.kind == EVENT_DOOR and event.door in doors:
+                    doors[event.door].open()
+            if args.duration is not None and time.monotonic() - started >= args.duration:
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for event in supervisor.stop():
+            print(f"{event.camera:<10} {event.kind:<11} {event.data}")
+        for door in doors.values():
+            door.stop()
+        written = writer.close()
+        for att_date in sorted(writer.dates):
+            try:
+                store.export_csv(att_date, attendance_dir) # Attendance_dd-mm-AAAA.csv continua disponível
+            except OSError as e:
+                print(f"Aviso: Não foi possível exportar as presenças de {att_date}: {e}")
+        store.close()
+    print(f"{len(supervisor.recognized_today_session)} presença(s) registrada(s) em {len(cameras)} câmera(s), "
+          f"{written} nova(s) gravada(s) em {os.path.basename(args.db)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
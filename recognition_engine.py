@@ -0,0 +1,428 @@
+############################################# IMPORTING ################################################
+import argparse
+import datetime
+import os
+import sys
+import threading
+import time
+import cv2
+
+from face_detection import FaceDetector, DETECTION_DOWNSCALE, DETECTION_MIN_FACE_PX
+from face_gallery import LBPHGallery
+from model_store import ModelFormatError, binary_model_path, load_binary_model, save_recognizer_binary
+from face_tracking import (FaceTracker, RecognitionVoter, Track, DETECT_EVERY_N_FRAMES, REDETECT_POLICY,
+                           RECOGNITION_VOTES_REQUIRED, RECOGNITION_MAJORITY_RATIO, RECOGNITION_REVERIFY_SECONDS,
+                           RECOGNITION_UNKNOWN_REVERIFY_SECONDS)
+from metrics import NULL_METRICS, create_metrics
+from sample_archive import normalize_crop, SAMPLE_CROP_SIZE
+from student_registry import StudentRegistry
+
+############################################# CONSTANTS ################################################
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_TRAINER_FILE = os.path.join(BASE_DIR, "TrainingImageLabel", "Trainner.yml")
+DEFAULT_HAARCASCADE_FILE = os.path.join(BASE_DIR, "haarcascade_frontalface_default.xml")
+DEFAULT_STUDENT_DETAILS_CSV = os.path.join(BASE_DIR, "StudentDetails", "StudentDetails.csv")
+RECOGNITION_CONFIDENCE_THRESHOLD = 65 # Limiar de confiança para reconhecimento facial (menor é melhor)
+RECOGNIZER_BACKEND = "gallery" # "gallery" (Trainner.lbph por mmap, busca vetorizada em lote, mesmos rótulos) ou "lbph" (predict do OpenCV)
+MODEL_RELOAD_CHECK_SECONDS = 2.0 # Intervalo entre verificações de um Trainner.yml novo durante a sessão
+QUERY_CROP_SIZE = SAMPLE_CROP_SIZE # Rostos vão ao predict no tamanho das amostras treinadas (.samples); None = recorte bruto
+
+STATUS_RECOGNIZED = "recognized" # Rosto conhecido e cadastrado
+STATUS_UNREGISTERED = "unregistered" # Rosto conhecido pelo modelo, mas sem cadastro no CSV
+STATUS_UNKNOWN = "unknown" # Desconhecido
+STATUS_VERIFYING = "verifying" # Ainda acumulando votos
+
+############################################# RESULTS ##################################################
+
+class EngineError(Exception):
+    """Erro ao carregar o motor de reconhecimento, com título e mensagem prontos para exibição."""
+
+    def __init__(self, title, message):
+        super().__init__(message)
+        self.title = title
+        self.message = message
+
+
+class FaceResult:
+    """Resultado do reconhecimento de um rosto em um quadro."""
+    __slots__ = ("track_id", "box", "status", "serial_no", "student_id", "name", "confidence")
+
+    def __init__(self, track_id, box, status, serial_no=None, student_id=None, name=None, confidence=None):
+        self.track_id = track_id
+        self.box = box
+        self.status = status
+        self.serial_no = serial_no
+        self.student_id = student_id
+        self.name = name
+        self.confidence = confidence
+
+    @property
+    def recognized(self):
+        return self.status == STATUS_RECOGNIZED
+
+    def display_texts(self):
+        """Textos (nome/ID) exibidos sobre o rosto, iguais aos da tela de reconhecimento."""
+        if self.status == STATUS_RECOGNIZED:
+            return self.name, self.student_id
+        if self.status == STATUS_UNREGISTERED:
+            return "Face Conhecida, ID não Cadastrado", f"Serial: {self.serial_no}"
+        if self.status == STATUS_VERIFYING:
+            return "Verificando...", "N/A"
+        return "Desconhecido", "N/A"
+
+    def __repr__(self):
+        return f"FaceResult({self.track_id}, {self.status}, {self.student_id!r}, {self.name!r}, {self.confidence})"
+
+############################################# ENGINE ###################################################
+
+def load_recognizer(trainer_file, backend=RECOGNIZER_BACKEND):
+    """
+    Carrega o modelo em uma LBPHGallery (padrão) ou, com backend="lbph", em um LBPHFaceRecognizer.
+    A galeria abre por mmap a cópia binária (Trainner.lbph) quando ela não é mais antiga que o
+    YAML; senão lê o YAML e grava a cópia binária para as próximas sessões. O LBPHFaceRecognizer
+    não aceita histogramas prontos, então o backend "lbph" sempre lê o YAML.
+    Levanta EngineError se o arquivo for inválido.
+    """
+    if not os.path.isfile(trainer_file):
+        raise EngineError('Arquivo de Treinamento Ausente',
+                          f'{os.path.basename(trainer_file)} não encontrado. Por favor, Salve um Perfil primeiro.')
+    binary_file = binary_model_path(trainer_file)
+    if backend == "gallery" and os.path.isfile(binary_file) \
+            and os.path.getmtime(binary_file) >= os.path.getmtime(trainer_file):
+        try:
+            return LBPHGallery.from_binary_model(load_binary_model(binary_file))
+        except ModelFormatError as e:
+            print(f"Aviso: {e} Lendo {os.path.basename(trainer_file)}.")
+    recognizer = cv2.face.LBPHFaceRecognizer_create()
+    try:
+        recognizer.read(trainer_file)
+    except cv2.error as e:
+        raise EngineError('Erro no Modelo', f'Não foi possível ler {os.path.basename(trainer_file)}: {e}')
+    if backend == "gallery":
+        try:
+            save_recognizer_binary(recognizer, binary_file)
+        except (OSError, ValueError) as e:
+            print(f"Aviso: Não foi possível gravar {os.path.basename(binary_file)}: {e}")
+        return LBPHGallery.from_recognizer(recognizer)
+    return recognizer
+
+class RecognitionEngine:
+    """
+    Pipeline de reconhecimento sem interface: detecção, rastreamento, predict com votação
+    e mapeamento para o cadastro. Não usa Tkinter, janelas do OpenCV nem a porta serial;
+    quem usa o motor reage aos eventos:
+      on_recognition(result)                            - identidade confirmada para um rastro;
+      on_door(result)                                   - a cada quadro com acesso concedido;
+      on_attendance(student_id, name, date_str, time_str) - primeira presença do dia na sessão.
+    Com hot_reload, um Trainner.yml novo (ex.: após "Salvar Perfil") é lido em uma thread
+    e trocado entre dois quadros, sem parar a câmera nem a sessão.
+    query_crop_size redimensiona cada rosto como as amostras dos arquivos .samples antes do
+    predict (texturas LBP na mesma escala do treino); None mantém o recorte da detecção,
+    para modelos treinados só com os JPGs antigos.
+    """
+
+    def __init__(self, trainer_file=DEFAULT_TRAINER_FILE, cascade_file=DEFAULT_HAARCASCADE_FILE,
+                 student_csv=DEFAULT_STUDENT_DETAILS_CSV, registry=None,
+                 confidence_threshold=RECOGNITION_CONFIDENCE_THRESHOLD, tracking=True,
+                 detect_every_n=DETECT_EVERY_N_FRAMES, redetect_policy=REDETECT_POLICY,
+                 downscale=DETECTION_DOWNSCALE, votes_required=RECOGNITION_VOTES_REQUIRED,
+                 majority_ratio=RECOGNITION_MAJORITY_RATIO, reverify_seconds=RECOGNITION_REVERIFY_SECONDS,
+                 unknown_reverify_seconds=RECOGNITION_UNKNOWN_REVERIFY_SECONDS,
+                 backend=RECOGNIZER_BACKEND, hot_reload=True, reload_check_seconds=MODEL_RELOAD_CHECK_SECONDS,
+                 query_crop_size=QUERY_CROP_SIZE, on_recognition=None, on_door=None, on_attendance=None, metrics=None):
+        self.trainer_file = trainer_file
+        self.cascade_file = cascade_file
+        self.student_csv = student_csv
+        self.registry = registry if registry is not None else StudentRegistry(student_csv)
+        self.confidence_threshold = confidence_threshold
+        self.tracking = tracking
+        self.detect_every_n = detect_every_n
+        self.redetect_policy = redetect_policy
+        self.downscale = downscale
+        self.votes_required = votes_required
+        self.majority_ratio = majority_ratio
+        self.reverify_seconds = reverify_seconds
+        self.unknown_reverify_seconds = unknown_reverify_seconds
+        self.backend = backend
+        self.hot_reload = hot_reload
+        self.reload_check_seconds = reload_check_seconds
+        self.query_crop_size = query_crop_size
+        self.on_recognition = on_recognition
+        self.on_door = on_door
+        self.on_attendance = on_attendance
+        self.metrics = metrics if metrics is not None else NULL_METRICS # Instrumentação opcional por etapa
+
+        self.recognizer = None
+        self.detector = None
+        self.tracker = None
+        self.voter = None
+        self.recognized_today_session = {} # (student_id, date_str) -> time_str
+        self.frames_processed = 0
+        self._announced_tracks = {} # track_id -> serial confirmado já anunciado em on_recognition
+        self.model_version = 0 # Incrementado a cada troca de modelo durante a sessão
+        self._model_signature = None # (mtime_ns, tamanho) do Trainner.yml carregado
+        self._last_model_check = 0.0
+        self._reload_thread = None
+        self._next_model = None # (recognizer, assinatura) pronto para a troca no próximo quadro
+
+    def load(self, recognizer=None):
+        """
+        Carrega modelo, detector e cadastro. Levanta EngineError com mensagem para o usuário.
+        recognizer permite reaproveitar um modelo já carregado (ex.: compartilhado entre câmeras).
+        """
+        if not os.path.isfile(self.cascade_file):
+            raise EngineError('File Missing', f'{os.path.basename(self.cascade_file)} is missing. '
+                                              'Please contact support or place it in the application directory.')
+        if recognizer is None and not os.path.isfile(self.trainer_file):
+            raise EngineError('Arquivo de Treinamento Ausente',
+                              f'{os.path.basename(self.trainer_file)} não encontrado. Por favor, Salve um Perfil primeiro.')
+        if not os.path.isfile(self.student_csv):
+            raise EngineError('Detalhes Ausentes',
+                              f'{os.path.basename(self.student_csv)} está ausente. Não é possível mapear rostos para nomes.')
+        try:
+            self.registry.refresh() # Lê só as linhas novas se o CSV mudou desde a última sessão
+        except Exception as e:
+            raise EngineError('Erro ao Ler Detalhes', f'Erro ao ler {os.path.basename(self.student_csv)}: {e}')
+        if self.registry.missing_columns:
+            raise EngineError('Arquivo de Detalhes Inválido',
+                              f'{os.path.basename(self.student_csv)} não contém as colunas esperadas (SERIAL NO., ID, NAME).')
+        if len(self.registry) == 0:
+            raise EngineError('Detalhes Vazios',
+                              f'{os.path.basename(self.student_csv)} está vazio. Registre estudantes primeiro.')
+
+        self._model_signature = self._read_model_signature()
+        self._last_model_check = time.monotonic()
+        self.recognizer = recognizer if recognizer is not None else load_recognizer(self.trainer_file, self.backend)
+        self.detector = FaceDetector(self.cascade_file, scale_factor=1.2, min_neighbors=5,
+                                     min_size=(DETECTION_MIN_FACE_PX, DETECTION_MIN_FACE_PX),
+                                     downscale=self.downscale)
+        if self.tracking:
+            self.tracker = FaceTracker(detect_every_n=self.detect_every_n, redetect_policy=self.redetect_policy)
+            self.voter = RecognitionVoter(self.confidence_threshold, votes_required=self.votes_required,
+                                          majority_ratio=self.majority_ratio, reverify_seconds=self.reverify_seconds,
+                                          unknown_reverify_seconds=self.unknown_reverify_seconds)
+        else: # Sem rastreamento cada rosto é novo a cada quadro: um voto basta e o predict roda sempre
+            self.tracker = None
+            self.voter = RecognitionVoter(self.confidence_threshold, votes_required=1)
+        return self
+
+    def process_frame(self, frame):
+        """Processa um quadro BGR e retorna a lista de FaceResult."""
+        metrics = self.metrics
+        self.frames_processed += 1
+        self.registry.refresh_if_stale() # Novos cadastros entram sem reiniciar a sessão
+        if self.hot_reload:
+            self._check_for_new_model()
+        t = metrics.now()
+        gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        t = metrics.record("gray", t)
+        if self.tracker: # Detecção completa só a cada N quadros; nos demais as caixas são rastreadas
+            tracked_faces = self.tracker.update(gray_frame, self.detector.detect, frame)
+        else:
+            tracked_faces = [Track(0, box) for box in self.detector.detect(gray_frame)]
+        t = metrics.record("detect", t)
+        metrics.observe("faces_per_frame", len(tracked_faces))
+
+        results = []
+        predict_calls_before = self.voter.predict_calls
+        batched = self._predict_batch(gray_frame, tracked_faces)
+        for i, track in enumerate(tracked_faces):
+            # O predict só roda enquanto o rosto não tem identidade confirmada por votação
+            if i in batched:
+                predict_fn = lambda: batched[i]
+            else:
+                predict_fn = lambda: self.recognizer.predict(self._query_crop(gray_frame, track.box))
+            recognition = self.voter.recognize(track, predict_fn)
+            t = metrics.record("predict", t)
+            result = self._build_result(track, recognition)
+            t = metrics.record("lookup", t)
+            results.append(result)
+            if result.recognized:
+                self._emit_recognition(result)
+                if self.on_door:
+                    self.on_door(result)
+                self._register_attendance(result)
+
+        metrics.incr("predicts", self.voter.predict_calls - predict_calls_before)
+        if self.tracker:
+            active_ids = {track.track_id for track in tracked_faces}
+            for track_id in list(self._announced_tracks):
+                if track_id not in active_ids:
+                    del self._announced_tracks[track_id]
+        return results
+
+    def _read_model_signature(self):
+        try:
+            st = os.stat(self.trainer_file)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _check_for_new_model(self):
+        """Chamado entre quadros: troca o modelo se um novo já foi carregado, ou dispara a leitura."""
+        if self._next_model is not None:
+            self._swap_model(*self._next_model)
+            return
+        now = time.monotonic()
+        if self._reload_thread is not None or now - self._last_model_check < self.reload_check_seconds:
+            return
+        self._last_model_check = now
+        signature = self._read_model_signature()
+        if signature is None or signature == self._model_signature:
+            return
+        # O treinamento grava o Trainner.yml com os.replace: o arquivo visto aqui está sempre completo
+        self._reload_thread = threading.Thread(target=self._load_in_background, args=(signature,),
+                                               name="ModelReload", daemon=True)
+        self._reload_thread.start()
+
+    def _load_in_background(self, signature):
+        try:
+            recognizer = load_recognizer(self.trainer_file, self.backend)
+        except EngineError as e:
+            print(f"Aviso: Novo modelo ignorado ({e.message}). O modelo atual continua em uso.")
+            self._model_signature = signature # Só tenta de novo quando o arquivo mudar outra vez
+            self._reload_thread = None
+            return
+        self._next_model = (recognizer, signature) # Atribuição única: o loop vê o par completo ou nada
+        self._reload_thread = None
+
+    def _swap_model(self, recognizer, signature):
+        self.recognizer = recognizer
+        self._model_signature = signature
+        self._next_model = None
+        self.model_version += 1
+        self.metrics.incr("model_reloads")
+        # Rostos ainda sem identidade (ou desconhecidos) votam de novo com o modelo novo;
+        # identidades já confirmadas seguem até a reverificação normal.
+        if self.tracker:
+            for track in self.tracker.tracks:
+                if track.recognition is not None and (not track.recognition.confirmed or track.recognition.label is None):
+                    track.recognition = None
+        print(f"Modelo de reconhecimento atualizado durante a sessão (versão {self.model_version}).")
+
+    def _predict_batch(self, gray_frame, tracked_faces):
+        """Com a galeria vetorizada, prediz de uma vez todos os rostos do quadro que ainda precisam de predict."""
+        if not hasattr(self.recognizer, "predict_batch") or len(tracked_faces) < 2:
+            return {}
+        now = time.monotonic()
+        # Índice na lista de rostos (sem rastreamento todos os rastros têm track_id 0)
+        pending = [i for i, track in enumerate(tracked_faces)
+                   if track.recognition is None or self.voter.needs_predict(track.recognition, now)]
+        if len(pending) < 2:
+            return {}
+        crops = [self._query_crop(gray_frame, tracked_faces[i].box) for i in pending]
+        return dict(zip(pending, self.recognizer.predict_batch(crops)))
+
+    def _query_crop(self, gray_frame, box):
+        x, y, w, h = box
+        crop = gray_frame[y:y + h, x:x + w]
+        return normalize_crop(crop, self.query_crop_size) if self.query_crop_size else crop
+
+    def _build_result(self, track, recognition):
+        if not recognition.confirmed:
+            return FaceResult(track.track_id, track.box, STATUS_VERIFYING, confidence=recognition.confidence)
+        if recognition.label is None:
+            return FaceResult(track.track_id, track.box, STATUS_UNKNOWN, confidence=recognition.confidence)
+        student = self.registry.by_serial(recognition.label) # Busca O(1) no índice
+        if student is None:
+            return FaceResult(track.track_id, track.box, STATUS_UNREGISTERED, serial_no=recognition.label,
+                              confidence=recognition.confidence)
+        return FaceResult(track.track_id, track.box, STATUS_RECOGNIZED, serial_no=student.serial_no,
+                          student_id=student.student_id, name=student.name, confidence=recognition.confidence)
+
+    def _emit_recognition(self, result):
+        if self.tracker and self._announced_tracks.get(result.track_id) == result.serial_no:
+            return
+        self._announced_tracks[result.track_id] = result.serial_no
+        if self.on_recognition:
+            self.on_recognition(result)
+
+    def _register_attendance(self, result):
+        current_time_obj = datetime.datetime.now()
+        date_str = current_time_obj.strftime('%d-%m-%Y')
+        key = (result.student_id, date_str)
+        if key in self.recognized_today_session:
+            return
+        time_str = current_time_obj.strftime('%I:%M:%S %p')
+        self.recognized_today_session[key] = time_str
+        print(f"Presença registrada para {result.name} (ID: {result.student_id}) em {date_str} às {time_str}")
+        if self.on_attendance:
+            self.on_attendance(result.student_id, result.name, date_str, time_str)
+
+    def draw_overlay(self, frame, results, copy=True, scale=1.0):
+        """
+        Desenha caixas, nomes e confiança sobre o quadro (cópia por padrão).
+        scale converte as caixas para um quadro de exibição reduzido (ex.: 0.5 para metade da resolução).
+        """
+        display_frame = frame.copy() if copy else frame
+        font = cv2.FONT_HERSHEY_SIMPLEX
+        for result in results:
+            x, y, w, h = (int(round(v * scale)) for v in result.box)
+            cv2.rectangle(display_frame, (x, y), (x + w, y + h), (225, 0, 0), 2)
+            name_display, student_id_display = result.display_texts()
+            cv2.putText(display_frame, f"{name_display} (ID:{student_id_display})", (x, y + h + 20), font, 0.6, (255, 255, 255), 1)
+            if result.confidence is not None:
+                conf_text_color = (0, 0, 255) if result.confidence >= self.confidence_threshold else (0, 255, 0)
+                cv2.putText(display_frame, f"Conf: {round(result.confidence, 2)}", (x, y - 5), font, 0.5, conf_text_color, 1)
+        return display_frame
+
+############################################# CLI ######################################################
+
+def main(argv=None):
+    """Roda o motor sem interface sobre uma fonte de quadros e imprime os eventos."""
+    from frame_sources import ThreadedFrameReader
+
+    parser = argparse.ArgumentParser(description="Reconhecimento facial sem interface gráfica.")
+    parser.add_argument("source", help="Índice da câmera, arquivo de vídeo, pasta de imagens ou 'synthetic'")
+    parser.add_argument("--max-frames", type=int, default=None, help="Para após N quadros")
+    parser.add_argument("--no-tracking", action="store_true", help="Detecta e reconhece em todos os quadros")
+    parser.add_argument("--trainer", default=DEFAULT_TRAINER_FILE)
+    parser.add_argument("--students", default=DEFAULT_STUDENT_DETAILS_CSV)
+    parser.add_argument("--backend", choices=("lbph", "gallery"), default=RECOGNIZER_BACKEND,
+                        help="Implementação do predict (gallery = busca vetorizada em lote)")
+    parser.add_argument("--metrics", help="Exporta métricas por etapa para este arquivo (.csv ou texto Prometheus)")
+    parser.add_argument("--raw-crops", action="store_true",
+                        help="Não redimensiona os rostos antes do predict (modelo treinado só com JPGs antigos)")
+    args = parser.parse_args(argv)
+    metrics = create_metrics(bool(args.metrics), args.metrics)
+
+    engine = RecognitionEngine(
+        trainer_file=args.trainer, student_csv=args.students, tracking=not args.no_tracking, backend=args.backend,
+        query_crop_size=None if args.raw_crops else QUERY_CROP_SIZE,
+        on_recognition=lambda r: print(f"[reconhecimento] {r.name} (ID: {r.student_id}) conf={r.confidence:.1f}"),
+        on_attendance=lambda sid, name, d, t: print(f"[presença] {name} (ID: {sid}) {d} {t}"), metrics=metrics)
+    try:
+        engine.load()
+    except EngineError as e:
+        print(f"{e.title}: {e.message}")
+        return 1
+
+    reader = ThreadedFrameReader(args.source)
+    if not reader.start():
+        print(f"Não foi possível abrir a fonte {args.source}")
+        return 1
+    start = time.perf_counter()
+    try:
+        while args.max_frames is None or engine.frames_processed < args.max_frames:
+            t = metrics.now()
+            ret, frame = reader.read()
+            if not ret:
+                break
+            metrics.record("capture", t)
+            engine.process_frame(frame)
+            metrics.record("frame", t)
+            metrics.frame_done()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        reader.stop()
+        metrics.export()
+    elapsed = time.perf_counter() - start
+    fps = engine.frames_processed / elapsed if elapsed > 0 else 0.0
+    print(f"{engine.frames_processed} quadros em {elapsed:.2f}s ({fps:.1f} FPS), "
+          f"{engine.voter.predict_calls} predicts, {len(engine.recognized_today_session)} presença(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
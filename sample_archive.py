@@ -0,0 +1,251 @@
+############################################# IMPORTING ################################################
+import os
+import shutil
+import struct
+import sys
+import time
+import cv2
+import numpy as np
+
+############################################# CONSTANTS ################################################
+SAMPLE_ARCHIVE_MAGIC = b"FACESMP\0"
+SAMPLE_ARCHIVE_VERSION = 1
+SAMPLE_ARCHIVE_EXTENSION = ".samples" # {nome}.{serial}.{id}.samples, um arquivo por pessoa
+SAMPLE_CROP_SIZE = 100 # Lado dos recortes guardados (igual ao minSize da detecção: nunca amplia um rosto detectado)
+# Cabeçalho: magic, versão, serial, altura, largura, amostras, criação (ns), id (UTF-8), nome (UTF-8)
+HEADER_FORMAT = "<8sIiHHIq32s64s"
+HEADER_SIZE = 128
+COUNT_OFFSET = struct.calcsize("<8sIiHH") # Posição do contador de amostras, reescrito a cada acréscimo
+SAMPLE_PATH_SEPARATOR = "#" # Amostra i de um arquivo: "caminho/Ana.1.123.samples#i"
+MIGRATION_BACKUP_DIRNAME = "jpg_backup" # Subpasta para onde a migração move os JPGs originais
+
+############################################# EXCEPTIONS ###############################################
+
+class SampleArchiveError(Exception):
+    """Arquivo de amostras ausente, corrompido ou de versão incompatível."""
+
+############################################# ARCHIVE ##################################################
+
+class SampleArchive:
+    """
+    Amostras de uma pessoa: recortes em tons de cinza, todos com o mesmo tamanho, guardados em
+    sequência (uint8, amostras x altura x largura) depois de um cabeçalho fixo com serial, id e nome.
+    created_ns muda quando o arquivo é recriado; acrescentar amostras não altera as existentes.
+    """
+
+    def __init__(self, path, serial, student_id, name, height, width, count, created_ns, samples=None):
+        self.path = path
+        self.serial = serial
+        self.student_id = student_id
+        self.name = name
+        self.height = height
+        self.width = width
+        self.count = count
+        self.created_ns = created_ns
+        self.samples = samples # None quando só o cabeçalho foi lido
+
+    def __len__(self):
+        return self.count
+
+
+def sample_archive_path(directory, name, serial, student_id):
+    return os.path.join(directory, f"{name}.{serial}.{student_id}{SAMPLE_ARCHIVE_EXTENSION}")
+
+
+def is_sample_archive(path):
+    return path.lower().endswith(SAMPLE_ARCHIVE_EXTENSION)
+
+
+def normalize_crop(image, size=SAMPLE_CROP_SIZE):
+    """Recorte em tons de cinza redimensionado para size x size."""
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    if image.shape[:2] == (size, size):
+        return np.ascontiguousarray(image, dtype=np.uint8)
+    interpolation = cv2.INTER_AREA if min(image.shape[:2]) >= size else cv2.INTER_LINEAR
+    return cv2.resize(image, (size, size), interpolation=interpolation)
+
+
+def _encode_text(text, length):
+    data = str(text).encode('utf-8')[:length]
+    return data.decode('utf-8', errors='ignore').encode('utf-8') # Não corta um caractere ao meio
+
+
+def _pack_header(serial, student_id, name, height, width, count, created_ns):
+    return struct.pack(HEADER_FORMAT, SAMPLE_ARCHIVE_MAGIC, SAMPLE_ARCHIVE_VERSION, int(serial), height, width,
+                       count, created_ns, _encode_text(student_id, 32), _encode_text(name, 64)).ljust(HEADER_SIZE, b"\0")
+
+
+def _unpack_header(path, data):
+    if len(data) < HEADER_SIZE:
+        raise SampleArchiveError(f"{os.path.basename(path)} está truncado.")
+    magic, version, serial, height, width, count, created_ns, student_id, name = \
+        struct.unpack_from(HEADER_FORMAT, data)
+    if magic != SAMPLE_ARCHIVE_MAGIC:
+        raise SampleArchiveError(f"{os.path.basename(path)} não é um arquivo de amostras.")
+    if version != SAMPLE_ARCHIVE_VERSION:
+        raise SampleArchiveError(f"{os.path.basename(path)} tem versão {version}; esperada {SAMPLE_ARCHIVE_VERSION}.")
+    return SampleArchive(path, serial, student_id.rstrip(b"\0").decode('utf-8'), name.rstrip(b"\0").decode('utf-8'),
+                         height, width, count, created_ns)
+
+
+def _stack_crops(crops, size):
+    return np.stack([normalize_crop(crop, size) for crop in crops]) if len(crops) \
+        else np.zeros((0, size, size), dtype=np.uint8)
+
+
+def write_sample_archive(path, serial, student_id, name, crops, size=SAMPLE_CROP_SIZE):
+    """Cria (ou substitui) o arquivo de uma pessoa. Grava em arquivo temporário + os.replace."""
+    samples = _stack_crops(crops, size)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as archive_file:
+        archive_file.write(_pack_header(serial, student_id, name, size, size, len(samples), time.time_ns()))
+        archive_file.write(samples.tobytes())
+    os.replace(tmp_path, path)
+
+
+def append_samples(path, crops, serial=None, student_id=None, name=None, size=SAMPLE_CROP_SIZE):
+    """
+    Acrescenta recortes ao final do arquivo (criando-o se não existir, com serial/id/nome).
+    Os pixels são gravados antes do contador: uma queda no meio deixa apenas bytes extras
+    no final, que são ignorados na leitura.
+    """
+    if not os.path.isfile(path):
+        if serial is None:
+            raise SampleArchiveError(f"{os.path.basename(path)} não existe e o serial não foi informado.")
+        write_sample_archive(path, serial, student_id, name, crops, size)
+        return len(crops)
+    with open(path, 'r+b') as archive_file:
+        archive = _unpack_header(path, archive_file.read(HEADER_SIZE))
+        samples = _stack_crops(crops, archive.height)
+        archive_file.seek(HEADER_SIZE + archive.count * archive.height * archive.width)
+        archive_file.write(samples.tobytes())
+        archive_file.flush()
+        archive_file.seek(COUNT_OFFSET)
+        archive_file.write(struct.pack("<I", archive.count + len(samples)))
+    return len(samples)
+
+
+def read_sample_archive(path, header_only=False):
+    """Lê o arquivo de uma pessoa com uma única leitura sequencial. Retorna um SampleArchive."""
+    try:
+        with open(path, 'rb') as archive_file:
+            data = archive_file.read(HEADER_SIZE) if header_only else archive_file.read()
+    except OSError as e:
+        raise SampleArchiveError(f"Não foi possível abrir {os.path.basename(path)}: {e}")
+    archive = _unpack_header(path, data)
+    if header_only:
+        return archive
+    sample_bytes = archive.height * archive.width
+    if len(data) < HEADER_SIZE + archive.count * sample_bytes:
+        raise SampleArchiveError(f"{os.path.basename(path)} está truncado.")
+    archive.samples = np.frombuffer(data, dtype=np.uint8, count=archive.count * sample_bytes,
+                                    offset=HEADER_SIZE).reshape(archive.count, archive.height, archive.width)
+    return archive
+
+
+_header_cache = {} # caminho -> (tamanho, mtime_ns, SampleArchive só com cabeçalho)
+
+def read_archive_header(path):
+    """Cabeçalho do arquivo, reaproveitado enquanto tamanho e mtime não mudarem."""
+    st = os.stat(path)
+    cached = _header_cache.get(path)
+    if cached is not None and cached[:2] == (st.st_size, st.st_mtime_ns):
+        return cached[2]
+    archive = read_sample_archive(path, header_only=True)
+    _header_cache[path] = (st.st_size, st.st_mtime_ns, archive)
+    return archive
+
+############################################# SAMPLE PATHS #############################################
+# O treinamento trabalha com uma lista de caminhos (ver training.py). Cada amostra de um arquivo
+# aparece nela como "arquivo#i", o que mantém o manifesto incremental funcionando por amostra.
+
+def sample_paths(archive_path):
+    return [f"{archive_path}{SAMPLE_PATH_SEPARATOR}{i}" for i in range(read_archive_header(archive_path).count)]
+
+
+def split_sample_path(path):
+    """"arquivo#i" -> (arquivo, i); caminhos comuns -> None."""
+    archive_path, separator, index = path.rpartition(SAMPLE_PATH_SEPARATOR)
+    if not separator or not index.isdigit() or not is_sample_archive(archive_path):
+        return None
+    return archive_path, int(index)
+
+
+def sample_signature(path):
+    """Assinatura (tamanho, mtime_ns) de uma amostra: bytes do recorte e data de criação do arquivo."""
+    archive_path, _ = split_sample_path(path)
+    archive = read_archive_header(archive_path)
+    return archive.height * archive.width, archive.created_ns
+
+############################################# MIGRATION ################################################
+
+def migrate_image_directory(image_dir, delete_originals=False, size=SAMPLE_CROP_SIZE):
+    """
+    Converte a pasta antiga ({nome}.{serial}.{id}.{n}.jpg soltos) em um arquivo .samples por pessoa.
+    Os JPGs convertidos vão para image_dir/jpg_backup (ou são apagados com delete_originals),
+    para não entrarem duas vezes no treinamento. Retorna (pessoas, amostras, ignorados).
+    """
+    from training_loader import decode_training_image
+    groups = {} # serial -> (nome, id, [(n, caminho)])
+    skipped = 0
+    for filename in sorted(os.listdir(image_dir)):
+        path = os.path.join(image_dir, filename)
+        parts = filename.split(".")
+        if not os.path.isfile(path) or not filename.lower().endswith(('.jpg', '.png', '.jpeg')):
+            continue
+        if len(parts) < 5 or not parts[1].isdigit():
+            print(f"Aviso: Pulando arquivo com formato de nome inesperado: {filename}")
+            skipped += 1
+            continue
+        name, serial, student_id, number = parts[0], int(parts[1]), parts[2], parts[3]
+        groups.setdefault(serial, (name, student_id, []))[2].append((int(number) if number.isdigit() else 0, path))
+
+    backup_dir = os.path.join(image_dir, MIGRATION_BACKUP_DIRNAME)
+    persons = samples = 0
+    for serial, (name, student_id, files) in sorted(groups.items()):
+        crops, converted = [], []
+        for _, path in sorted(files):
+            try:
+                crops.append(decode_training_image(path))
+                converted.append(path)
+            except Exception as e:
+                print(f"Erro ao processar imagem {path}: {e}. Pulando.")
+                skipped += 1
+        if not crops:
+            continue
+        # Se a pessoa já tem arquivo (migração interrompida ou capturas novas), os recortes são acrescentados
+        append_samples(sample_archive_path(image_dir, name, serial, student_id), crops, serial, student_id, name, size)
+        if not delete_originals:
+            os.makedirs(backup_dir, exist_ok=True)
+        for path in converted:
+            if delete_originals:
+                os.remove(path)
+            else:
+                shutil.move(path, os.path.join(backup_dir, os.path.basename(path)))
+        persons += 1
+        samples += len(crops)
+    return persons, samples, skipped
+
+
+if __name__ == "__main__":
+    # Uso: python sample_archive.py migrate <pasta TrainingImage> [--delete]
+    #      python sample_archive.py info <pasta TrainingImage>
+    if len(sys.argv) < 3 or sys.argv[1] not in ("migrate", "info"):
+        print("Uso: python sample_archive.py migrate|info <pasta TrainingImage> [--delete]")
+        sys.exit(1)
+    directory = sys.argv[2]
+    if sys.argv[1] == "migrate":
+        start = time.perf_counter()
+        migrated = migrate_image_directory(directory, delete_originals="--delete" in sys.argv[3:])
+        print(f"{migrated[0]} pessoa(s), {migrated[1]} amostra(s) migradas, {migrated[2]} arquivo(s) ignorado(s) "
+              f"em {time.perf_counter() - start:.2f}s")
+    archives = sorted(f for f in os.listdir(directory) if is_sample_archive(f))
+    start = time.perf_counter()
+    total = 0
+    for filename in archives:
+        archive = read_sample_archive(os.path.join(directory, filename))
+        total += archive.count
+        print(f"{filename}: serial {archive.serial}, id {archive.student_id}, {archive.name}, "
+              f"{archive.count} amostra(s) {archive.width}x{archive.height}")
+    print(f"{len(archives)} arquivo(s), {total} amostra(s) lidas em {time.perf_counter() - start:.3f}s")
@@ -0,0 +1,179 @@
+############################################# IMPORTING ################################################
+import queue
+import threading
+import cv2
+import numpy as np
+
+from face_detection import DETECTION_MIN_BOX_PX
+from sample_archive import append_samples, SampleArchiveError
+
+############################################# CONSTANTS ################################################
+CAPTURE_TARGET_SAMPLES = 30 # Amostras aceitas por cadastro com o filtro de qualidade (sem ele: 60)
+CAPTURE_MIN_FACE_PX = DETECTION_MIN_BOX_PX # Lado mínimo do recorte: o mesmo que o detector aceita (inclusive reduzido)
+CAPTURE_MIN_SHARPNESS = 40.0 # Variância do Laplaciano no recorte normalizado; abaixo disso está borrado
+CAPTURE_BRIGHTNESS_RANGE = (50, 205) # Média de cinza aceitável (nem escuro nem estourado)
+CAPTURE_MIN_CONTRAST = 20.0 # Desvio padrão mínimo dos tons de cinza
+CAPTURE_MAX_SIMILARITY = 0.97 # Correlação máxima com uma amostra já aceita (acima disso é repetida)
+QUALITY_SIZE = 100 # Lado do recorte usado para medir nitidez (independe da distância da câmera)
+THUMBNAIL_SIZE = 24 # Miniatura usada na comparação entre amostras
+WRITER_QUEUE_SIZE = 64
+
+REJECT_SMALL = "pequena"
+REJECT_BLURRY = "borrada"
+REJECT_DARK = "escura"
+REJECT_BRIGHT = "clara demais"
+REJECT_FLAT = "sem contraste"
+REJECT_DUPLICATE = "repetida"
+
+############################################# QUALITY ##################################################
+
+class CropQuality:
+    __slots__ = ("sharpness", "size", "brightness", "contrast", "similarity", "reason", "_thumbnail")
+
+    def __init__(self, sharpness, size, brightness, contrast, similarity, reason, thumbnail):
+        self.sharpness = sharpness
+        self.size = size
+        self.brightness = brightness
+        self.contrast = contrast
+        self.similarity = similarity
+        self.reason = reason # None quando a amostra é aceitável
+        self._thumbnail = thumbnail
+
+    @property
+    def acceptable(self):
+        return self.reason is None
+
+
+class SampleQualityGate:
+    """
+    Decide quais recortes de rosto entram no cadastro: descarta os pequenos, borrados, escuros,
+    estourados ou sem contraste, e os quase iguais a uma amostra já aceita (correlação da
+    miniatura normalizada). Assim o cadastro termina com menos amostras, todas úteis.
+    """
+
+    def __init__(self, target_samples=CAPTURE_TARGET_SAMPLES, min_face_px=CAPTURE_MIN_FACE_PX,
+                 min_sharpness=CAPTURE_MIN_SHARPNESS, brightness_range=CAPTURE_BRIGHTNESS_RANGE,
+                 min_contrast=CAPTURE_MIN_CONTRAST, max_similarity=CAPTURE_MAX_SIMILARITY):
+        self.target_samples = target_samples
+        self.min_face_px = min_face_px
+        self.min_sharpness = min_sharpness
+        self.brightness_range = brightness_range
+        self.min_contrast = min_contrast
+        self.max_similarity = max_similarity
+        self.accepted = 0
+        self.rejected = {} # motivo -> quantidade
+        self._thumbnails = np.zeros((target_samples, THUMBNAIL_SIZE * THUMBNAIL_SIZE), dtype=np.float32)
+
+    @property
+    def done(self):
+        return self.accepted >= self.target_samples
+
+    def evaluate(self, gray_crop):
+        """Mede o recorte e retorna um CropQuality (reason=None se ele pode ser aceito)."""
+        size = min(gray_crop.shape[:2])
+        normalized = cv2.resize(gray_crop, (QUALITY_SIZE, QUALITY_SIZE), interpolation=cv2.INTER_AREA)
+        brightness, contrast = (float(v[0][0]) for v in cv2.meanStdDev(normalized))
+        sharpness = float(cv2.Laplacian(normalized, cv2.CV_64F).var())
+        thumbnail = cv2.resize(normalized, (THUMBNAIL_SIZE, THUMBNAIL_SIZE), interpolation=cv2.INTER_AREA)
+        thumbnail = thumbnail.astype(np.float32).ravel()
+        thumbnail -= thumbnail.mean()
+        norm = float(np.linalg.norm(thumbnail))
+        if norm > 0:
+            thumbnail /= norm
+        similarity = float((self._thumbnails[:self.accepted] @ thumbnail).max()) if self.accepted else 0.0
+
+        if size < self.min_face_px:
+            reason = REJECT_SMALL
+        elif brightness < self.brightness_range[0]:
+            reason = REJECT_DARK
+        elif brightness > self.brightness_range[1]:
+            reason = REJECT_BRIGHT
+        elif contrast < self.min_contrast:
+            reason = REJECT_FLAT
+        elif sharpness < self.min_sharpness:
+            reason = REJECT_BLURRY
+        elif similarity > self.max_similarity:
+            reason = REJECT_DUPLICATE
+        else:
+            reason = None
+        return CropQuality(sharpness, size, brightness, contrast, similarity, reason, thumbnail)
+
+    def offer(self, gray_crop):
+        """Avalia e, se aceitável, registra a amostra. Retorna o CropQuality."""
+        quality = self.evaluate(gray_crop)
+        if quality.acceptable and not self.done:
+            self._thumbnails[self.accepted] = quality._thumbnail
+            self.accepted += 1
+        elif not quality.acceptable:
+            self.rejected[quality.reason] = self.rejected.get(quality.reason, 0) + 1
+        return quality
+
+    def describe(self):
+        rejected = ", ".join(f"{reason}: {count}" for reason, count in sorted(self.rejected.items()))
+        return f"{self.accepted} amostra(s) aceita(s)" + (f"; descartadas ({rejected})" if rejected else "")
+
+############################################# WRITER ###################################################
+
+class SampleWriter:
+    """
+    Grava as amostras em uma thread própria: o loop de captura só enfileira o recorte
+    (cópia) e segue para o próximo quadro, sem esperar a codificação nem o disco.
+    Com archive_path as amostras vão para o arquivo .samples da pessoa (ver sample_archive),
+    acrescentadas em lote com o que estiver na fila; sem ele, cada uma vira um JPG em path.
+    """
+
+    def __init__(self, archive_path=None, serial=None, student_id=None, name=None, queue_size=WRITER_QUEUE_SIZE):
+        self.archive_path = archive_path
+        self.archive_identity = (serial, student_id, name)
+        self._queue = queue.Queue(maxsize=queue_size)
+        self.written = 0
+        self.errors = []
+        self._thread = threading.Thread(target=self._run, name="SampleWriter", daemon=True)
+        self._thread.start()
+
+    def submit(self, image, path=None):
+        self._queue.put((path, image.copy())) # A cópia desacopla o recorte do quadro que será reaproveitado
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while batch[-1] is not None and self.archive_path:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = batch[-1] is None
+            items = batch[:-1] if stop else batch
+            if items and self.archive_path:
+                self._append(items)
+            elif items:
+                self._write_jpg(*items[0])
+            if stop:
+                return
+
+    def _append(self, items):
+        try:
+            self.written += append_samples(self.archive_path, [image for _, image in items], *self.archive_identity)
+        except (OSError, ValueError, SampleArchiveError) as e:
+            self.errors.append(f"{self.archive_path}: {e}")
+
+    def _write_jpg(self, path, image):
+        try:
+            if cv2.imwrite(path, image):
+                self.written += 1
+            else:
+                self.errors.append(f"{path}: falha ao codificar")
+        except cv2.error as e:
+            self.errors.append(f"{path}: {e}")
+
+    def close(self):
+        """Espera gravar tudo o que foi enfileirado. Retorna a quantidade de amostras gravadas."""
+        self._queue.put(None)
+        self._thread.join()
+        return self.written
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
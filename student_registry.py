@@ -0,0 +1,197 @@
+############################################# IMPORTING ################################################
+import csv
+import hashlib
+import io
+import locale
+import os
+import threading
+import time
+
+############################################# CONSTANTS ################################################
+SERIAL_COLUMN = 'SERIAL NO.'
+ID_COLUMN = 'ID'
+NAME_COLUMN = 'NAME'
+REQUIRED_COLUMNS = (SERIAL_COLUMN, ID_COLUMN, NAME_COLUMN)
+REGISTRY_REFRESH_INTERVAL_SECONDS = 1.0 # Intervalo mínimo entre verificações do mtime do CSV
+PREFIX_READ_CHUNK = 1 << 20
+
+############################################# REGISTRY #################################################
+
+class StudentRecord:
+    """Registro compacto de um estudante (uma linha do StudentDetails.csv)."""
+    __slots__ = ("serial_no", "student_id", "name")
+
+    def __init__(self, serial_no, student_id, name):
+        self.serial_no = serial_no
+        self.student_id = student_id
+        self.name = name
+
+    def __repr__(self):
+        return f"StudentRecord({self.serial_no}, {self.student_id!r}, {self.name!r})"
+
+
+def _decode_csv_bytes(data):
+    # O CSV é escrito com a codificação padrão do sistema (cp1252 no Windows)
+    try:
+        return data.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        return data.decode(locale.getpreferredencoding(False) or 'latin-1', errors='replace')
+
+
+def _parse_serial(value):
+    value = value.strip()
+    if not value:
+        return None
+    try:
+        return int(float(value)) # Aceita "3" e "3.0" (pandas grava floats quando há valores ausentes)
+    except ValueError:
+        return None
+
+
+def _normalize_id(value):
+    # Mesma forma que pandas + astype(str) produzia para IDs numéricos
+    value = value.strip()
+    if value.isdigit():
+        return str(int(value))
+    return value
+
+
+class StudentRegistry:
+    """
+    Índice em memória do StudentDetails.csv com busca O(1) por serial interno e por ID.
+    O arquivo é lido uma vez; depois, quando o mtime muda, apenas as linhas novas
+    (o cadastro só acrescenta linhas ao final) são interpretadas. O atalho só vale se for
+    o mesmo arquivo (dispositivo e inode) e se o trecho já lido não mudou (hash conferido a
+    cada atualização); um CSV apagado e recriado, mesmo que já maior que o anterior, ou
+    reescrito, reconstrói o índice por completo.
+    """
+
+    def __init__(self, csv_path):
+        self.csv_path = csv_path
+        self.by_serial_index = {}
+        self.by_id_index = {}
+        self.records = []
+        self.missing_columns = ()
+        self._column_positions = None
+        self._offset = 0
+        self._stat_key = None
+        self._file_id = None
+        self._prefix_hash = hashlib.blake2b() # Hash dos bytes já interpretados (até _offset)
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def exists(self):
+        return self._stat_key is not None
+
+    @property
+    def is_valid(self):
+        return self.exists and not self.missing_columns
+
+    def by_serial(self, serial_no):
+        return self.by_serial_index.get(serial_no)
+
+    def by_id(self, student_id):
+        return self.by_id_index.get(_normalize_id(str(student_id)))
+
+    def next_serial_no(self):
+        return max(self.by_serial_index, default=0) + 1
+
+    def refresh_if_stale(self, min_interval=REGISTRY_REFRESH_INTERVAL_SECONDS):
+        """Versão barata para o loop de quadros: só consulta o disco a cada min_interval segundos."""
+        now = time.monotonic()
+        if now - self._last_check < min_interval:
+            return False
+        return self.refresh()
+
+    def refresh(self):
+        """Atualiza o índice se o arquivo mudou. Retorna True se algo foi recarregado."""
+        with self._lock:
+            self._last_check = time.monotonic()
+            try:
+                st = os.stat(self.csv_path)
+            except FileNotFoundError:
+                if self._stat_key is not None or self.records:
+                    self._clear()
+                    return True
+                return False
+            stat_key = (st.st_mtime_ns, st.st_size)
+            if stat_key == self._stat_key:
+                return False
+
+            file_id = (st.st_dev, st.st_ino)
+            with open(self.csv_path, 'rb') as csv_file:
+                if self._stat_key is not None and file_id == self._file_id and st.st_size >= self._offset \
+                        and self._prefix_unchanged(csv_file):
+                    csv_file.seek(self._offset) # Arquivo apenas cresceu: interpreta só o final
+                else:
+                    self._clear()
+                    csv_file.seek(0)
+                data = csv_file.read()
+            self._stat_key = stat_key
+            self._file_id = file_id
+            self._consume(data)
+            return True
+
+    def _prefix_unchanged(self, csv_file):
+        """Confere se os primeiros _offset bytes são os mesmos já indexados."""
+        hasher = hashlib.blake2b()
+        remaining = self._offset
+        while remaining:
+            chunk = csv_file.read(min(remaining, PREFIX_READ_CHUNK))
+            if not chunk:
+                return False
+            hasher.update(chunk)
+            remaining -= len(chunk)
+        return hasher.digest() == self._prefix_hash.digest()
+
+    def _clear(self):
+        self.by_serial_index = {}
+        self.by_id_index = {}
+        self.records = []
+        self.missing_columns = ()
+        self._column_positions = None
+        self._offset = 0
+        self._stat_key = None
+        self._file_id = None
+        self._prefix_hash = hashlib.blake2b()
+
+    def _consume(self, data):
+        # Processa apenas linhas completas; uma linha parcial fica para a próxima leitura
+        last_newline = data.rfind(b"\n")
+        if last_newline < 0:
+            return
+        complete = data[:last_newline + 1]
+        self._offset += len(complete)
+        self._prefix_hash.update(complete)
+        rows = csv.reader(io.StringIO(_decode_csv_bytes(complete), newline=''))
+
+        if self._column_positions is None:
+            header = next(rows, None)
+            if header is None:
+                return
+            header = [col.strip() for col in header]
+            self.missing_columns = tuple(col for col in REQUIRED_COLUMNS if col not in header)
+            if self.missing_columns:
+                self._column_positions = ()
+                return
+            self._column_positions = tuple(header.index(col) for col in REQUIRED_COLUMNS)
+        if not self._column_positions:
+            return
+
+        serial_pos, id_pos, name_pos = self._column_positions
+        needed = max(self._column_positions)
+        for row in rows:
+            if len(row) <= needed:
+                continue
+            serial_no = _parse_serial(row[serial_pos])
+            if serial_no is None:
+                continue
+            record = StudentRecord(serial_no, _normalize_id(row[id_pos]), row[name_pos].strip())
+            self.records.append(record)
+            # Em caso de duplicatas vale a primeira ocorrência, como no filtro com pandas
+            self.by_serial_index.setdefault(record.serial_no, record)
+            self.by_id_index.setdefault(record.student_id, record)
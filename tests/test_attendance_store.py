@@ -0,0 +1,117 @@
+import csv
+import datetime
+import os
+import sqlite3
+import time
+
+import pandas as pd
+
+from attendance_store import AttendanceStore, AttendanceWriter, ATTENDANCE_CSV_COLUMNS
+
+
+def _write_legacy_csv(path, rows):
+    # Mesmo formato que o save_attendance_to_csv antigo gravava
+    with open(path, 'a+', newline='') as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(ATTENDANCE_CSV_COLUMNS)
+        writer.writerows(rows)
+
+
+def test_same_student_is_recorded_once_per_day(tmp_path):
+    with AttendanceStore(str(tmp_path / "attendance.db")) as store:
+        assert store.add("7", "Ana", "10-03-2025", "08:00:00 AM") is True
+        assert store.add("7", "Ana", "10-03-2025", "09:30:00 AM") is False # INSERT OR IGNORE
+        assert store.add("7", "Ana", "11-03-2025", "08:05:00 AM") is True # Outro dia
+        assert store.add_many([("8", "Bia", "10-03-2025", "08:01:00 AM"),
+                               ("8", "Bia", "10-03-2025", "08:02:00 AM"),
+                               ("7", "Ana", "10-03-2025", "08:03:00 AM")]) == 1
+        assert store.count() == 3 and store.count("10-03-2025") == 2
+        assert store.has(7, "10-03-2025") and not store.has("8", "11-03-2025")
+        assert store.day("10-03-2025")[0].time == "08:00:00 AM" # A primeira presença do dia é mantida
+
+
+def test_range_queries(tmp_path):
+    with AttendanceStore(str(tmp_path / "attendance.db")) as store:
+        first = datetime.date(2025, 2, 27)
+        for d in range(5): # 27/02 a 03/03: a faixa atravessa a virada do mês
+            date_str = (first + datetime.timedelta(days=d)).strftime('%d-%m-%Y')
+            store.add_many([(str(s), f"Aluno {s}", date_str, f"08:0{s}:00 AM") for s in range(3)])
+
+        records = store.between("28-02-2025", datetime.date(2025, 3, 2))
+        assert len(records) == 9
+        assert {record.date for record in records} == {"28-02-2025", "01-03-2025", "02-03-2025"}
+        assert [record.student_id for record in store.day("01-03-2025")] == ["0", "1", "2"] # Ordem de chegada
+        assert [record.date for record in store.between("27-02-2025", "03-03-2025", student_id=1)] == \
+            ["27-02-2025", "28-02-2025", "01-03-2025", "02-03-2025", "03-03-2025"]
+        since = datetime.datetime(2025, 3, 3, 8, 1).timestamp()
+        assert [record.student_id for record in store.since(since)] == ["1", "2"]
+
+
+def test_legacy_csvs_are_imported_once(tmp_path, capsys):
+    attendance_dir = tmp_path / "Attendance"
+    attendance_dir.mkdir()
+    _write_legacy_csv(str(attendance_dir / "Attendance_10-03-2025.csv"),
+                      [["7", "Ana", "10-03-2025", "08:00:00 AM"], ["8", "Bia", "10-03-2025", "08:01:00 AM"]])
+    _write_legacy_csv(str(attendance_dir / "Attendance_11-03-2025.csv"),
+                      [["7", "Ana", "11-03-2025", "08:00:00 AM"], ["9", "Caio", "data ruim", "08:00:00 AM"], ["10"]])
+    (attendance_dir / "outro.csv").write_text("nada")
+
+    with AttendanceStore(str(tmp_path / "attendance.db")) as store:
+        assert store.import_csv_directory(str(attendance_dir)) == 3
+        assert "Data inválida" in capsys.readouterr().out
+        assert store.import_csv_directory(str(attendance_dir)) == 0 # Importar de novo não duplica
+        assert store.day("10-03-2025")[1].timestamp == datetime.datetime(2025, 3, 10, 8, 1).timestamp()
+
+
+def test_export_csv_keeps_the_legacy_layout(tmp_path):
+    legacy_dir, export_dir = tmp_path / "legacy", tmp_path / "export"
+    legacy_dir.mkdir()
+    export_dir.mkdir()
+    rows = [["7", "Ana Souza", "10-03-2025", "08:00:00 AM"], ["8", "Bia, Lima", "10-03-2025", "08:01:00 AM"]]
+    legacy_path = str(legacy_dir / "Attendance_10-03-2025.csv")
+    _write_legacy_csv(legacy_path, rows)
+
+    with AttendanceStore(str(tmp_path / "attendance.db")) as store:
+        store.import_csv(legacy_path)
+        path = store.export_csv("10-03-2025", str(export_dir))
+        assert store.export_csv("11-03-2025", str(export_dir)) is None # Dia vazio: nenhum arquivo
+    assert os.path.basename(path) == "Attendance_10-03-2025.csv"
+    assert open(path, 'rb').read() == open(legacy_path, 'rb').read()
+    assert list(pd.read_csv(path).columns) == ATTENDANCE_CSV_COLUMNS # Como a treeview e o e-mail leem
+    assert os.listdir(str(export_dir)) == ["Attendance_10-03-2025.csv"]
+
+
+def test_session_writer_batches_and_flushes_on_close(tmp_path):
+    with AttendanceStore(str(tmp_path / "attendance.db")) as store:
+        flushes = []
+        writer = AttendanceWriter(store, flush_interval=0.2, batch_size=3, on_flush=flushes.append)
+        for student_id in ("1", "2", "3"): # Lote cheio: gravado na hora
+            writer.submit(student_id, f"Aluno {student_id}", "10-03-2025", "08:00:00 AM")
+        deadline = time.monotonic() + 2.0
+        while not flushes and time.monotonic() < deadline: # on_flush vem depois da gravação
+            time.sleep(0.01)
+        assert store.count() == 3 and flushes == [3]
+
+        writer.submit("1", "Aluno 1", "10-03-2025", "08:05:00 AM") # Repetida: ignorada pelo banco
+        writer.submit("4", "Aluno 4", "11-03-2025", "00:01:00 AM") # Sessão passou da meia-noite
+        assert writer.close() == 4
+        assert flushes == [3, 1] and writer.dates == {"10-03-2025", "11-03-2025"}
+        assert store.has("4", "11-03-2025") and not writer.pending
+
+
+def test_session_writer_retries_a_batch_after_a_database_error(tmp_path, monkeypatch):
+    with AttendanceStore(str(tmp_path / "attendance.db")) as store:
+        add_many = store.add_many
+        failures = []
+        def locked_once(records):
+            if not failures:
+                failures.append(True)
+                raise sqlite3.OperationalError("database is locked")
+            return add_many(records)
+        monkeypatch.setattr(store, "add_many", locked_once)
+        writer = AttendanceWriter(store, flush_interval=0.05)
+        writer.submit("1", "Aluno 1", "10-03-2025", "08:00:00 AM")
+        deadline = time.monotonic() + 2.0
+        while not store.has("1", "10-03-2025") and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert writer.close() == 1 and failures == [True]
@@ -0,0 +1,87 @@
+from attendance_store import AttendanceRecord
+from attendance_view import AttendanceView
+
+
+class FakeTreeview:
+    """O mínimo da ttk.Treeview usado pela AttendanceView (sem Tk)."""
+
+    def __init__(self):
+        self.rows = {}
+        self.seen = None
+        self._next = 0
+
+    def insert(self, parent, index, text, values):
+        self._next += 1
+        item = f"I{self._next:03d}"
+        self.rows[item] = (text,) + tuple(values)
+        return item
+
+    def delete(self, *items):
+        for item in items:
+            del self.rows[item]
+
+    def get_children(self):
+        return tuple(self.rows)
+
+    def see(self, item):
+        self.seen = item
+
+
+class FakeWindow:
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, ms, callback):
+        self.scheduled.append((ms, callback))
+        return len(self.scheduled)
+
+    def after_cancel(self, after_id):
+        self.scheduled[after_id - 1] = None
+
+
+def _ids(treeview):
+    return [row[0] for row in treeview.rows.values()]
+
+
+def test_view_keeps_only_the_most_recent_rows():
+    treeview = FakeTreeview()
+    changes = []
+    view = AttendanceView(treeview, max_rows=3, on_change=lambda v: changes.append(v.total))
+    view.load_day("10-03-2025", [AttendanceRecord(str(i), f"Aluno {i}", "10-03-2025", "08:00:00 AM", i)
+                                 for i in range(5)])
+    assert _ids(treeview) == ["2", "3", "4"] and view.total == 5
+
+    for i in (5, 6, 3): # O 3 já está no dia: não entra de novo
+        view.push(i, f"Aluno {i}", "10-03-2025", "09:00:00 AM")
+    assert view.drain() == 2
+    assert _ids(treeview) == ["4", "5", "6"] and view.total == 7
+    assert treeview.rows[treeview.seen][0] == "6" # Rola até a presença mais nova
+    assert changes == [5, 7]
+
+
+def test_drain_inserts_at_most_one_batch_per_tick():
+    treeview, window = FakeTreeview(), FakeWindow()
+    view = AttendanceView(treeview, window, max_rows=100, poll_ms=250)
+    view.load_day("10-03-2025", [])
+    for i in range(7):
+        view.push(i, f"Aluno {i}", "10-03-2025", "08:00:00 AM")
+    assert view.drain(max_items=5) == 5 and view.drain(max_items=5) == 2
+
+    view.start()
+    view.start() # Já agendado: não agenda duas vezes
+    assert len(window.scheduled) == 1 and window.scheduled[0][0] == 250
+    view.push(7, "Aluno 7", "10-03-2025", "08:00:00 AM")
+    window.scheduled[0][1]() # O Tk chama o _tick, que lê a fila e se agenda de novo
+    assert view.total == 8 and len(window.scheduled) == 2
+    view.stop()
+    assert window.scheduled[1] is None
+
+
+def test_new_day_replaces_the_rows():
+    treeview = FakeTreeview()
+    view = AttendanceView(treeview, max_rows=3)
+    view.load_day("10-03-2025", [AttendanceRecord("1", "Ana", "10-03-2025", "11:59:00 PM", 0)])
+    view.push(1, "Ana", "11-03-2025", "00:01:00 AM") # Sessão passou da meia-noite
+    assert view.drain() == 1
+    assert view.date == "11-03-2025" and view.total == 1
+    assert list(treeview.rows.values()) == [("1", "Ana", "11-03-2025", "00:01:00 AM")]
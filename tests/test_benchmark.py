@@ -0,0 +1,15 @@
+import benchmark
+from frame_sources import SyntheticSource
+
+
+def test_pipeline_runs_the_recognition_engine():
+    recognizer, _ = benchmark.train_gallery_recognizer(3, 5)
+    source = SyntheticSource(640, 480, num_frames=12, face_images=[None, None])
+    result = benchmark.run_pipeline(source, recognizer, 10, tracking=True, downscale="auto", people=3)
+    assert result["frames"] == 10
+    assert result["faces_per_frame"] == 2.0
+    # Com rastreamento o motor só detecta a cada N quadros
+    assert result["detections_run"] < 10
+    # Etapas medidas pela instrumentação do próprio motor
+    for stage in ("capture", "gray", "detect", "predict", "lookup", "overlay", "frame"):
+        assert result["stages"][stage]["count"] > 0
@@ -0,0 +1,72 @@
+import os
+import subprocess
+import sys
+
+from deadline_scheduler import DeadlineScheduler
+
+
+def _scheduler():
+    clock = [0.0]
+    return DeadlineScheduler(clock=lambda: clock[0]), clock
+
+
+def test_extending_a_deadline_does_not_push_a_new_heap_entry():
+    scheduler, clock = _scheduler()
+    fired = []
+    timer = scheduler.timer(fired.append)
+    timer.extend(4)
+    for now in range(1, 30): # Rosto reconhecido a cada quadro: o prazo é adiado sempre
+        clock[0] = now * 0.1
+        timer.extend(4)
+        assert len(scheduler._heap) == 1
+    assert scheduler.run_due(4.0) == timer.when # A entrada antiga volta ao heap uma vez, no instante novo
+    assert not fired and len(scheduler._heap) == 1
+    scheduler.run_due(timer.when)
+    assert fired == [timer] and not scheduler._heap
+
+
+def test_cancel_then_rearm_fires_once_at_the_new_time():
+    scheduler, clock = _scheduler()
+    fired = []
+    timer = scheduler.timer(lambda t: fired.append(clock[0]))
+    timer.extend(5)
+    timer.cancel()
+    assert not timer.armed
+    timer.extend(8)
+    for now in (5.0, 7.9, 8.0, 8.1, 20.0):
+        clock[0] = now
+        scheduler.run_due()
+    assert fired == [8.0] and scheduler.fired == 1
+
+
+def test_doors_on_one_scheduler_fire_independently():
+    scheduler, clock = _scheduler()
+    fired = []
+    doors = {name: scheduler.timer(lambda t: fired.append(t.name), name) for name in ("porta1", "porta2", "porta3")}
+    doors["porta1"].extend(4)
+    doors["porta2"].extend(2)
+    doors["porta3"].extend(6)
+    doors["porta3"].cancel()
+    clock[0] = 1.0
+    doors["porta2"].extend(4) # Adiar uma porta não muda as outras
+    for now in (2.0, 4.0, 5.0, 10.0):
+        clock[0] = now
+        scheduler.run_due()
+    assert fired == ["porta1", "porta2"]
+    assert not any(timer.armed for timer in doors.values())
+
+
+def test_scheduler_thread_runs_without_tk():
+    code = (
+        "import sys, threading\n"
+        "from deadline_scheduler import DeadlineScheduler\n"
+        "done = threading.Event()\n"
+        "scheduler = DeadlineScheduler().start()\n"
+        "scheduler.timer(lambda t: done.set()).extend(0.05)\n"
+        "assert done.wait(2.0)\n"
+        "scheduler.stop()\n"
+        "assert 'tkinter' not in sys.modules\n"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, timeout=30)
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,84 @@
+import time
+
+from deadline_scheduler import DeadlineScheduler
+from door_controller import DoorController, MockSerialPort
+
+
+def _wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "tempo esgotado"
+        time.sleep(0.005)
+
+
+def _controller(**kwargs):
+    # Agendador sem thread e com relógio falso: o fechamento automático só vence quando o teste quer
+    clock = [0.0]
+    scheduler = DeadlineScheduler(clock=lambda: clock[0])
+    ports = []
+    def opener(port, baudrate):
+        ports.append(MockSerialPort())
+        return ports[-1]
+    controller = DoorController("mock", auto_close_seconds=4, boot_delay=0.0, opener=opener,
+                                scheduler=scheduler, **kwargs)
+    return controller, scheduler, clock, ports
+
+
+def test_redundant_opens_collapse_into_one_command():
+    controller, _, _, ports = _controller()
+    controller.start()
+    try:
+        assert controller.open() is True
+        for _ in range(29): # Mesmo rosto reconhecido a cada quadro
+            assert controller.open() is False
+        _wait_until(lambda: controller.commands_sent == 1)
+        time.sleep(0.05)
+    finally:
+        controller.stop(close_door=False)
+    assert ports[0].commands() == "O"
+    assert controller.requests == 30 and controller.commands_sent == 1
+
+
+def test_auto_close_sends_the_close_command_after_the_hold_time():
+    controller, scheduler, clock, ports = _controller()
+    controller.start()
+    try:
+        controller.open()
+        _wait_until(lambda: ports and ports[0].commands() == "O")
+        clock[0] = 2.0
+        controller.open() # Reabrir só adia o prazo
+        clock[0] = 4.5
+        scheduler.run_due()
+        assert controller.is_open # Ainda dentro dos 4s contados da segunda abertura
+        clock[0] = 6.0
+        scheduler.run_due()
+        _wait_until(lambda: ports[0].commands() == "OF")
+        assert not controller.is_open
+    finally:
+        controller.stop()
+    assert ports[0].commands() == "OF"
+
+
+def test_dropped_port_reconnects_in_the_background():
+    controller, _, _, ports = _controller(reconnect_interval=0.05)
+    controller.start()
+    try:
+        controller.open()
+        _wait_until(lambda: ports and ports[0].commands() == "O")
+        ports[0].fail_writes = True # Cabo desconectado
+        controller.close() # Volta na hora; a falha e a reconexão ficam na thread
+        _wait_until(lambda: len(ports) == 2 and ports[1].commands() == "F")
+        assert controller.connected and controller.last_error is None
+    finally:
+        controller.stop()
+    assert not ports[0].is_open
+
+
+def test_stop_closes_the_door_and_the_port():
+    controller, _, _, ports = _controller()
+    controller.start()
+    controller.open()
+    _wait_until(lambda: ports and ports[0].commands() == "O")
+    controller.stop()
+    assert ports[0].commands() == "OF"
+    assert not ports[0].is_open and not controller.connected
@@ -0,0 +1,67 @@
+import datetime
+import smtplib
+import time
+
+import pytest
+
+from email_outbox import EmailOutbox, EmailSettings, LocalSMTPServer, RESULT_SENT, RESULT_FAILED
+
+
+def _outbox(tmp_path, server):
+    settings = EmailSettings(address="escola@exemplo.com", smtp_server="127.0.0.1", smtp_port=server.port,
+                             use_tls=False)
+    return EmailOutbox(str(tmp_path / "Outbox"), settings)
+
+
+def test_partially_refused_job_reports_the_refused_addresses(tmp_path):
+    server = LocalSMTPServer().start()
+    server.refused = {"e@y.com"}
+    outbox = _outbox(tmp_path, server).start()
+    try:
+        outbox.enqueue(["d@y.com", "e@y.com"], "Presença", "Relatório")
+        job, status, error = outbox.results.get(timeout=10)
+    finally:
+        outbox.stop()
+        server.stop()
+    assert status == RESULT_SENT
+    assert job.delivered_to == ["d@y.com"]
+    assert job.refused == ["e@y.com"]
+    assert isinstance(error, smtplib.SMTPRecipientsRefused) and list(error.recipients) == ["e@y.com"]
+    assert [recipients for _, recipients, _ in server.messages] == [["d@y.com"]]
+
+
+def test_fully_refused_job_fails_without_retry(tmp_path):
+    server = LocalSMTPServer().start()
+    server.refused = {"d@y.com"}
+    outbox = _outbox(tmp_path, server).start()
+    try:
+        outbox.enqueue(["d@y.com"], "Presença", "Relatório")
+        job, status, error = outbox.results.get(timeout=10)
+    finally:
+        outbox.stop()
+        server.stop()
+    assert status == RESULT_FAILED
+    assert isinstance(error, smtplib.SMTPRecipientsRefused)
+    assert outbox.pending() == 0 and not server.messages
+
+
+def test_failed_daily_report_backs_off_instead_of_retrying_every_second(tmp_path):
+    settings = EmailSettings(address="escola@exemplo.com", smtp_server="127.0.0.1", smtp_port=1, use_tls=False)
+    outbox = EmailOutbox(str(tmp_path / "Outbox"), settings, retry_base=30, retry_max=3600)
+    calls = []
+    def build_job(day):
+        calls.append(day)
+        if len(calls) < 3:
+            raise OSError("planilha bloqueada")
+        return ["d@y.com"], "Presença", "Relatório", []
+    outbox.schedule_daily("00:00", build_job) # Horário de hoje já passou: sai na hora
+    assert outbox._daily_at <= time.time()
+
+    outbox._run_daily()
+    assert outbox._daily_at == pytest.approx(time.time() + 30, abs=5)
+    outbox._run_daily()
+    assert outbox._daily_at == pytest.approx(time.time() + 60, abs=5) # A espera dobra
+    outbox._run_daily()
+    assert outbox.pending() == 1
+    tomorrow = datetime.datetime.combine(datetime.date.today() + datetime.timedelta(days=1), datetime.time())
+    assert outbox._daily_at == tomorrow.timestamp() # Enfileirado: só no horário de amanhã
@@ -0,0 +1,54 @@
+import os
+
+import cv2
+import numpy as np
+
+from face_detection import FaceDetector, auto_detection_scale, DETECTION_MIN_BOX_PX, DETECTION_MIN_FACE_PX
+from face_tracking import box_iou
+from frame_sources import SyntheticSource
+from sample_capture import SampleQualityGate, REJECT_SMALL
+
+CASCADE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                       "haarcascade_frontalface_default.xml")
+
+
+def _gray_frames(width, height, faces, count=5):
+    source = SyntheticSource(width, height, num_frames=count, face_images=[None] * faces)
+    source.open()
+    frames = []
+    while True:
+        ret, frame = source.read()
+        if not ret:
+            return frames
+        frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+
+
+def test_auto_scale_keeps_the_smallest_face_above_the_haar_window():
+    assert auto_detection_scale((480, 640), (100, 100)) == 0.3
+    assert auto_detection_scale((480, 320), (100, 100)) == 0.5 # Nunca abaixo de 160 px de largura
+    assert auto_detection_scale((480, 640), (20, 20)) == 1.0
+
+
+def test_downscaled_detection_finds_the_same_faces():
+    full = FaceDetector(CASCADE, downscale=None)
+    fast = FaceDetector(CASCADE, downscale="auto")
+    for width, height, faces in ((640, 480, 2), (1280, 720, 1)):
+        for gray in _gray_frames(width, height, faces):
+            assert fast.scale_for(gray.shape) < 1.0
+            full_boxes, fast_boxes = full.detect(gray), fast.detect(gray)
+            assert len(full_boxes) == len(fast_boxes) == faces
+            for box in full_boxes:
+                assert max(box_iou(box, other) for other in fast_boxes) >= 0.8
+            for x, y, w, h in fast_boxes:
+                assert min(w, h) >= DETECTION_MIN_BOX_PX
+                assert x >= 0 and y >= 0 and x + w <= width and y + h <= height
+
+
+def test_capture_gate_accepts_every_box_size_the_detector_returns():
+    # Um rosto que o detector reduzido aceita (até 90% do minSize) não pode ser descartado como pequeno
+    assert DETECTION_MIN_BOX_PX < DETECTION_MIN_FACE_PX
+    gate = SampleQualityGate()
+    rng = np.random.default_rng(0)
+    crop = cv2.GaussianBlur(rng.integers(0, 256, (DETECTION_MIN_BOX_PX, DETECTION_MIN_BOX_PX), dtype=np.uint8), (3, 3), 0)
+    assert gate.evaluate(crop).reason != REJECT_SMALL
+    assert gate.evaluate(crop[1:, 1:]).reason == REJECT_SMALL
@@ -0,0 +1,71 @@
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from face_gallery import LBPHGallery, GALLERY_TOP_K, UNKNOWN_LABEL
+
+PHOTO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "background_image1.png")
+
+
+def _photo_crops(people=12, samples=8, seed=0, variation_seed=None):
+    # "Pessoas" são regiões de uma foto real; as amostras variam posição, escala e iluminação,
+    # e tudo é normalizado para 100x100 como nos arquivos .samples
+    gray = cv2.cvtColor(cv2.imread(PHOTO), cv2.COLOR_BGR2GRAY)
+    rng = np.random.default_rng(seed)
+    centers = [(rng.integers(300, gray.shape[1] - 300), rng.integers(300, gray.shape[0] - 300)) for _ in range(people)]
+    rng = np.random.default_rng(seed if variation_seed is None else variation_seed)
+    faces, labels = [], []
+    for person, (cx, cy) in enumerate(centers):
+        for _ in range(samples):
+            half = int(rng.integers(90, 140))
+            x, y = cx + int(rng.integers(-12, 13)), cy + int(rng.integers(-12, 13))
+            crop = cv2.resize(gray[y - half:y + half, x - half:x + half], (100, 100), interpolation=cv2.INTER_AREA)
+            faces.append(cv2.convertScaleAbs(crop, alpha=float(rng.uniform(0.8, 1.2)), beta=float(rng.uniform(-20, 20))))
+            labels.append(person + 1)
+    return faces, np.array(labels, dtype=np.int32)
+
+
+def test_default_search_is_exact():
+    assert GALLERY_TOP_K is None
+    assert LBPHGallery().top_k is None
+
+
+@pytest.mark.parametrize("threshold", [None, 65.0])
+def test_same_labels_and_distances_as_lbph(threshold):
+    faces, labels = _photo_crops()
+    queries, _ = _photo_crops(samples=3, seed=0, variation_seed=1) # Mesmas regiões, outras variações
+    duplicates = faces[::10] # Amostras idênticas às da galeria (distância zero)
+    strangers, _ = _photo_crops(people=6, samples=2, seed=7) # Regiões fora da galeria
+    recognizer = cv2.face.LBPHFaceRecognizer_create()
+    if threshold is not None:
+        recognizer.setThreshold(threshold)
+    recognizer.train(faces, labels)
+    gallery = LBPHGallery.from_recognizer(recognizer)
+
+    probes = queries + duplicates + strangers
+    expected = [recognizer.predict(face) for face in probes]
+    predicted = gallery.predict_batch(probes)
+    assert [label for label, _ in predicted] == [label for label, _ in expected]
+    for (_, distance), (_, expected_distance) in zip(predicted, expected):
+        assert distance == pytest.approx(expected_distance, rel=1e-4, abs=1e-3)
+    # Sozinho ou em lote, o mesmo resultado (a ordem das somas em float32 pode mudar o último dígito)
+    for (label, distance), (batch_label, batch_distance) in zip(map(gallery.predict, probes), predicted):
+        assert label == batch_label and distance == pytest.approx(batch_distance, rel=1e-4, abs=1e-3)
+    if threshold is not None:
+        assert UNKNOWN_LABEL in [label for label, _ in predicted]
+
+
+def test_batch_distance_matrix_keeps_the_first_sample_on_ties():
+    faces, labels = _photo_crops(people=4, samples=3)
+    gallery = LBPHGallery()
+    gallery.train(faces + faces, np.concatenate([labels, labels + 10])) # Cada amostra repetida com outro rótulo
+    queries = np.vstack([gallery.histogram(face)[None, :] for face in faces[:5]])
+
+    matrix = gallery.distance_matrix(queries)
+    assert matrix.shape == (5, len(gallery))
+    for row, query in zip(matrix, queries):
+        assert row == pytest.approx(gallery.all_distances(query), rel=1e-4, abs=1e-3)
+    # Empate exato entre a amostra e sua cópia: vence a primeira, como no LBPH
+    assert [label for label, _ in gallery.predict_batch(faces[:5])] == list(labels[:5])
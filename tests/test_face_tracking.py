@@ -0,0 +1,79 @@
+import numpy as np
+
+from face_tracking import FaceTracker
+
+
+def _frame_with_patch(patch, x, y, size=(240, 320)):
+    frame = np.full(size, 90, dtype=np.uint8)
+    if patch is not None:
+        frame[y:y + patch.shape[0], x:x + patch.shape[1]] = patch
+    return frame
+
+
+def _textured_patch(side=60, seed=1):
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 255, size=(side, side), dtype=np.uint8)
+
+
+def test_unmatched_track_follows_the_face_on_a_detection_frame():
+    tracker = FaceTracker(detect_every_n=1, max_missed_detections=1)
+    patch = _textured_patch()
+    tracks = tracker.update(_frame_with_patch(patch, 100, 80), lambda gray: [(100, 80, 60, 60)])
+    assert [t.box for t in tracks] == [(100, 80, 60, 60)]
+
+    # O detector falha, mas o rosto se moveu: a caixa devolvida é a nova, não a antiga
+    tracks = tracker.update(_frame_with_patch(patch, 112, 86), lambda gray: [])
+    assert len(tracks) == 1
+    assert tracks[0].box == (112, 86, 60, 60)
+
+
+def test_unmatched_track_that_cannot_be_followed_is_not_returned():
+    tracker = FaceTracker(detect_every_n=1, max_missed_detections=2)
+    patch = _textured_patch()
+    tracker.update(_frame_with_patch(patch, 100, 80), lambda gray: [(100, 80, 60, 60)])
+
+    # O rosto saiu da imagem: o rastro continua guardado (pode voltar a casar), mas não é um rosto ativo
+    assert tracker.update(_frame_with_patch(None, 0, 0), lambda gray: []) == []
+    assert len(tracker.tracks) == 1 and tracker.tracks[0].lost
+
+    tracks = tracker.update(_frame_with_patch(patch, 102, 80), lambda gray: [(102, 80, 60, 60)])
+    assert len(tracks) == 1 and not tracks[0].lost
+    assert tracks[0].track_id == tracker.tracks[0].track_id == 1
+
+
+def _voter_with_track():
+    from face_tracking import RecognitionVoter, Track
+    return RecognitionVoter(confidence_threshold=70, votes_required=5, majority_ratio=0.6,
+                            reverify_seconds=10, unknown_reverify_seconds=1.0), Track(1, (0, 0, 10, 10))
+
+
+def test_unknown_is_cached_briefly_and_a_registered_face_is_recognized_quickly():
+    voter, track = _voter_with_track()
+    predictions = iter([(3, 95.0)] * 3 + [(3, 40.0)] * 3) # Três quadros borrados e depois nítidos
+    labels = []
+    for now in (0.0, 0.1, 0.2, 0.3, 0.4, 1.2, 1.3, 1.4):
+        state = voter.recognize(track, lambda: next(predictions), now=now)
+        labels.append(state.label if state.confirmed else "verificando")
+
+    # "Desconhecido" fica em cache por 1s; a verificação seguinte reconhece a pessoa, não 10s depois
+    assert labels == ["verificando", "verificando", None, None, None, None, None, 3]
+    assert voter.predict_calls == 6 and voter.cache_hits == 2
+
+
+def test_stranger_does_not_cost_one_predict_per_frame():
+    voter, track = _voter_with_track()
+    for i in range(30): # 1s de vídeo a 30 fps
+        state = voter.recognize(track, lambda: (3, 95.0), now=i / 30)
+    assert state.confirmed and state.label is None
+    assert voter.predict_calls == 3 # Só os votos que confirmaram "Desconhecido"
+    voter.recognize(track, lambda: (3, 95.0), now=1.1)
+    assert voter.predict_calls == 4 # Vencido o intervalo curto, volta a verificar
+
+
+def test_confirmed_identity_is_cached_until_reverify():
+    voter, track = _voter_with_track()
+    for i in range(3):
+        voter.recognize(track, lambda: (7, 30.0), now=i * 0.1)
+    state = voter.recognize(track, lambda: (9, 30.0), now=1.0)
+    assert state.label == 7 and voter.cache_hits == 1
+    assert voter.needs_predict(state, now=0.2 + voter.reverify_seconds)
@@ -0,0 +1,112 @@
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from frame_sources import (FrameSource, ImageDirectorySource, SyntheticSource, ThreadedFrameReader,
+                           VideoFileSource, CameraSource, open_frame_source)
+
+
+class CountingSource(FrameSource):
+    """Fonte ao vivo que numera os quadros e só produz o próximo quando liberada."""
+    is_live = True
+
+    def __init__(self, total):
+        self.total = total
+        self.produced = 0
+        self.released = False
+        self.gate = threading.Semaphore(0)
+
+    def read(self):
+        if self.produced >= self.total:
+            return False, None
+        self.gate.acquire()
+        self.produced += 1
+        return True, np.full((4, 4, 3), self.produced, dtype=np.uint8)
+
+    def release(self):
+        self.released = True
+
+
+def test_open_frame_source_specs(tmp_path):
+    assert isinstance(open_frame_source(0), CameraSource)
+    assert isinstance(open_frame_source("1"), CameraSource)
+    synthetic = open_frame_source("synthetic:320x240:7")
+    assert (synthetic.width, synthetic.height, synthetic.num_frames) == (320, 240, 7)
+    assert isinstance(open_frame_source(str(tmp_path)), ImageDirectorySource)
+    assert isinstance(open_frame_source(str(tmp_path / "video.mp4")), VideoFileSource)
+
+
+def test_file_source_delivers_every_frame_in_order():
+    reader = ThreadedFrameReader(SyntheticSource(64, 48, num_frames=25), queue_size=2)
+    assert reader.start()
+    frames = []
+    while True:
+        ret, frame = reader.read(timeout=2.0)
+        if not ret:
+            break
+        frames.append(frame)
+    reader.stop()
+    assert len(frames) == 25
+    assert reader.frames_dropped == 0
+    assert reader.read() == (False, None) # Depois do fim continua devolvendo fim
+
+
+def test_live_source_returns_most_recent_frame():
+    source = CountingSource(total=5)
+    reader = ThreadedFrameReader(source, queue_size=2)
+    assert reader.start()
+    for _ in range(5):
+        source.gate.release()
+    deadline = time.monotonic() + 2.0
+    while source.produced < 5 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.05)
+    ret, frame = reader.read(timeout=1.0)
+    assert ret and frame[0, 0, 0] == 5 # Os quadros antigos foram descartados
+    assert reader.frames_dropped == 4
+    assert reader.read(timeout=1.0) == (False, None)
+    reader.stop()
+    assert source.released
+
+
+def test_read_nowait_distinguishes_empty_from_end():
+    source = CountingSource(total=1)
+    reader = ThreadedFrameReader(source)
+    assert reader.start()
+    assert reader.read_nowait() == (None, None) # Nada ainda
+    source.gate.release()
+    deadline = time.monotonic() + 2.0
+    result = (None, None)
+    while result[0] is None and time.monotonic() < deadline:
+        result = reader.read_nowait()
+        time.sleep(0.005)
+    assert result[0] is True
+    while result[0] is not False and time.monotonic() < deadline:
+        result = reader.read_nowait()
+        time.sleep(0.005)
+    assert result == (False, None)
+    reader.stop()
+
+
+def test_image_directory_skips_unreadable_files(tmp_path):
+    for i in range(3):
+        cv2.imwrite(str(tmp_path / f"{i}.png"), np.full((8, 8, 3), i * 50, dtype=np.uint8))
+    (tmp_path / "1b.png").write_bytes(b"not an image")
+    (tmp_path / "notes.txt").write_text("x")
+    with ThreadedFrameReader(str(tmp_path)) as reader:
+        assert reader.start()
+        values = []
+        while True:
+            ret, frame = reader.read(timeout=2.0)
+            if not ret:
+                break
+            values.append(int(frame[0, 0, 0]))
+    assert values == [0, 50, 100]
+
+
+def test_missing_sources_do_not_start(tmp_path):
+    assert not ThreadedFrameReader(str(tmp_path / "missing.mp4")).start()
+    assert not ThreadedFrameReader(ImageDirectorySource(os.path.join(str(tmp_path), "missing"))).start()
@@ -0,0 +1,63 @@
+import os
+
+import cv2
+import numpy as np
+
+import training
+from gallery_compaction import compact_training_set, select_prototypes
+
+
+def _faces(people, samples, seed=0):
+    # Cada pessoa alterna entre duas "poses" (padrões distintos), com ruído por amostra
+    rng = np.random.default_rng(seed)
+    faces, labels = [], []
+    for person in range(1, people + 1):
+        poses = [rng.integers(0, 256, (60, 60), dtype=np.uint8) for _ in range(2)]
+        for n in range(samples):
+            faces.append(cv2.add(poses[n % 2], rng.integers(0, 20, (60, 60), dtype=np.uint8)))
+            labels.append(person)
+    return faces, labels
+
+
+def test_prototypes_cover_every_cluster():
+    rng = np.random.default_rng(0)
+    centers = rng.random((3, 64)).astype(np.float32) * 10
+    histograms = np.vstack([centers[i % 3] + rng.random(64).astype(np.float32) * 0.1 for i in range(30)])
+    chosen = select_prototypes(histograms, 3)
+    assert len(chosen) == 3 and chosen == sorted(chosen)
+    assert sorted(i % 3 for i in chosen) == [0, 1, 2] # Um medoide por grupo
+    assert select_prototypes(histograms, 3) == chosen # Semente fixa: mesmo modelo sempre
+    assert select_prototypes(histograms[:2], 3) == [0, 1] # Menos amostras que k: todas ficam
+
+
+def test_compaction_keeps_k_samples_per_person_in_order():
+    faces, labels = _faces(3, 12)
+    faces, labels = faces + faces[:2], labels + [9, 9] # Uma pessoa com menos de k amostras
+    paths = [f"img{i}.jpg" for i in range(len(faces))]
+    calls = []
+    k_faces, k_labels, k_paths = compact_training_set(faces, labels, paths, k=4,
+                                                      progress=lambda done, total: calls.append((done, total)))
+    assert [k_labels.count(person) for person in (1, 2, 3, 9)] == [4, 4, 4, 2]
+    indices = [paths.index(path) for path in k_paths]
+    assert indices == sorted(indices) # Ordem original preservada
+    assert all(k_faces[j] is faces[i] and k_labels[j] == labels[i] for j, i in enumerate(indices))
+    assert calls == [(1, 4), (2, 4), (3, 4), (4, 4)]
+    # As duas poses de cada pessoa continuam representadas
+    for person in (1, 2, 3):
+        assert {i % 2 for i in indices if labels[i] == person} == {0, 1}
+
+    assert compact_training_set(faces, labels, paths, k=None) == (faces, labels, paths)
+
+
+def test_training_with_prototypes_stores_k_histograms_per_person(tmp_path):
+    image_dir = tmp_path / "images"
+    image_dir.mkdir()
+    faces, labels = _faces(3, 10)
+    for n, (face, person) in enumerate(zip(faces, labels)):
+        cv2.imwrite(os.path.join(str(image_dir), f"Pessoa{person}.{person}.{100 + person}.{n}.jpg"), face)
+    trainer_file = str(tmp_path / "Trainner.yml")
+    training.train_model(str(image_dir), trainer_file, str(tmp_path / "manifest.json"), prototypes_per_person=3)
+
+    recognizer = cv2.face.LBPHFaceRecognizer_create()
+    recognizer.read(trainer_file)
+    assert np.bincount(recognizer.getLabels().ravel()).tolist() == [0, 3, 3, 3]
@@ -0,0 +1,40 @@
+import csv
+
+from metrics import CsvMetricsExporter
+
+
+def _snapshot(stages=(), rates=None, timestamp=0.0):
+    stages = {stage: {"p50_ms": p50, "p95_ms": p50 * 2} for stage, p50 in stages}
+    return {"timestamp": timestamp, "fps": 30.0, "stages": stages, "values": {}, "rates": rates or {}}
+
+
+def _read_rows(path):
+    with open(path, newline='', encoding='utf-8') as csv_file:
+        return list(csv.DictReader(csv_file))
+
+
+def test_csv_columns_stay_aligned_when_stages_and_counters_appear_later(tmp_path):
+    path = str(tmp_path / "metrics.csv")
+    exporter = CsvMetricsExporter(path)
+    exporter.write(_snapshot([("detect", 5.0)], {"frames": 30.0}))
+    # predict e door_opens só aparecem depois do primeiro rosto reconhecido
+    exporter.write(_snapshot([("detect", 6.0), ("predict", 2.0)], {"frames": 30.0, "door_opens": 0.1}))
+    exporter.write(_snapshot([("detect", 7.0)], {"frames": 29.0}))
+
+    rows = _read_rows(path)
+    assert [row["detect_p50_ms"] for row in rows] == ["5.0", "6.0", "7.0"]
+    assert [row["predict_p50_ms"] for row in rows] == ["", "2.0", ""]
+    assert [row["door_opens_per_s"] for row in rows] == ["", "0.1", ""]
+    assert [row["frames_per_s"] for row in rows] == ["30.0", "30.0", "29.0"]
+
+
+def test_csv_exporter_reuses_the_header_of_an_existing_file(tmp_path):
+    path = str(tmp_path / "metrics.csv")
+    CsvMetricsExporter(path).write(_snapshot([("detect", 5.0), ("predict", 2.0)]))
+    # Nova sessão: as colunas saem em outra ordem e sem predict, mas seguem o cabeçalho do arquivo
+    CsvMetricsExporter(path).write(_snapshot([("detect", 4.0)], {"frames": 30.0}))
+
+    rows = _read_rows(path)
+    assert len(rows) == 2
+    assert rows[1]["detect_p50_ms"] == "4.0" and rows[1]["predict_p50_ms"] == ""
+    assert rows[0]["frames_per_s"] == "" and rows[1]["frames_per_s"] == "30.0"
@@ -0,0 +1,88 @@
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+import model_store
+from model_store import ModelFormatError, binary_model_path, convert_yaml_model, load_binary_model
+from recognition_engine import load_recognizer
+from face_gallery import LBPHGallery
+
+
+def _faces(people, samples, seed=0):
+    # Rostos sintéticos: um padrão por pessoa com ruído por amostra
+    rng = np.random.default_rng(seed)
+    faces, labels = [], []
+    for person in range(1, people + 1):
+        pattern = rng.integers(0, 256, (60, 60), dtype=np.uint8)
+        for _ in range(samples):
+            faces.append(cv2.add(pattern, rng.integers(0, 30, (60, 60), dtype=np.uint8)))
+            labels.append(person)
+    return faces, np.array(labels, dtype=np.int32)
+
+
+def _write_yaml_model(trainer_file, people, samples, seed=0):
+    recognizer = cv2.face.LBPHFaceRecognizer_create()
+    recognizer.setThreshold(80.0)
+    recognizer.train(*_faces(people, samples, seed))
+    recognizer.write(trainer_file)
+    return recognizer
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_convert_yaml_model_round_trip(tmp_path, mmap):
+    trainer_file = str(tmp_path / "Trainner.yml")
+    recognizer = _write_yaml_model(trainer_file, 3, 4)
+
+    assert convert_yaml_model(trainer_file) == binary_model_path(trainer_file)
+    model = load_binary_model(binary_model_path(trainer_file), mmap=mmap)
+    assert len(model) == 12
+    assert (model.radius, model.neighbors, model.grid_x, model.grid_y) == \
+        (recognizer.getRadius(), recognizer.getNeighbors(), recognizer.getGridX(), recognizer.getGridY())
+    assert model.threshold == 80.0
+    np.testing.assert_array_equal(model.labels, recognizer.getLabels().ravel())
+    np.testing.assert_array_equal(model.histograms, np.vstack([h.reshape(1, -1) for h in recognizer.getHistograms()]))
+
+
+@pytest.mark.parametrize("damage", ["magic", "version", "truncated"])
+def test_damaged_binary_model_is_rejected(tmp_path, damage):
+    trainer_file = str(tmp_path / "Trainner.yml")
+    _write_yaml_model(trainer_file, 2, 3)
+    binary_file = convert_yaml_model(trainer_file)
+    data = bytearray(open(binary_file, 'rb').read())
+    if damage == "magic":
+        data[:8] = b"XXXXXXXX"
+    elif damage == "version":
+        data[8:12] = (model_store.BINARY_MODEL_VERSION + 1).to_bytes(4, "little")
+    else:
+        data = data[:len(data) // 2]
+    open(binary_file, 'wb').write(bytes(data))
+
+    with pytest.raises(ModelFormatError):
+        load_binary_model(binary_file)
+    # O motor ignora a cópia inválida, lê o YAML e grava uma cópia nova
+    gallery = load_recognizer(trainer_file, "gallery")
+    assert isinstance(gallery, LBPHGallery) and len(gallery) == 6
+    assert len(load_binary_model(binary_file)) == 6
+
+
+def test_stale_binary_model_is_replaced_by_the_newer_yaml(tmp_path, monkeypatch):
+    trainer_file = str(tmp_path / "Trainner.yml")
+    _write_yaml_model(trainer_file, 2, 3)
+    binary_file = convert_yaml_model(trainer_file)
+    # Modelo retreinado com mais pessoas: a cópia binária ficou mais antiga que o YAML
+    _write_yaml_model(trainer_file, 4, 3, seed=1)
+    stamp = os.path.getmtime(trainer_file)
+    os.utime(binary_file, (stamp - 10, stamp - 10))
+
+    gallery = load_recognizer(trainer_file, "gallery")
+    assert len(gallery) == 12
+    assert len(load_binary_model(binary_file)) == 12
+    assert os.path.getmtime(binary_file) >= stamp
+
+    # Cópia em dia: aberta por mmap, sem ler o YAML
+    def no_yaml():
+        raise AssertionError("o Trainner.yml não deveria ser lido")
+    monkeypatch.setattr(cv2.face, "LBPHFaceRecognizer_create", no_yaml)
+    assert len(load_recognizer(trainer_file, "gallery")) == 12
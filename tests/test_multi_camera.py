@@ -0,0 +1,49 @@
+import os
+import time
+
+import multi_camera
+from attendance_store import AttendanceStore, AttendanceWriter
+from multi_camera import CameraConfig, CameraEvent, MultiCameraSupervisor, EVENT_ATTENDANCE, EVENT_ERROR
+
+
+def _dying_worker(config, engine_kwargs, trainer_file, event_queue, stop_event):
+    os._exit(3) # Sem EVENT_STOPPED, como uma falha nativa
+
+
+def _poll_until_stopped(supervisor, limit=10.0):
+    events = []
+    deadline = time.monotonic() + limit
+    while supervisor.running and time.monotonic() < deadline:
+        events.extend(supervisor.poll(timeout=0.05))
+    return events
+
+
+def test_worker_that_dies_silently_is_reported(monkeypatch):
+    monkeypatch.setattr(multi_camera, "load_recognizer", lambda *args: None)
+    monkeypatch.setattr(multi_camera, "_camera_worker", _dying_worker)
+    supervisor = MultiCameraSupervisor([CameraConfig("entrada", "synthetic", "porta1")], start_method="fork").start()
+    events = _poll_until_stopped(supervisor)
+    assert not supervisor.running
+    assert [(e.camera, e.kind, e.door) for e in events] == [("entrada", EVENT_ERROR, "porta1")]
+    assert "código 3" in events[0].data["message"]
+    supervisor.stop()
+
+
+def test_attendance_is_written_to_the_store(tmp_path):
+    store = AttendanceStore(str(tmp_path / "attendance.db"))
+    writer = AttendanceWriter(store, flush_interval=0.05)
+    supervisor = MultiCameraSupervisor([CameraConfig("entrada", "0"), CameraConfig("fundos", "1")],
+                                       attendance_writer=writer)
+    now = time.time()
+    for seq, camera in enumerate(("entrada", "fundos")): # A mesma pessoa nas duas câmeras
+        supervisor.event_queue.put(CameraEvent(now + seq, camera, seq, EVENT_ATTENDANCE, data={
+            "student_id": "101", "name": "Ana", "date": "17-10-2026", "time": "08:00:0%d AM" % seq}))
+    events = []
+    deadline = time.monotonic() + 5.0
+    while len(events) < 1 and time.monotonic() < deadline:
+        events.extend(supervisor.poll(timeout=0.05))
+    assert [e.camera for e in events] == ["entrada"]
+    assert writer.close() == 1
+    records = store.day("17-10-2026")
+    assert [(r.student_id, r.camera) for r in records] == [("101", "entrada")]
+    store.close()
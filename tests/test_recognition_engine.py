@@ -0,0 +1,123 @@
+import time
+
+import benchmark
+import recognition_engine
+from frame_sources import SyntheticSource
+from recognition_engine import EngineError, RecognitionEngine, STATUS_RECOGNIZED, STATUS_UNKNOWN
+from sample_archive import SAMPLE_CROP_SIZE
+
+
+class RecordingRecognizer:
+    """Guarda o tamanho de cada recorte que chega ao predict."""
+
+    def __init__(self, batch=False):
+        self.shapes = []
+        if batch:
+            self.predict_batch = lambda faces: [self.predict(face) for face in faces]
+
+    def predict(self, face):
+        self.shapes.append(face.shape)
+        return 1, 10.0
+
+
+def _run_engine(tmp_path, recognizer, faces, **kwargs):
+    student_csv = str(tmp_path / "StudentDetails.csv")
+    benchmark.write_gallery_students(student_csv, 1)
+    engine = RecognitionEngine(cascade_file=benchmark.HAARCASCADE_FILE, student_csv=student_csv,
+                               tracking=False, downscale=None, hot_reload=False, **kwargs).load(recognizer)
+    source = SyntheticSource(640, 480, num_frames=3, face_images=[None] * faces)
+    source.open()
+    results = []
+    while True:
+        ret, frame = source.read()
+        if not ret:
+            break
+        results.extend(engine.process_frame(frame))
+    return results
+
+
+def test_query_crops_match_the_archive_sample_size(tmp_path):
+    recognizer = RecordingRecognizer()
+    results = _run_engine(tmp_path, recognizer, faces=1)
+    assert results and all(result.status == STATUS_RECOGNIZED for result in results)
+    # A detecção acha o rosto de 160 px; o predict recebe o recorte no tamanho do treino
+    assert min(result.box[2] for result in results) > SAMPLE_CROP_SIZE
+    assert set(recognizer.shapes) == {(SAMPLE_CROP_SIZE, SAMPLE_CROP_SIZE)}
+
+
+def test_batched_query_crops_are_normalized_too(tmp_path):
+    recognizer = RecordingRecognizer(batch=True)
+    results = _run_engine(tmp_path, recognizer, faces=2)
+    assert len(results) >= 4
+    assert set(recognizer.shapes) == {(SAMPLE_CROP_SIZE, SAMPLE_CROP_SIZE)}
+
+
+def test_raw_crops_for_jpg_trained_models(tmp_path):
+    recognizer = RecordingRecognizer()
+    results = _run_engine(tmp_path, recognizer, faces=1, query_crop_size=None)
+    assert recognizer.shapes == [(result.box[3], result.box[2]) for result in results]
+
+
+class FixedRecognizer:
+    def __init__(self, label, confidence):
+        self.prediction = (label, confidence)
+
+    def predict(self, face):
+        return self.prediction
+
+
+def _hot_reload_engine(tmp_path):
+    student_csv = str(tmp_path / "StudentDetails.csv")
+    benchmark.write_gallery_students(student_csv, 1)
+    trainer_file = tmp_path / "Trainner.yml"
+    trainer_file.write_text("modelo antigo")
+    engine = RecognitionEngine(trainer_file=str(trainer_file), cascade_file=benchmark.HAARCASCADE_FILE,
+                               student_csv=student_csv, downscale=None, reload_check_seconds=0.0)
+    source = SyntheticSource(640, 480, num_frames=400, face_images=[None])
+    source.open()
+    return engine.load(FixedRecognizer(1, 99.0)), source, trainer_file # Modelo antigo: rosto desconhecido
+
+
+def _frames_until(engine, source, condition, limit=200):
+    for _ in range(limit):
+        ret, frame = source.read()
+        results = engine.process_frame(frame)
+        if condition(results):
+            return results
+        time.sleep(0.005) # A leitura do modelo novo acontece em outra thread
+    raise AssertionError("condição não atingida")
+
+
+def test_hot_reload_swaps_in_a_retrained_model_without_restarting(tmp_path, monkeypatch):
+    engine, source, trainer_file = _hot_reload_engine(tmp_path)
+    _frames_until(engine, source, lambda results: results and results[0].status == STATUS_UNKNOWN)
+
+    loads = []
+    def load_retrained(path, backend):
+        loads.append(path)
+        return FixedRecognizer(1, 10.0)
+    monkeypatch.setattr(recognition_engine, "load_recognizer", load_retrained)
+    trainer_file.write_text("modelo retreinado com a pessoa 1")
+    track_id = engine.tracker.tracks[0].track_id
+    _frames_until(engine, source, lambda results: engine.model_version == 1)
+    assert loads == [str(trainer_file)]
+    # O rosto que era "Desconhecido" vota de novo com o modelo novo logo em seguida, no mesmo rastro,
+    # sem esperar o cache do "Desconhecido" vencer
+    results = _frames_until(engine, source, lambda results: results and results[0].recognized, limit=3)
+    assert results[0].track_id == track_id
+
+
+def test_hot_reload_keeps_the_current_model_when_the_new_one_is_invalid(tmp_path, monkeypatch):
+    engine, source, trainer_file = _hot_reload_engine(tmp_path)
+    current = engine.recognizer
+    loads = []
+    def load_broken(path, backend):
+        loads.append(path)
+        raise EngineError('Erro no Modelo', 'arquivo truncado')
+    monkeypatch.setattr(recognition_engine, "load_recognizer", load_broken)
+    trainer_file.write_text("modelo pela metade")
+    _frames_until(engine, source, lambda results: loads and engine._reload_thread is None)
+    for _ in range(5):
+        engine.process_frame(source.read()[1])
+    assert engine.recognizer is current and engine.model_version == 0
+    assert len(loads) == 1 # Só tenta de novo quando o arquivo mudar outra vez
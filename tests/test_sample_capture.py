@@ -0,0 +1,102 @@
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from sample_archive import (SampleArchiveError, append_samples, normalize_crop, read_sample_archive,
+                            sample_archive_path, sample_paths, write_sample_archive, SAMPLE_CROP_SIZE)
+from sample_capture import (SampleQualityGate, SampleWriter, REJECT_BLURRY, REJECT_BRIGHT, REJECT_DARK,
+                            REJECT_DUPLICATE, REJECT_FLAT, REJECT_SMALL)
+from training_loader import load_training_set
+
+
+def _textured(seed, size=160, low=40, high=220):
+    # Textura com detalhes finos (nítida) e tons médios
+    rng = np.random.default_rng(seed)
+    small = rng.integers(low, high, (size // 4, size // 4), dtype=np.uint8)
+    return cv2.resize(small, (size, size), interpolation=cv2.INTER_NEAREST)
+
+
+def test_quality_gate_rejects_bad_and_repeated_crops():
+    gate = SampleQualityGate(target_samples=3)
+    gradient = np.tile(np.linspace(0, 255, 160, dtype=np.uint8), (160, 1)) # Contraste alto, sem detalhes
+    offers = {
+        REJECT_SMALL: _textured(1, size=60),
+        REJECT_DARK: _textured(2, low=0, high=40),
+        REJECT_BRIGHT: _textured(3, low=215, high=255),
+        REJECT_FLAT: _textured(4, low=120, high=135),
+        REJECT_BLURRY: gradient,
+    }
+    for reason, crop in offers.items():
+        assert gate.offer(crop).reason == reason
+
+    first = _textured(10)
+    assert gate.offer(first).acceptable
+    assert gate.offer(cv2.add(first, 2)).reason == REJECT_DUPLICATE # Mesmo rosto, quadro seguinte
+    assert gate.offer(_textured(11)).acceptable and gate.offer(_textured(12)).acceptable
+    assert gate.done and gate.accepted == 3
+    assert gate.offer(_textured(13)).acceptable and gate.accepted == 3 # Meta atingida: nada mais entra
+    assert gate.rejected == {reason: 1 for reason in list(offers) + [REJECT_DUPLICATE]}
+
+
+def test_sample_writer_appends_to_the_person_archive(tmp_path):
+    path = sample_archive_path(str(tmp_path), "Ana", 7, "123")
+    crops = [_textured(seed, size=120 + seed * 10) for seed in range(4)] # Tamanhos diferentes da detecção
+    with SampleWriter(path, serial=7, student_id="123", name="Ana") as writer:
+        for crop in crops[:3]:
+            writer.submit(crop)
+    assert writer.written == 3 and not writer.errors
+    with SampleWriter(path) as writer: # Nova captura da mesma pessoa: acrescenta
+        writer.submit(crops[3])
+
+    archive = read_sample_archive(path)
+    assert (archive.serial, archive.student_id, archive.name, archive.count) == (7, "123", "Ana", 4)
+    assert archive.samples.shape == (4, SAMPLE_CROP_SIZE, SAMPLE_CROP_SIZE)
+    for sample, crop in zip(archive.samples, crops):
+        np.testing.assert_array_equal(sample, normalize_crop(crop))
+
+
+def test_sample_writer_writes_jpgs_without_an_archive(tmp_path):
+    paths = [str(tmp_path / f"Ana.7.123.{n}.jpg") for n in range(1, 3)]
+    with SampleWriter() as writer:
+        for n, path in enumerate(paths):
+            writer.submit(_textured(n), path)
+        writer.submit(_textured(9), str(tmp_path / "sem_extensao"))
+    assert writer.written == 2 and len(writer.errors) == 1
+    assert all(os.path.isfile(path) for path in paths)
+
+
+def test_archive_ignores_an_interrupted_append_and_rejects_truncation(tmp_path):
+    path = str(tmp_path / "Ana.7.123.samples")
+    write_sample_archive(path, 7, "123", "Ana", [_textured(0), _textured(1)])
+    with open(path, 'ab') as archive_file:
+        archive_file.write(b"\x01" * 500) # Queda no meio de um acréscimo: pixels sem o contador
+    assert read_sample_archive(path).count == 2
+    assert append_samples(path, [_textured(2)]) == 1
+    assert read_sample_archive(path).count == 3
+
+    with pytest.raises(SampleArchiveError):
+        append_samples(str(tmp_path / "Novo.8.9.samples"), [_textured(3)]) # Sem serial para criar
+    data = open(path, 'rb').read()
+    open(path, 'wb').write(data[:len(data) - SAMPLE_CROP_SIZE])
+    with pytest.raises(SampleArchiveError):
+        read_sample_archive(path)
+
+
+def test_archived_and_cached_samples_load_like_the_originals(tmp_path):
+    image_dir, cache_dir = tmp_path / "images", str(tmp_path / "cache")
+    image_dir.mkdir()
+    archive = sample_archive_path(str(image_dir), "Ana", 7, "123")
+    write_sample_archive(archive, 7, "123", "Ana", [_textured(0), _textured(1)])
+    jpg = str(image_dir / "Bia.8.456.1.jpg")
+    cv2.imwrite(jpg, _textured(2, size=100))
+    paths = sample_paths(archive) + [jpg]
+
+    faces, labels, loaded, stats = load_training_set(paths, cache_dir, workers=1)
+    assert labels == [7, 7, 8] and loaded == paths and (stats.archived, stats.decoded) == (2, 1)
+    # Segunda carga: o JPG vem do cache, com os mesmos pixels
+    cached_faces, cached_labels, _, stats = load_training_set(paths, cache_dir, workers=1)
+    assert cached_labels == labels and (stats.archived, stats.cache_hits, stats.decoded) == (2, 1, 0)
+    for face, cached in zip(faces, cached_faces):
+        np.testing.assert_array_equal(face, cached)
@@ -0,0 +1,59 @@
+import os
+
+from student_registry import StudentRegistry
+
+HEADER = "SERIAL NO.,ID,NAME\n"
+
+
+def _write(path, rows, mode="w"):
+    with open(path, mode, newline='') as csv_file:
+        if mode == "w":
+            csv_file.write(HEADER)
+        for serial_no, student_id, name in rows:
+            csv_file.write(f"{serial_no},{student_id},{name}\n")
+
+
+def _bump_mtime(path, seconds):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + int(seconds * 1e9)))
+
+
+def test_appended_rows_are_indexed(tmp_path):
+    path = str(tmp_path / "StudentDetails.csv")
+    _write(path, [(1, 10, "Ana"), (2, 20, "Bruno")])
+    registry = StudentRegistry(path)
+    assert registry.refresh()
+    _write(path, [(3, 30, "Carla")], mode="a")
+    _bump_mtime(path, 1)
+    assert registry.refresh()
+    assert [r.name for r in registry.records] == ["Ana", "Bruno", "Carla"]
+    assert registry.by_id("30").serial_no == 3
+    assert not registry.refresh() # Nada mudou
+
+
+def test_recreated_file_larger_than_the_old_one_is_fully_reloaded(tmp_path):
+    path = str(tmp_path / "StudentDetails.csv")
+    _write(path, [(1, 10, "Ana"), (2, 20, "Bruno")])
+    registry = StudentRegistry(path)
+    registry.refresh()
+
+    # "Excluir Registros CSV" e um novo cadastro: seriais recomeçam em 1 e o arquivo já passou do tamanho antigo
+    os.remove(path)
+    _write(path, [(1, 77, "Zilda"), (2, 88, "Yuri"), (3, 99, "Xavier"), (4, 66, "Wagner")])
+    _bump_mtime(path, 2)
+    assert registry.refresh()
+    assert [(r.serial_no, r.name) for r in registry.records] == [(1, "Zilda"), (2, "Yuri"), (3, "Xavier"), (4, "Wagner")]
+    assert registry.by_serial(1).name == "Zilda"
+    assert registry.by_id("10") is None
+
+
+def test_rewritten_prefix_in_place_is_fully_reloaded(tmp_path):
+    path = str(tmp_path / "StudentDetails.csv")
+    _write(path, [(1, 10, "Ana"), (2, 20, "Bruno")])
+    registry = StudentRegistry(path)
+    registry.refresh()
+    with open(path, "r+", newline='') as csv_file: # Mesmo inode, mesmo tamanho inicial, conteúdo diferente
+        csv_file.write(HEADER + "1,11,Ena\n2,21,Bruna\n3,31,Caio\n")
+    _bump_mtime(path, 3)
+    registry.refresh()
+    assert [r.name for r in registry.records] == ["Ena", "Bruna", "Caio"]
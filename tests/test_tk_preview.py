@@ -0,0 +1,53 @@
+import time
+
+from tk_preview import CameraLoop, SESSION_END_OF_STREAM
+
+
+class ManualWindow:
+    """Substitui o window.after do Tk: os callbacks rodam quando o teste chama run_pending()."""
+
+    def __init__(self):
+        self.pending = []
+
+    def after(self, ms, callback):
+        self.pending.append(callback)
+        return len(self.pending)
+
+    def after_cancel(self, after_id):
+        pass
+
+    def run_pending(self):
+        callbacks, self.pending = self.pending, []
+        for callback in callbacks:
+            callback()
+
+
+class ScriptedCamera:
+    def __init__(self, reads):
+        self.reads = list(reads)
+        self.stopped = False
+
+    def read_nowait(self):
+        return self.reads.pop(0) if self.reads else (False, None)
+
+    def stop(self):
+        self.stopped = True
+
+
+def test_waiting_since_measures_the_wait_for_each_frame():
+    window = ManualWindow()
+    cam = ScriptedCamera([(None, None), (True, "q1"), (None, None), (True, "q2")])
+    waits, reasons = [], []
+
+    def on_frame(frame):
+        waits.append((frame, time.perf_counter() - loop.waiting_since))
+        time.sleep(0.06) # Processamento do quadro: não conta como espera do próximo
+
+    loop = CameraLoop(window, cam, on_frame, reasons.append).start()
+    for _ in range(6):
+        time.sleep(0.01)
+        window.run_pending()
+    assert [frame for frame, _ in waits] == ["q1", "q2"]
+    # Cada quadro esperou dois ticks (~20 ms), sem somar os 60 ms de processamento do anterior
+    assert all(0.015 <= wait < 0.05 for _, wait in waits)
+    assert reasons == [SESSION_END_OF_STREAM] and cam.stopped
@@ -0,0 +1,62 @@
+import os
+
+import cv2
+import numpy as np
+
+import training
+
+
+def _write_faces(image_dir, serial_no, count, first=1, seed=0):
+    # Rostos sintéticos: ruído com um padrão próprio por pessoa
+    rng = np.random.default_rng(seed + serial_no)
+    pattern = rng.integers(0, 256, (60, 60), dtype=np.uint8)
+    for n in range(first, first + count):
+        noise = rng.integers(0, 30, (60, 60), dtype=np.uint8)
+        cv2.imwrite(os.path.join(image_dir, f"Pessoa{serial_no}.{serial_no}.{100 + serial_no}.{n}.jpg"),
+                    cv2.add(pattern, noise))
+
+
+def _train(tmp_path, **kwargs):
+    return training.train_model(str(tmp_path / "images"), str(tmp_path / "Trainner.yml"),
+                                str(tmp_path / "manifest.json"), **kwargs)
+
+
+def test_failed_manifest_save_removes_stale_manifest(tmp_path, monkeypatch):
+    image_dir = tmp_path / "images"
+    image_dir.mkdir()
+    _write_faces(str(image_dir), 1, 4)
+    assert _train(tmp_path).mode == "full"
+    assert (tmp_path / "manifest.json").exists()
+
+    _write_faces(str(image_dir), 2, 4)
+    def failing_save(*args, **kwargs):
+        raise OSError("disco cheio")
+    with monkeypatch.context() as patched:
+        patched.setattr(training, "save_manifest", failing_save)
+        assert _train(tmp_path).mode == "incremental"
+    # O manifesto antigo não lista as imagens da pessoa 2, que já estão no modelo
+    assert not (tmp_path / "manifest.json").exists()
+
+    # Sem manifesto, o próximo treinamento refaz o modelo em vez de somar as imagens de novo
+    result = _train(tmp_path)
+    assert result.mode == "full"
+    recognizer = cv2.face.LBPHFaceRecognizer_create()
+    recognizer.read(str(tmp_path / "Trainner.yml"))
+    assert len(recognizer.getHistograms()) == 8
+
+
+def test_incremental_load_keeps_cached_crops(tmp_path, capsys):
+    image_dir = tmp_path / "images"
+    image_dir.mkdir()
+    cache_dir = str(tmp_path / "cache")
+    for serial_no in range(1, 5):
+        _write_faces(str(image_dir), serial_no, 5)
+    assert _train(tmp_path, cache_dir=cache_dir).mode == "full"
+
+    _write_faces(str(image_dir), 5, 5)
+    assert _train(tmp_path, cache_dir=cache_dir).mode == "incremental"
+
+    # A carga incremental (só as 5 novas) não pode descartar as 20 já em cache
+    capsys.readouterr()
+    training.load_images_and_labels(training.list_training_images(str(image_dir)), cache_dir)
+    assert "cache: 25, decodificadas: 0" in capsys.readouterr().out
@@ -0,0 +1,54 @@
+import os
+import time
+
+import cv2
+import numpy as np
+
+from training import model_tmp_path
+from training_worker import BackgroundTrainer, MESSAGE_CANCELLED, MESSAGE_DONE, MESSAGE_PROGRESS
+
+
+def _write_faces(image_dir, people, samples):
+    rng = np.random.default_rng(0)
+    for serial_no in range(1, people + 1):
+        pattern = rng.integers(0, 256, (60, 60), dtype=np.uint8)
+        for n in range(1, samples + 1):
+            cv2.imwrite(os.path.join(image_dir, f"Pessoa{serial_no}.{serial_no}.{100 + serial_no}.{n}.jpg"),
+                        cv2.add(pattern, rng.integers(0, 30, (60, 60), dtype=np.uint8)))
+
+
+def _trainer(tmp_path, people, samples):
+    image_dir = tmp_path / "images"
+    image_dir.mkdir()
+    _write_faces(str(image_dir), people, samples)
+    return BackgroundTrainer(image_dir=str(image_dir), trainer_file=str(tmp_path / "Trainner.yml"),
+                             manifest_file=str(tmp_path / "manifest.json"))
+
+
+def _poll_until_finished(trainer, timeout=60.0):
+    messages = []
+    deadline = time.monotonic() + timeout
+    while trainer.running:
+        assert time.monotonic() < deadline, "o treinamento não terminou"
+        messages.extend(trainer.poll())
+        time.sleep(0.02)
+    return messages
+
+
+def test_background_training_reports_progress_and_result(tmp_path):
+    trainer = _trainer(tmp_path, 3, 5).start()
+    messages = _poll_until_finished(trainer)
+    assert messages[-1] == (MESSAGE_DONE, "full", 15, 15, 3)
+    assert all(message[0] == MESSAGE_PROGRESS for message in messages[:-1])
+    assert os.path.isfile(str(tmp_path / "Trainner.yml"))
+
+
+def test_cancelled_training_leaves_no_model(tmp_path):
+    trainer = _trainer(tmp_path, 10, 20).start()
+    trainer.cancel() # Antes do primeiro ponto de progresso: o processo para sem gravar nada
+    messages = _poll_until_finished(trainer)
+    assert messages[-1] == (MESSAGE_CANCELLED,)
+    trainer_file = str(tmp_path / "Trainner.yml")
+    assert not os.path.exists(trainer_file) and not os.path.exists(model_tmp_path(trainer_file))
+    assert not os.path.exists(str(tmp_path / "manifest.json"))
+    assert not trainer.process.is_alive()
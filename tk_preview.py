@@ -0,0 +1,151 @@
+############################################# IMPORTING ################################################
+import time
+import cv2
+import numpy as np
+from PIL import Image, ImageTk
+
+from frame_sources import FRAME_READ_TIMEOUT_SECONDS
+
+############################################# CONSTANTS ################################################
+PREVIEW_MAX_FPS = 15 # Atualizações por segundo da imagem na janela (o processamento segue no ritmo da câmera)
+PREVIEW_MAX_WIDTH = 540 # Largura máxima da pré-visualização; o quadro é reduzido uma única vez
+CAMERA_LOOP_TICK_MS = 5 # Intervalo entre verificações de quadro novo no loop do Tk
+
+SESSION_DONE = "done" # O processamento pediu para parar (ex.: amostras completas)
+SESSION_STOPPED = "stopped" # Parado pelo usuário
+SESSION_END_OF_STREAM = "end" # A fonte de vídeo terminou
+SESSION_CAMERA_ERROR = "camera_error" # Nenhum quadro dentro do tempo limite
+
+############################################# PREVIEW ##################################################
+
+class TkPreview:
+    """
+    Mostra quadros da câmera em um tk.Label. O quadro é reduzido uma vez para no máximo
+    max_width de largura, as sobreposições são desenhadas já no quadro reduzido e a imagem
+    vai para um único PhotoImage reaproveitado (paste), sem criar objetos Tk por quadro.
+    Quadros que chegam antes de 1/max_fps desde a última exibição são ignorados.
+    Com enabled=False nada é desenhado (quiosques sem monitor).
+    """
+
+    def __init__(self, label, max_width=PREVIEW_MAX_WIDTH, max_fps=PREVIEW_MAX_FPS, enabled=True):
+        self.label = label
+        self.max_width = max_width
+        self.min_interval = 1.0 / max_fps if max_fps else 0.0
+        self.enabled = enabled
+        self.frames_shown = 0
+        self._next_time = 0.0
+        self._size = None
+        self._bgr = None # Quadro reduzido, onde as sobreposições são desenhadas
+        self._rgb = None
+        self._photo = None
+
+    def due(self):
+        """True se o próximo quadro será exibido (para pular o trabalho de preparar os que não serão)."""
+        return self.enabled and time.monotonic() >= self._next_time
+
+    def show(self, frame, draw=None):
+        """
+        Exibe o quadro (BGR) se estiver na hora. draw(imagem_reduzida, escala), se informado,
+        desenha sobre a cópia reduzida. Retorna True se o quadro foi exibido.
+        """
+        if not self.due():
+            return False
+        self._next_time = time.monotonic() + self.min_interval
+        height, width = frame.shape[:2]
+        scale = min(1.0, self.max_width / float(width))
+        size = (max(1, int(round(width * scale))), max(1, int(round(height * scale))))
+        if size != self._size:
+            self._size = size
+            self._bgr = np.empty((size[1], size[0], 3), dtype=np.uint8)
+            self._rgb = np.empty_like(self._bgr)
+            self._photo = ImageTk.PhotoImage(Image.new("RGB", size))
+            self.label.configure(image=self._photo)
+            self.label.image = self._photo # Mantém a referência (o Tk não guarda a imagem)
+        if scale < 1.0:
+            cv2.resize(frame, size, dst=self._bgr, interpolation=cv2.INTER_AREA)
+        else:
+            np.copyto(self._bgr, frame)
+        if draw is not None:
+            draw(self._bgr, scale)
+        cv2.cvtColor(self._bgr, cv2.COLOR_BGR2RGB, dst=self._rgb)
+        self._photo.paste(Image.fromarray(self._rgb))
+        self.frames_shown += 1
+        return True
+
+    def clear(self):
+        self.label.configure(image="")
+        self.label.image = None
+        self._size = self._bgr = self._rgb = self._photo = None
+
+############################################# CAMERA LOOP ##############################################
+
+class CameraLoop:
+    """
+    Substitui o "while True" com cv2.imshow/waitKey: a cada tick do window.after pega o quadro
+    mais recente do ThreadedFrameReader sem esperar e chama on_frame(frame). A janela do Tk
+    continua respondendo entre um quadro e outro.
+    on_frame devolve False para encerrar; on_finish(motivo) é chamado uma única vez, depois
+    de a câmera ser liberada (motivos: SESSION_DONE, SESSION_STOPPED, SESSION_END_OF_STREAM,
+    SESSION_CAMERA_ERROR).
+    waiting_since (time.perf_counter) marca quando o loop passou a esperar o quadro atual:
+    dentro de on_frame, o tempo desde então é a espera pela câmera (etapa "capture").
+    """
+
+    def __init__(self, window, cam, on_frame, on_finish, tick_ms=CAMERA_LOOP_TICK_MS,
+                 read_timeout=FRAME_READ_TIMEOUT_SECONDS):
+        self.window = window
+        self.cam = cam
+        self.on_frame = on_frame
+        self.on_finish = on_finish
+        self.tick_ms = tick_ms
+        self.read_timeout = read_timeout
+        self.running = False
+        self._after_id = None
+        self._last_frame_time = None
+        self.waiting_since = None
+
+    def start(self):
+        self.running = True
+        self._last_frame_time = time.monotonic()
+        self.waiting_since = time.perf_counter()
+        self._after_id = self.window.after(0, self._tick)
+        return self
+
+    def stop(self, reason=SESSION_STOPPED):
+        """Encerra o loop (seguro para chamar de dentro de on_frame ou de um botão)."""
+        if not self.running:
+            return
+        self.running = False
+        if self._after_id is not None:
+            try:
+                self.window.after_cancel(self._after_id)
+            except Exception: # Janela já destruída
+                pass
+            self._after_id = None
+        self.cam.stop()
+        self.on_finish(reason)
+
+    def _tick(self):
+        self._after_id = None
+        if not self.running:
+            return
+        try:
+            ret, frame = self.cam.read_nowait()
+            if ret is None:
+                if time.monotonic() - self._last_frame_time > self.read_timeout:
+                    self.stop(SESSION_CAMERA_ERROR)
+                    return
+            elif not ret:
+                self.stop(SESSION_END_OF_STREAM)
+                return
+            else:
+                self._last_frame_time = time.monotonic()
+                if self.on_frame(frame) is False:
+                    self.stop(SESSION_DONE)
+                    return
+                self.waiting_since = time.perf_counter() # A espera pelo próximo quadro começa aqui
+        except Exception:
+            self.stop(SESSION_CAMERA_ERROR)
+            raise
+        if self.running:
+            self._after_id = self.window.after(self.tick_ms, self._tick)
@@ -0,0 +1,267 @@
+############################################# IMPORTING ################################################
+import json
+import os
+import cv2
+import numpy as np
+
+from gallery_compaction import compact_training_set
+from model_store import save_recognizer_binary
+from sample_archive import is_sample_archive, sample_paths, split_sample_path, sample_signature, SampleArchiveError
+from training_loader import load_training_set
+
+############################################# CONSTANTS ################################################
+TRAINING_IMAGE_EXTENSIONS = ('.jpg', '.png', '.jpeg')
+MANIFEST_FORMAT_VERSION = 1
+
+############################################# EXCEPTIONS ###############################################
+
+class TrainingError(Exception):
+    """Erro de treinamento com mensagem pronta para ser exibida ao usuário."""
+
+    def __init__(self, title, message):
+        super().__init__(message)
+        self.title = title
+        self.message = message
+
+
+class TrainingCancelled(TrainingError):
+    """Treinamento interrompido a pedido do usuário; o modelo anterior continua intacto."""
+
+    def __init__(self):
+        super().__init__('Treinamento Cancelado', 'O treinamento foi cancelado. O modelo anterior foi mantido.')
+
+############################################# TRAINING DATA ############################################
+
+def list_training_images(path_to_images):
+    """
+    Lista as amostras de treinamento da pasta (caminhos completos, em ordem): os arquivos de
+    imagem soltos e cada amostra dos arquivos .samples, como "arquivo#i" (ver sample_archive).
+    """
+    if not os.path.isdir(path_to_images):
+        return []
+    paths = []
+    for filename in sorted(os.listdir(path_to_images)):
+        path = os.path.join(path_to_images, filename)
+        if filename.lower().endswith(TRAINING_IMAGE_EXTENSIONS):
+            paths.append(path)
+        elif is_sample_archive(filename):
+            try:
+                paths.extend(sample_paths(path))
+            except (OSError, SampleArchiveError) as e:
+                print(f"Aviso: {e} Pulando.")
+    return paths
+
+
+def load_images_and_labels(image_paths, cache_dir=None, progress=None, live_paths=None):
+    """
+    Carrega as imagens em tons de cinza e os seriais correspondentes, pulando arquivos inválidos.
+    Com cache_dir, recortes já decodificados em treinamentos anteriores vêm do cache binário;
+    live_paths (padrão: image_paths) diz quais entradas do cache continuam válidas.
+    progress(feitas, total) acompanha o carregamento (ver training_loader.load_training_set).
+    """
+    faces, serial_ids, loaded_paths, stats = load_training_set(image_paths, cache_dir=cache_dir, progress=progress,
+                                                               live_paths=live_paths)
+    print(f"Conjunto de treinamento: {stats.describe()}")
+    return faces, serial_ids, loaded_paths
+
+############################################# MANIFEST #################################################
+
+def _file_signature(image_path):
+    if split_sample_path(image_path) is not None:
+        size, created_ns = sample_signature(image_path)
+        return {"size": size, "mtime_ns": created_ns}
+    st = os.stat(image_path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def load_manifest(manifest_file):
+    """
+    Lê o manifesto que lista quais arquivos já estão no modelo.
+    Retorna None se não existir ou estiver em formato incompatível.
+    """
+    if not os.path.isfile(manifest_file):
+        return None
+    try:
+        with open(manifest_file, 'r', encoding='utf-8') as mf:
+            manifest = json.load(mf)
+    except (OSError, ValueError) as e:
+        print(f"Aviso: Manifesto de treinamento ilegível ({e}). Será feito um treinamento completo.")
+        return None
+    if manifest.get("version") != MANIFEST_FORMAT_VERSION or not isinstance(manifest.get("files"), dict):
+        return None
+    return manifest
+
+
+def _discard_stale_manifest(manifest_file):
+    """
+    O manifesto antigo não descreve o modelo recém-salvo: mantido, o próximo treinamento
+    incremental somaria de novo as mesmas imagens. Sem ele, o próximo treinamento é completo.
+    """
+    try:
+        os.remove(manifest_file)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        raise TrainingError('Erro ao Salvar',
+                            f'O modelo foi salvo, mas o manifesto {os.path.basename(manifest_file)} ficou '
+                            f'desatualizado e não pôde ser removido: {e}\nApague-o antes do próximo treinamento.')
+
+
+def save_manifest(manifest_file, files, prototypes_per_person=None):
+    manifest = {"version": MANIFEST_FORMAT_VERSION, "files": files, "prototypes_per_person": prototypes_per_person}
+    tmp_path = manifest_file + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as mf:
+        json.dump(manifest, mf, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, manifest_file)
+
+
+def model_tmp_path(trainer_file):
+    """Arquivo temporário onde o modelo é gravado antes do os.replace (Trainner.yml -> Trainner.tmp.yml)."""
+    base, ext = os.path.splitext(trainer_file)
+    return f"{base}.tmp{ext}"
+
+
+def _save_model_atomically(recognizer, trainer_file):
+    # Grava em arquivo temporário e troca de uma vez: quem lê nunca vê um modelo pela metade
+    tmp_path = model_tmp_path(trainer_file)
+    recognizer.save(tmp_path)
+    os.replace(tmp_path, trainer_file)
+
+
+############################################# TRAINING #################################################
+
+class TrainingResult:
+    __slots__ = ("mode", "images_added", "total_images", "unique_ids")
+
+    def __init__(self, mode, images_added, total_images, unique_ids):
+        self.mode = mode # "full", "incremental" ou "up_to_date"
+        self.images_added = images_added
+        self.total_images = total_images
+        self.unique_ids = unique_ids
+
+
+def plan_incremental_update(image_paths, manifest):
+    """
+    Compara a pasta com o manifesto. Retorna a lista de arquivos novos, ou None quando
+    o modelo não pode ser atualizado incrementalmente (imagens removidas ou alteradas,
+    pois o LBPH não permite retirar amostras).
+    """
+    if manifest is None:
+        return None
+    known_files = manifest["files"]
+    current_names = set()
+    new_paths = []
+    for image_path in image_paths:
+        filename = os.path.basename(image_path)
+        current_names.add(filename)
+        entry = known_files.get(filename)
+        if entry is None:
+            new_paths.append(image_path)
+        elif {"size": entry.get("size"), "mtime_ns": entry.get("mtime_ns")} != _file_signature(image_path):
+            return None
+    if any(name not in current_names for name in known_files):
+        return None
+    return new_paths
+
+
+def _manifest_entries(paths, labels):
+    return {os.path.basename(path): dict(label=int(label), **_file_signature(path))
+            for path, label in zip(paths, labels)}
+
+
+def train_model(image_dir, trainer_file, manifest_file, full_retrain=False, cache_dir=None,
+                prototypes_per_person=None, binary_model_file=None, progress=None):
+    """
+    Treina o reconhecedor LBPH. Por padrão carrega o Trainner.yml existente e adiciona
+    apenas as imagens novas com LBPHFaceRecognizer.update(); cai para o treinamento
+    completo quando não há modelo/manifesto válido ou quando full_retrain=True.
+    cache_dir aponta para o cache de recortes decodificados (ver training_loader).
+    prototypes_per_person reduz as amostras de cada pessoa a k protótipos antes de treinar
+    (ver gallery_compaction); no modo incremental a redução vale para as imagens novas.
+    binary_model_file, se informado, recebe também uma cópia binária do modelo (ver model_store).
+    progress(fase, feitas, total) acompanha as fases "loading" (imagens), "persons" (pessoas),
+    "training" e "saving"; se o callback levantar TrainingCancelled o treinamento para sem
+    tocar no modelo salvo.
+    Levanta TrainingError em caso de falha.
+    """
+    report = progress or (lambda phase, done, total: None)
+    load_progress = lambda done, total: report("loading", done, total)
+    persons_progress = lambda done, total: report("persons", done, total)
+    image_paths = list_training_images(image_dir)
+    manifest = None if full_retrain or not os.path.isfile(trainer_file) else load_manifest(manifest_file)
+    if manifest is not None and manifest.get("prototypes_per_person") != prototypes_per_person:
+        manifest = None # Modelo gerado com outro k: refaz tudo para não misturar as duas reduções
+    new_paths = plan_incremental_update(image_paths, manifest)
+
+    recognizer = cv2.face.LBPHFaceRecognizer_create()
+    if new_paths is not None:
+        known_files = dict(manifest["files"])
+        if not new_paths:
+            unique_ids = {entry["label"] for entry in known_files.values()}
+            return TrainingResult("up_to_date", 0, len(known_files), len(unique_ids))
+        # A pasta inteira continua viva: só as novas são carregadas, mas o cache das antigas fica
+        faces, serial_ids, loaded_paths = load_images_and_labels(new_paths, cache_dir, load_progress,
+                                                                 live_paths=image_paths)
+        if not faces: # Apenas arquivos inválidos, que já foram ignorados no treinamento anterior
+            unique_ids = {entry["label"] for entry in known_files.values()}
+            return TrainingResult("up_to_date", 0, len(known_files), len(unique_ids))
+        model_faces, model_ids, _ = compact_training_set(faces, serial_ids, k=prototypes_per_person,
+                                                         progress=persons_progress)
+        report("training", 0, len(model_faces))
+        try:
+            recognizer.read(trainer_file)
+            recognizer.update(model_faces, np.array(model_ids))
+        except cv2.error as e:
+            print(f"Aviso: Atualização incremental falhou ({e}). Fazendo treinamento completo.")
+            return train_model(image_dir, trainer_file, manifest_file, full_retrain=True, cache_dir=cache_dir,
+                               prototypes_per_person=prototypes_per_person, binary_model_file=binary_model_file,
+                               progress=progress)
+        mode = "incremental"
+    else:
+        faces, serial_ids, loaded_paths = load_images_and_labels(image_paths, cache_dir, load_progress)
+        if not faces or not serial_ids:
+            raise TrainingError('Sem Dados',
+                                'Nenhuma imagem encontrada para treinamento ou IDs não puderam ser extraídos.\n'
+                                'Por favor, registre alguém primeiro e capture as imagens.')
+        known_files = {}
+        model_faces, model_ids, _ = compact_training_set(faces, serial_ids, k=prototypes_per_person,
+                                                         progress=persons_progress)
+        if prototypes_per_person is not None:
+            print(f"Galeria compactada: {len(faces)} -> {len(model_faces)} amostras "
+                  f"({prototypes_per_person} por pessoa)")
+        report("training", 0, len(model_faces))
+        try:
+            recognizer.train(model_faces, np.array(model_ids))
+        except cv2.error as e:
+            error_message = f'Não foi possível treinar o reconhecedor: {e}\n'
+            if "src.size() > 0" in str(e) or "empty" in str(e).lower():
+                error_message += "Verifique se há imagens de treinamento válidas.\n"
+            if "labels" in str(e).lower() and "int" in str(e).lower():
+                error_message += "Os IDs (labels) para treinamento devem ser inteiros.\n"
+            if len(set(serial_ids)) < 2 and "two" in str(e).lower():
+                error_message += "Alguns algoritmos de treinamento podem requerer pelo menos duas pessoas diferentes registradas.\n"
+            raise TrainingError('Erro de Treinamento', error_message)
+        mode = "full"
+
+    report("saving", len(model_faces), len(model_faces)) # Último ponto em que o cancelamento ainda vale
+    try:
+        _save_model_atomically(recognizer, trainer_file)
+    except Exception as e:
+        raise TrainingError('Erro ao Salvar',
+                            f'Não foi possível salvar o arquivo de treinamento {os.path.basename(trainer_file)}: {e}')
+    if binary_model_file:
+        try:
+            save_recognizer_binary(recognizer, binary_model_file)
+        except (OSError, ValueError) as e:
+            # O Trainner.yml continua valendo; uma cópia binária mais antiga que ele é ignorada na leitura
+            print(f"Aviso: Não foi possível salvar o modelo binário: {e}")
+
+    known_files.update(_manifest_entries(loaded_paths, serial_ids))
+    try:
+        save_manifest(manifest_file, known_files, prototypes_per_person) # Todas as imagens, mesmo as não escolhidas
+    except OSError as e:
+        print(f"Aviso: Não foi possível salvar o manifesto de treinamento: {e}")
+        _discard_stale_manifest(manifest_file)
+
+    unique_ids = {entry["label"] for entry in known_files.values()}
+    return TrainingResult(mode, len(loaded_paths), len(known_files), len(unique_ids))
@@ -0,0 +1,293 @@
+############################################# IMPORTING ################################################
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import numpy as np
+from PIL import Image
+
+from sample_archive import split_sample_path, read_sample_archive, SampleArchiveError
+
+############################################# CONSTANTS ################################################
+CACHE_BLOB_FILENAME = "samples.bin" # Recortes em tons de cinza concatenados (uint8)
+CACHE_INDEX_FILENAME = "samples_index.npz" # Nome, assinatura (tamanho/mtime), label, offset e forma de cada recorte
+CACHE_FORMAT_VERSION = 1
+CACHE_COMPACT_GARBAGE_RATIO = 0.5 # Reescreve o blob quando mais da metade dele é de entradas obsoletas
+LOADER_WORKERS = min(8, os.cpu_count() or 1)
+LOADER_EXECUTOR = "thread" # "thread" ou "process"
+PROGRESS_EVERY = 50 # Imagens decodificadas entre dois avisos de progresso
+
+############################################# DECODING #################################################
+
+def parse_serial_from_filename(image_path):
+    """
+    Extrai o serial interno do nome {nome}.{serial}.{id}.{n}.jpg.
+    Retorna None se o nome não seguir o formato esperado; levanta ValueError se o serial não for inteiro.
+    """
+    filename_parts = os.path.basename(image_path).split(".")
+    if len(filename_parts) < 4:
+        return None
+    return int(filename_parts[1])
+
+
+def decode_training_image(image_path):
+    """Decodifica uma imagem de treinamento para tons de cinza, como no carregamento original."""
+    with Image.open(image_path) as pil_image:
+        return np.array(pil_image.convert('L'), 'uint8')
+
+
+def _decode_job(image_path):
+    # Executado nos workers: nunca levanta exceção, devolve o erro como texto
+    try:
+        return image_path, decode_training_image(image_path), None
+    except Exception as e:
+        return image_path, None, str(e)
+
+############################################# CACHE ####################################################
+
+class LoadStats:
+    __slots__ = ("images", "archived", "cache_hits", "decoded", "skipped", "seconds")
+
+    def __init__(self):
+        self.images = 0
+        self.archived = 0
+        self.cache_hits = 0
+        self.decoded = 0
+        self.skipped = 0
+        self.seconds = 0.0
+
+    def describe(self):
+        return (f"{self.images} imagens carregadas em {self.seconds:.2f}s "
+                f"(arquivos .samples: {self.archived}, cache: {self.cache_hits}, decodificadas: {self.decoded}, puladas: {self.skipped})")
+
+
+class TrainingSampleCache:
+    """
+    Cache persistente dos recortes decodificados: um blob binário com todos os pixels e um
+    índice .npz. Cada entrada é invalidada individualmente pelo tamanho/mtime do arquivo de origem,
+    então treinamentos repetidos não decodificam JPEG algum. Novas entradas são acrescentadas ao
+    final do blob; o blob é compactado quando acumula muitas entradas obsoletas.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.blob_path = os.path.join(cache_dir, CACHE_BLOB_FILENAME)
+        self.index_path = os.path.join(cache_dir, CACHE_INDEX_FILENAME)
+        self.entries = {} # nome -> (tamanho, mtime_ns, label, offset, altura, largura)
+        self._blob = None
+        self._loaded = False
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        if not (os.path.isfile(self.index_path) and os.path.isfile(self.blob_path)):
+            return
+        try:
+            with np.load(self.index_path, allow_pickle=False) as index:
+                if int(index["version"]) != CACHE_FORMAT_VERSION:
+                    return
+                columns = [index[key] for key in ("sizes", "mtimes", "labels", "offsets", "heights", "widths")]
+                names = index["names"]
+            # Uma única leitura sequencial do blob inteiro
+            self._blob = np.fromfile(self.blob_path, dtype=np.uint8)
+            for i, name in enumerate(names):
+                entry = tuple(int(col[i]) for col in columns)
+                if entry[3] + entry[4] * entry[5] <= self._blob.size:
+                    self.entries[str(name)] = entry
+        except Exception as e:
+            print(f"Aviso: Cache de treinamento ilegível ({e}). Ele será reconstruído.")
+            self.entries = {}
+            self._blob = None
+
+    def get(self, image_path, signature):
+        self._load()
+        entry = self.entries.get(os.path.basename(image_path))
+        if entry is None or entry[:2] != signature:
+            return None
+        _, _, label, offset, height, width = entry
+        return label, self._blob[offset:offset + height * width].reshape(height, width)
+
+    def store(self, new_items, live_names):
+        """
+        Persiste os recortes recém-decodificados. new_items: lista de (caminho, assinatura, label, imagem).
+        live_names: nomes presentes na pasta; o restante é considerado obsoleto.
+        """
+        self._load()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        live_entries = {name: entry for name, entry in self.entries.items() if name in live_names}
+        for image_path, _, _, _ in new_items:
+            live_entries.pop(os.path.basename(image_path), None)
+        blob_size = self._blob.size if self._blob is not None else 0
+        live_bytes = sum(e[4] * e[5] for e in live_entries.values())
+        compact = blob_size and live_bytes < blob_size * (1.0 - CACHE_COMPACT_GARBAGE_RATIO)
+        if not new_items and not compact and len(live_entries) == len(self.entries):
+            return
+
+        if compact or self._blob is None:
+            # Reescreve o blob só com as entradas vivas
+            chunks, offset, rewritten = [], 0, {}
+            for name, (size, mtime, label, old_offset, height, width) in live_entries.items():
+                chunks.append(self._blob[old_offset:old_offset + height * width])
+                rewritten[name] = (size, mtime, label, offset, height, width)
+                offset += height * width
+            live_entries, blob_parts, mode = rewritten, chunks, 'wb'
+        else:
+            offset, blob_parts, mode = blob_size, [], 'ab'
+
+        for image_path, signature, label, image in new_items:
+            height, width = image.shape[:2]
+            live_entries[os.path.basename(image_path)] = (signature[0], signature[1], label, offset, height, width)
+            blob_parts.append(np.ascontiguousarray(image, dtype=np.uint8).ravel())
+            offset += height * width
+
+        with open(self.blob_path, mode) as blob_file:
+            for part in blob_parts:
+                blob_file.write(part.tobytes())
+        self._write_index(live_entries)
+        self.entries = live_entries
+        self._blob = None
+        self._loaded = False # Próximo uso relê o blob atualizado
+
+    def _write_index(self, entries):
+        names = list(entries)
+        columns = list(zip(*entries.values())) if entries else [()] * 6
+        tmp_path = self.index_path + ".tmp.npz"
+        np.savez(tmp_path, version=np.int32(CACHE_FORMAT_VERSION), names=np.array(names, dtype=str),
+                 sizes=np.array(columns[0], dtype=np.int64), mtimes=np.array(columns[1], dtype=np.int64),
+                 labels=np.array(columns[2], dtype=np.int32), offsets=np.array(columns[3], dtype=np.int64),
+                 heights=np.array(columns[4], dtype=np.int32), widths=np.array(columns[5], dtype=np.int32))
+        os.replace(tmp_path, self.index_path)
+
+############################################# LOADER ###################################################
+
+def load_training_set(image_paths, cache_dir=None, workers=LOADER_WORKERS, executor=LOADER_EXECUTOR,
+                      progress=None, live_paths=None):
+    """
+    Carrega (faces, serial_ids, caminhos_carregados, LoadStats). Recortes já presentes no cache
+    não são decodificados; os demais são decodificados em paralelo e gravados no cache.
+    live_paths lista todas as amostras ainda existentes (padrão: image_paths); entradas do cache
+    fora dela são descartadas, então uma carga parcial (só as imagens novas) deve informá-la.
+    progress(feitas, total), se informado, é chamado durante o carregamento; uma exceção
+    levantada por ele interrompe o carregamento (é assim que o treinamento é cancelado).
+    """
+    start = time.perf_counter()
+    stats = LoadStats()
+    cache = TrainingSampleCache(cache_dir) if cache_dir else None
+    results = {} # caminho -> (label, imagem)
+    to_decode = [] # (caminho, assinatura, label)
+    archived = {} # arquivo .samples -> [(caminho, índice)]
+
+    for image_path in image_paths:
+        sample = split_sample_path(image_path)
+        if sample is not None:
+            archived.setdefault(sample[0], []).append((image_path, sample[1]))
+            continue
+        try:
+            label = parse_serial_from_filename(image_path)
+        except ValueError:
+            print(f"Aviso: Erro ao converter ID para inteiro no arquivo: {image_path}. Pulando.")
+            stats.skipped += 1
+            continue
+        if label is None:
+            print(f"Aviso: Pulando arquivo com formato de nome inesperado: {image_path}")
+            stats.skipped += 1
+            continue
+        try:
+            st = os.stat(image_path)
+        except OSError as e:
+            print(f"Erro ao processar imagem {image_path}: {e}. Pulando.")
+            stats.skipped += 1
+            continue
+        signature = (st.st_size, st.st_mtime_ns)
+        cached = cache.get(image_path, signature) if cache else None
+        if cached is not None and cached[0] == label:
+            results[image_path] = cached
+            stats.cache_hits += 1
+        else:
+            to_decode.append((image_path, signature, label))
+
+    for archive_path, samples in archived.items():
+        # Recortes já decodificados e com tamanho fixo: uma leitura sequencial por pessoa, sem cache
+        try:
+            archive = read_sample_archive(archive_path)
+        except SampleArchiveError as e:
+            print(f"Aviso: {e} Pulando {len(samples)} amostra(s).")
+            stats.skipped += len(samples)
+            continue
+        for image_path, index in samples:
+            if index < archive.count:
+                results[image_path] = (archive.serial, archive.samples[index])
+                stats.archived += 1
+            else:
+                stats.skipped += 1
+
+    total = len(image_paths)
+    done = stats.archived + stats.cache_hits
+    if progress and to_decode:
+        progress(done, total)
+    new_items = []
+    if to_decode:
+        paths = [path for path, _, _ in to_decode]
+        decoded = []
+        pool = None
+        if workers and workers > 1 and len(paths) > 1:
+            pool_class = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+            pool = pool_class(max_workers=workers)
+            jobs = pool.map(_decode_job, paths, chunksize=64 if executor == "process" else 1)
+        else:
+            jobs = map(_decode_job, paths)
+        try:
+            for job in jobs:
+                decoded.append(job)
+                if progress and len(decoded) % PROGRESS_EVERY == 0:
+                    progress(done + len(decoded), total)
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=True, cancel_futures=True) # Em caso de cancelamento, descarta o que falta
+        for (image_path, signature, label), (_, image, error) in zip(to_decode, decoded):
+            if image is None:
+                print(f"Erro ao processar imagem {image_path}: {error}. Pulando.")
+                stats.skipped += 1
+                continue
+            results[image_path] = (label, image)
+            new_items.append((image_path, signature, label, image))
+            stats.decoded += 1
+
+    if progress:
+        progress(total, total)
+    if cache is not None:
+        try:
+            live_paths = image_paths if live_paths is None else live_paths
+            cache.store(new_items, {os.path.basename(path) for path in live_paths})
+        except OSError as e:
+            print(f"Aviso: Não foi possível atualizar o cache de treinamento: {e}")
+
+    faces, serial_ids, loaded_paths = [], [], []
+    for image_path in image_paths: # Mantém a ordem de entrada
+        if image_path in results:
+            label, image = results[image_path]
+            faces.append(image)
+            serial_ids.append(label)
+            loaded_paths.append(image_path)
+    stats.images = len(faces)
+    stats.seconds = time.perf_counter() - start
+    return faces, serial_ids, loaded_paths, stats
+
+
+if __name__ == "__main__":
+    # Uso: python training_loader.py <pasta_de_imagens> [pasta_do_cache]
+    # Mede o tempo de carregamento frio (sem cache) e quente (com cache).
+    if len(sys.argv) < 2:
+        print("Uso: python training_loader.py <pasta_de_imagens> [pasta_do_cache]")
+        sys.exit(1)
+    image_dir = sys.argv[1]
+    cache_dir = sys.argv[2] if len(sys.argv) > 2 else os.path.join(image_dir, ".cache")
+    all_paths = sorted(os.path.join(image_dir, f) for f in os.listdir(image_dir)
+                       if f.lower().endswith(('.jpg', '.png', '.jpeg')))
+    _, _, _, serial_stats = load_training_set(all_paths, cache_dir=None, workers=1)
+    print(f"Serial, sem cache:   {serial_stats.describe()}")
+    _, _, _, cold_stats = load_training_set(all_paths, cache_dir=cache_dir)
+    print(f"Paralelo, cache frio: {cold_stats.describe()}")
+    _, _, _, warm_stats = load_training_set(all_paths, cache_dir=cache_dir)
+    print(f"Cache quente:         {warm_stats.describe()}")
@@ -0,0 +1,117 @@
+############################################# IMPORTING ################################################
+import multiprocessing as mp
+import os
+import queue
+import time
+
+from training import train_model, model_tmp_path, TrainingError, TrainingCancelled
+
+############################################# CONSTANTS ################################################
+CANCEL_GRACE_SECONDS = 3.0 # Tempo para o treino parar sozinho antes de o processo ser encerrado à força
+PROGRESS_MIN_INTERVAL_SECONDS = 0.1 # Mensagens de progresso da mesma fase mais próximas que isso são descartadas
+
+MESSAGE_PROGRESS = "progress" # ("progress", fase, feitas, total)
+MESSAGE_DONE = "done" # ("done", modo, imagens_adicionadas, total_de_imagens, ids_unicos)
+MESSAGE_ERROR = "error" # ("error", título, mensagem)
+MESSAGE_CANCELLED = "cancelled" # ("cancelled",)
+
+############################################# WORKER ###################################################
+
+def _training_process(train_kwargs, messages, cancel_event):
+    """Processo de treinamento: roda train_model e envia progresso e resultado pela fila."""
+    last_sent = {}
+
+    def progress(phase, done, total):
+        if cancel_event.is_set():
+            raise TrainingCancelled()
+        now = time.monotonic()
+        if done < total and now - last_sent.get(phase, 0.0) < PROGRESS_MIN_INTERVAL_SECONDS:
+            return
+        last_sent[phase] = now
+        messages.put((MESSAGE_PROGRESS, phase, done, total))
+
+    try:
+        result = train_model(progress=progress, **train_kwargs)
+    except TrainingCancelled:
+        messages.put((MESSAGE_CANCELLED,))
+    except TrainingError as e:
+        messages.put((MESSAGE_ERROR, e.title, e.message))
+    except Exception as e:
+        messages.put((MESSAGE_ERROR, 'Erro de Treinamento', f'Um erro inesperado ocorreu durante o treinamento: {e}'))
+    else:
+        messages.put((MESSAGE_DONE, result.mode, result.images_added, result.total_images, result.unique_ids))
+
+
+class BackgroundTrainer:
+    """
+    Executa train_model em um processo separado para a interface não travar.
+    Quem usa chama poll() periodicamente (ex.: com window.after) e recebe as mensagens
+    de progresso e a mensagem final. cancel() pede a parada; se o processo estiver preso
+    dentro do recognizer.train, ele é encerrado após CANCEL_GRACE_SECONDS (nunca durante a
+    gravação final). Como o modelo é gravado com os.replace, cancelar nunca deixa um
+    Trainner.yml pela metade.
+    """
+
+    def __init__(self, **train_kwargs):
+        self.train_kwargs = train_kwargs
+        self.context = mp.get_context("spawn") # Sem fork: o processo pai tem Tk e a câmera abertos
+        self.messages = self.context.Queue()
+        self.cancel_event = self.context.Event()
+        self.process = None
+        self.finished = False
+        self.phase = None # Última fase informada pelo processo
+        self._cancel_requested_at = None
+
+    def start(self):
+        self.process = self.context.Process(target=_training_process, name="Training",
+                                            args=(self.train_kwargs, self.messages, self.cancel_event), daemon=True)
+        self.process.start()
+        return self
+
+    @property
+    def running(self):
+        return self.process is not None and not self.finished
+
+    def cancel(self):
+        if self.running and self._cancel_requested_at is None:
+            self.cancel_event.set()
+            self._cancel_requested_at = time.monotonic()
+
+    def poll(self):
+        """Retorna as mensagens pendentes sem bloquear. A última de uma execução é done/error/cancelled."""
+        if self.process is None or self.finished:
+            return []
+        received = []
+        while True:
+            try:
+                message = self.messages.get_nowait()
+            except queue.Empty:
+                break
+            received.append(message)
+            if message[0] == MESSAGE_PROGRESS:
+                self.phase = message[1]
+            else:
+                self._finish()
+                return received
+
+        # Durante "saving" o processo nunca é encerrado: modelo e manifesto precisam ficar coerentes
+        if self._cancel_requested_at is not None and self.phase != "saving" \
+                and time.monotonic() - self._cancel_requested_at > CANCEL_GRACE_SECONDS:
+            self.process.terminate() # recognizer.train não tem pontos de cancelamento
+            self._remove_partial_files()
+            self._finish()
+            received.append((MESSAGE_CANCELLED,))
+        elif not self.process.is_alive() and self.messages.empty():
+            self._finish()
+            received.append((MESSAGE_ERROR, 'Erro de Treinamento',
+                             f'O processo de treinamento terminou inesperadamente (código {self.process.exitcode}).'))
+        return received
+
+    def _finish(self):
+        self.finished = True
+        self.process.join(timeout=1.0)
+
+    def _remove_partial_files(self):
+        trainer_file = self.train_kwargs.get("trainer_file")
+        if trainer_file and os.path.exists(model_tmp_path(trainer_file)):
+            os.remove(model_tmp_path(trainer_file))